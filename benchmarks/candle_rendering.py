@@ -0,0 +1,76 @@
+"""
+Benchmarks recording candlesticks into a QPicture, comparing the former per-bar drawing, which switched the pen and
+brush and issued two drawRect calls for every bar, with the batched drawing of the plot items.
+
+Usage:
+    python benchmarks/candle_rendering.py [number of bars ...]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+import pyqtgraph as pg
+from pyqtgraph import QtCore, QtGui
+from qstock_plotter.libs.data_handler import TradeData
+from qstock_plotter.libs.plot_item import CandlestickPricesItem, CandlestickVolumeItem
+from qstock_plotter.libs.style import DEFAULT_STYLE
+
+def create_trade_data(length, seed=0):
+    rng = np.random.default_rng(seed)
+    close_prices = 1000 + np.cumsum(rng.normal(0, 5, length))
+    open_prices = close_prices + rng.normal(0, 3, length)
+    return TradeData.from_data_frame(pd.DataFrame({
+        "open": open_prices,
+        "close": close_prices,
+        "high": np.maximum(open_prices, close_prices) + rng.uniform(0, 4, length),
+        "low": np.minimum(open_prices, close_prices) - rng.uniform(0, 4, length),
+        "volume": rng.uniform(1e7, 1e8, length),
+        "date": pd.date_range("1900-01-01", periods=length, freq="h"),
+    }))
+
+def draw_prices_per_bar(p, data, style=DEFAULT_STYLE):
+    w = style.bar_width
+    columns = [data.get_x()] + list(data.get_columns(["open", "close", "high", "low"]))
+    for (t, open_price, close_price, high_price, low_price) in zip(*[column.tolist() for column in columns]):
+        if close_price > open_price:
+            p.setBrush(pg.mkBrush(style.positive_color))
+            p.setPen(pg.mkPen(style.positive_color))
+            p.drawRect(QtCore.QRectF(t-w, open_price, w*2, close_price-open_price))
+        else:
+            p.setBrush(pg.mkBrush(style.negative_color))
+            p.setPen(pg.mkPen(style.negative_color))
+            p.drawRect(QtCore.QRectF(t-w, close_price, w*2, open_price-close_price))
+        p.drawRect(QtCore.QRectF(t-style.shadow_width/2, low_price, style.shadow_width, high_price-low_price))
+
+def draw_volume_per_bar(p, data, style=DEFAULT_STYLE):
+    p.setBrush(pg.mkBrush(style.volume_color))
+    p.setPen(pg.mkPen(style.volume_color))
+    w = style.bar_width
+    for (t, volume) in zip(data.get_x().tolist(), (data.get_column("volume")/1e8).tolist()):
+        p.drawRect(QtCore.QRectF(t-w, 0, w*2, volume))
+
+def record(draw):
+    """
+    Returns the seconds taken to record a drawing function into a QPicture.
+    """
+    picture = QtGui.QPicture()
+    p = QtGui.QPainter(picture)
+    start = time.perf_counter()
+    draw(p)
+    p.end()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    app = pg.mkQApp()
+    lengths = [int(length) for length in sys.argv[1:]] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+    print("{:>10} {:>8} {:>12} {:>12} {:>8}".format("bars", "item", "per bar (s)", "batched (s)", "speedup"))
+    for length in lengths:
+        trade_data = create_trade_data(length)
+        for name, item_class, draw_per_bar, data in [
+            ("prices", CandlestickPricesItem, draw_prices_per_bar, trade_data.prices),
+            ("volume", CandlestickVolumeItem, draw_volume_per_bar, trade_data.volume),
+        ]:
+            item = item_class(data)
+            per_bar = record(lambda p: draw_per_bar(p, data))
+            batched = record(lambda p: item._draw_bars(p, 0, len(data)))
+            print("{:>10} {:>8} {:>12.3f} {:>12.3f} {:>7.1f}x".format(length, name, per_bar, batched, per_bar / batched))
@@ -0,0 +1,13 @@
+from qstock_plotter import PriceVolumePlotter
+from qstock_plotter.libs.data_handler import *
+from qstock_plotter.libs.async_loader import load_timeframe
+from PyQt6.QtWidgets import QApplication
+import sys
+
+app = QApplication(sys.argv)
+app.setApplicationName("QStockPlotter")
+widget=PriceVolumePlotter()
+widget.show()
+# the data is loaded in a background thread, a placeholder is shown until it arrived
+widget.plot_trade_data_async(load_timeframe, lambda: HDF5Handler("./sample_stock_data.h5"), "day_data")
+sys.exit(app.exec())
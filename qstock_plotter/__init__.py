@@ -1,9 +1,12 @@
 from PyQt6.QtGui import QResizeEvent
 from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout
 from PyQt6.QtWidgets import QHBoxLayout, QVBoxLayout, QGridLayout, QSizePolicy
+from PyQt6.QtCore import pyqtSignal, QThreadPool
 from qfluentwidgets import TransparentToggleToolButton, FluentIcon, isDarkTheme
 from .widgets.q_plot_widget import QPlotWidget
+from .widgets.x_view_model import XViewModel
 from .widgets.navigation_widget import PivotInterface, SegmentedInterface
+from .widgets.loading_placeholder import LoadingPlaceholder
 from .compoents.zoom_move import (
     StockWidgetZoomBar,
     StockWidgetHorizontalScroller,
@@ -15,16 +18,20 @@ from .compoents.average_line import AverageLineComponent
 from .libs.plot_item import *
 from .libs.style import QStockIcon, set_background_with_theme
 from .libs.data_handler import PricesDataFrame, VolumeDataFrame
+from .libs.async_loader import LoadTask
 
-from typing import Optional
+from typing import Optional, Callable
 
 
 class QStockPlotter(QWidget):
+    sigLoadingFinished = pyqtSignal()
+    sigLoadingFailed = pyqtSignal(object)
 
     def __init__(self, show_zoom_bar=True, parent=None) -> None:
         super().__init__(parent)
 
         self.main_item:Optional[AdaptiveGraphObject] = None
+        self.loading_task:Optional[LoadTask] = None
 
         self.setMinimumSize(450, 200)
         self.main_plotter = QPlotWidget(self)
@@ -104,18 +111,95 @@ class QStockPlotter(QWidget):
                   "full_range",]:
             setattr(self, m, getattr(self.main_plotter, m))
 
+        self.loading_placeholder = LoadingPlaceholder(self)
+        self.loading_placeholder.hide()
+
         set_background_with_theme(self)
 
         qconfig.themeChanged.connect(lambda theme: set_background_with_theme(self, theme))
 
+    def add_main_item_async(self, load_data: Callable, *args, item_factory: Callable = get_plot_item,
+                            pool: Optional[QThreadPool] = None, **kwargs) -> LoadTask:
+        """
+        Loads the data of the main item in a background thread and adds the main item when the data arrived.
+
+        A placeholder with the loading progress is shown over the plot until then.
+
+        Args:
+            load_data (Callable): The loading function returning a ChildDataFrame, called in the background thread
+                as `load_data(progress, *args, **kwargs)`, see `LoadTask`.
+            *args: The positional arguments of load_data.
+            item_factory (Callable, optional): Creates the plot item from the data in the GUI thread.
+                Defaults to get_plot_item.
+            pool (QThreadPool, optional): The thread pool. Defaults to None, i.e., the global thread pool.
+            **kwargs: The keyword arguments of load_data.
+
+        Returns:
+            LoadTask: The started task.
+        """
+        task = LoadTask(load_data, *args, **kwargs)
+        self.show_loading(task)
+        def on_finished(data):
+            if self.hide_loading(task):
+                plot_item = item_factory(data)
+                self.add_main_item(plot_item, x_ticks=plot_item.get_x_ticks())
+                self.sigLoadingFinished.emit()
+        task.signals.sigFinished.connect(on_finished)
+        return task.start(pool)
+
+    def show_loading(self, task: LoadTask):
+        """
+        Shows the placeholder with the progress of a loading task over the plot. A previous loading task is cancelled.
+
+        Note:
+            The placeholder is hidden when the task failed. The caller hides it when the result was used, see
+            `hide_loading`.
+
+        Args:
+            task (LoadTask): The loading task, which is not started yet.
+        """
+        if self.loading_task is not None:
+            self.loading_task.cancel()
+        self.loading_task = task
+        self.loading_placeholder.set_progress(0)
+        self.loading_placeholder.cover(self.main_plotter)
+        def on_progress(value, message):
+            if task is self.loading_task:
+                self.loading_placeholder.set_progress(value, message)
+        def on_error(error):
+            if task is self.loading_task:
+                self.loading_task = None
+                self.loading_placeholder.set_error(f"Failed to load data: {error}")
+                self.sigLoadingFailed.emit(error)
+        task.signals.sigProgress.connect(on_progress)
+        task.signals.sigError.connect(on_error)
+
+    def hide_loading(self, task: LoadTask):
+        """
+        Hides the placeholder of a loading task after its result was used.
+
+        Args:
+            task (LoadTask): The loading task.
+
+        Returns:
+            bool: False if the task is not the current loading task, e.g., it was cancelled, and its result should be ignored.
+        """
+        if task is not self.loading_task:
+            return False
+        self.loading_task = None
+        self.loading_placeholder.hide()
+        return True
+
     def add_main_item(self, plot_item, x_ticks=None, y_ticks=None):
         if self.main_item is not None:
             raise Exception(
                 "Main item already exists. There can only be one main item."
             )
         self.main_item = plot_item
-        self.main_plotter.add_item(plot_item, x_ticks, y_ticks)
-        self.average_line_component.add_default_average_lines()
+        # the bounds are calculated once for the main item and its average lines
+        with self.main_plotter.batch_update():
+            self.main_plotter.add_item(plot_item, x_ticks, y_ticks)
+            self.average_line_component.add_default_average_lines()
 
     def remove_main_item(self):
         if self.main_item is None:
@@ -133,50 +217,106 @@ class QStockPlotter(QWidget):
 
     def resizeEvent(self, a0: QResizeEvent) -> None:
         self.navigation_widget.setFixedWidth(min(int(self.width() * 0.3), 350))
-        return super().resizeEvent(a0)
+        return_value = super().resizeEvent(a0)
+        if self.loading_placeholder.isVisible():
+            self.loading_placeholder.cover(self.main_plotter)
+        return return_value
 
     def update_plot(self, x_loc:Optional[float]=None, x_range:Optional[float]=None):
         self.main_plotter.update_plot(x_loc, x_range)
 
-class PriceVolumePlotter(QWidget):
+class MultiPanePlotter(QWidget):
+    """
+    A plotter stacking any number of QStockPlotter panes, e.g., prices, volume and indicators, with a shared x-view.
 
-    def __init__(self, parent=None):
+    The plot widgets of all the panes are linked by one XViewModel: dragging, scrolling or zooming any pane requests
+    an update of the shared x-view, which is computed once per frame and applied to all the panes in a single pass,
+    each pane calculating its own y-range. The panes therefore never update each other through their view signals.
+
+    Attributes:
+        panes (list): The QStockPlotter panes from top to bottom.
+        x_view_model (XViewModel): The shared x-view of the panes.
+
+    Methods:
+        add_pane(plotter, stretch): Adds a pane below the other panes.
+        remove_pane(plotter): Removes a pane, giving it its own x-view.
+    """
+
+    def __init__(self, panes: Optional[list] = None, parent=None):
+        """
+        Initializes the MultiPanePlotter object.
+
+        Args:
+            panes (list, optional): The QStockPlotter panes from top to bottom. Defaults to None, i.e., no pane.
+            parent (QWidget, optional): The parent widget. Defaults to None.
+        """
         super().__init__(parent)
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(8, 8, 8, 8)
         self.main_layout.setSpacing(8)
         self.setLayout(self.main_layout)
 
-        self.price_plotter = QStockPlotter(show_zoom_bar=True)
-        self.volume_plotter = QStockPlotter(show_zoom_bar=True)
-
-        self.price_plotter.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.volume_plotter.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.main_layout.addWidget(self.price_plotter,stretch=3)
-        self.main_layout.addWidget(self.volume_plotter,stretch=1)
-
-        self.price_plotter.main_plotter.sigViewChanged.connect(
-            lambda: self.__on_view_changed(self.price_plotter.main_plotter)
-        )
-        self.volume_plotter.main_plotter.sigViewChanged.connect(
-            lambda: self.__on_view_changed(self.volume_plotter.main_plotter)
-        )
+        self.panes = []
+        self.x_view_model = XViewModel(self)
+        for pane in panes if panes is not None else []:
+            self.add_pane(pane)
 
         set_background_with_theme(self)
 
         qconfig.themeChanged.connect(lambda theme: set_background_with_theme(self, theme))
 
-    def __on_view_changed(self, active_plot_widget):
-        if active_plot_widget == self.price_plotter.main_plotter:
-            self.volume_plotter.update_plot(
-                x_loc=active_plot_widget.viewRect().left(),
-                x_range=active_plot_widget.viewRect().width(),
-            )
-        else:
-            self.price_plotter.update_plot(
-                x_loc=active_plot_widget.viewRect().left(),
-                x_range=active_plot_widget.viewRect().width(),
-            )
+    def add_pane(self, plotter: QStockPlotter, stretch: int = 1):
+        """
+        Adds a pane below the other panes and links it to the shared x-view.
+
+        Args:
+            plotter (QStockPlotter): The pane.
+            stretch (int, optional): The stretch factor of the pane in the layout. Defaults to 1.
+        """
+        plotter.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.main_layout.addWidget(plotter, stretch=stretch)
+        self.panes.append(plotter)
+        self.x_view_model.add_pane(plotter.main_plotter)
+        if len(self.panes) > 1:
+            # the new pane follows the x-view of the first pane
+            self.panes[0].main_plotter.update_plot()
+
+    def remove_pane(self, plotter: QStockPlotter):
+        """
+        Removes a pane from the plotter and gives it its own x-view.
+
+        Args:
+            plotter (QStockPlotter): The pane.
+        """
+        self.x_view_model.remove_pane(plotter.main_plotter)
+        self.main_layout.removeWidget(plotter)
+        self.panes.remove(plotter)
+        plotter.setParent(None)
+
+    def update_plot(self, x_loc:Optional[float]=None, x_range:Optional[float]=None):
+        self.panes[0].update_plot(x_loc, x_range)
+
+    def set_x_range(self, x_loc:Optional[float]=None, x_range:Optional[float]=None):
+        for pane in self.panes:
+            pane.set_x_range(x_loc, x_range)
+
+    def move_to_end(self):
+        self.panes[0].move_to_end()
+    
+    def move_to_start(self):
+        self.panes[0].move_to_start()
+
+    def full_range(self):
+        self.panes[0].full_range()
+
+class PriceVolumePlotter(MultiPanePlotter):
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self.price_plotter = QStockPlotter(show_zoom_bar=True)
+        self.volume_plotter = QStockPlotter(show_zoom_bar=True)
+        self.add_pane(self.price_plotter, stretch=3)
+        self.add_pane(self.volume_plotter, stretch=1)
 
     def plot_price_volume(
         self, price_data: PricesDataFrame, 
@@ -190,18 +330,29 @@ class PriceVolumePlotter(QWidget):
     def plot_trade_data(self, trade_data: TradeData):
         self.plot_price_volume(trade_data.prices, trade_data.volume)
 
-    def update_plot(self, x_loc:Optional[float]=None, x_range:Optional[float]=None):
-        self.price_plotter.update_plot(x_loc, x_range)
-
-    def set_x_range(self, x_loc:Optional[float]=None, x_range:Optional[float]=None):
-        self.price_plotter.set_x_range(x_loc, x_range)
-        self.volume_plotter.set_x_range(x_loc, x_range)
-
-    def move_to_end(self):
-        self.price_plotter.move_to_end()
-    
-    def move_to_start(self):
-        self.price_plotter.move_to_start()
-
-    def full_range(self):
-        self.price_plotter.full_range()
\ No newline at end of file
+    def plot_trade_data_async(self, load_trade_data: Callable, *args, pool: Optional[QThreadPool] = None, **kwargs) -> LoadTask:
+        """
+        Loads trade data in a background thread and plots it when it arrived.
+
+        Placeholders with the loading progress are shown over both plots until then.
+
+        Args:
+            load_trade_data (Callable): The loading function returning a TradeData, called in the background thread
+                as `load_trade_data(progress, *args, **kwargs)`, see `LoadTask`.
+            *args: The positional arguments of load_trade_data.
+            pool (QThreadPool, optional): The thread pool. Defaults to None, i.e., the global thread pool.
+            **kwargs: The keyword arguments of load_trade_data.
+
+        Returns:
+            LoadTask: The started task.
+        """
+        task = LoadTask(load_trade_data, *args, **kwargs)
+        self.price_plotter.show_loading(task)
+        self.volume_plotter.show_loading(task)
+        def on_finished(trade_data):
+            price_current = self.price_plotter.hide_loading(task)
+            volume_current = self.volume_plotter.hide_loading(task)
+            if price_current and volume_current:
+                self.plot_trade_data(trade_data)
+        task.signals.sigFinished.connect(on_finished)
+        return task.start(pool)
@@ -1,7 +1,7 @@
 import numpy as np
 from typing import Union
 from PyQt6.QtGui import QContextMenuEvent,QColor,QIcon
-from PyQt6.QtCore import Qt,pyqtSignal
+from PyQt6.QtCore import Qt,pyqtSignal,QTimer
 from PyQt6.QtWidgets import QWidget
 from qfluentwidgets import CommandBar,FluentIcon,Action,FluentIconBase,qconfig,RoundMenu
 from qfluentwidgets.common.overload import singledispatchmethod
@@ -10,16 +10,34 @@ from pyqtgraph import PlotCurveItem
 from ..widgets.q_plot_widget import QPlotWidget
 from ..widgets.colorful_toggle_button import ColorfulToggleButton
 from ..widgets.value_select_box import NewAverageLineBox
+from ..libs.rolling import AVERAGE_FUNCTIONS, ema_continue
+from ..libs.range_index import RangeIndex
 
 class AverageLineItem(PlotCurveItem):
     """
     A class representing an average line item on a plot.
 
+    The averages are kept in over-allocated buffers. When bars are appended or the last bar is updated, only the
+    averages depending on the changed bars are calculated, from the windows containing them for the simple and
+    weighted averages and from the last kept average for the exponential average, and written into the buffers in
+    place. The buffers grow by doubling, so the x and y arrays are not reallocated for every new bar. A range index
+    over the averages, updated from the first changed average, answers the local plot range without scanning the
+    visible averages.
+
+    Data read on demand, e.g., the close prices of a windowed store, is not read as a whole: the averages are
+    calculated in blocks of `lazy_block_size` averages when their local plot range is queried or, once the view
+    settled, when they come into the view, and the averages not calculated yet are not drawn. The exponential average depends on all the previous
+    data points, so its blocks are calculated from the first missing block on.
+
     Attributes:
         num_average_data (int): The number of data points to use for calculating the average.
+        average_type (str): The type of the moving average, one of "sma", "wma" and "ema", see `AVERAGE_FUNCTIONS`.
+        lazy_block_size (int): The number of averages calculated at once for data read on demand.
     """
 
-    def __init__(self, data, num_average_data:int, color:QColor, line_width: float):
+    lazy_block_size = 4096
+
+    def __init__(self, data, num_average_data:int, color:QColor, line_width: float, average_type: str = "sma"):
         """
         Initializes an AverageLineItem object.
 
@@ -28,12 +46,158 @@ class AverageLineItem(PlotCurveItem):
             num_average_data (int): The number of data points to use for calculating the average.
             color (str): The color of the average line.
             line_width (float): The width of the average line.
+            average_type (str, optional): The type of the moving average, one of "sma", "wma" and "ema".
+                Defaults to "sma".
         """
-        super().__init__(pen=pg.mkPen(color, width=line_width),
-                         clickable=False,
-                         x=np.arange(num_average_data-1, len(data)),
-                         y=np.asarray([np.mean(data[i:i+num_average_data]) for i in range(len(data)-num_average_data+1)]))
+        super().__init__(pen=pg.mkPen(color, width=line_width), clickable=False)
+        if average_type not in AVERAGE_FUNCTIONS:
+            raise ValueError("average_type must be one of {}".format(", ".join(AVERAGE_FUNCTIONS.keys())))
         self.num_average_data = num_average_data
+        self.average_type = average_type
+        self.__xs = np.empty(0)
+        self.__ys = np.empty(0)
+        self.__length = 0
+        self.__range_index = None
+        # the data read on demand and whether each block of its averages is calculated, None for in-memory data
+        self.__lazy_data = None
+        self.__calculated_blocks = np.zeros(0, dtype=bool)
+        # the view may pass through other ranges while it is set, e.g., the full range when pyqtgraph leaves its auto
+        # range, so the averages in the view are only calculated when the control returns to the event loop
+        self.__view_timer = QTimer(self)
+        self.__view_timer.setSingleShot(True)
+        self.__view_timer.timeout.connect(self.__calculate_view_range)
+        self.set_average_data(data)
+
+    def __reserve(self, length, keep):
+        """
+        Makes the buffers hold at least `length` averages, keeping the first `keep` ones.
+        """
+        if length <= len(self.__ys):
+            return
+        capacity = max(length, 2 * len(self.__ys), 16)
+        ys = np.empty(capacity, dtype=np.float64)
+        ys[:keep] = self.__ys[:keep]
+        self.__ys = ys
+        self.__xs = np.arange(self.num_average_data-1, self.num_average_data-1+capacity, dtype=np.float64)
+
+    def set_average_data(self, data, start: int = 0):
+        """
+        Calculates the average line again, e.g., after bars were appended to the data.
+
+        Args:
+            data (array-like): The data points for which the average line is calculated.
+            start (int, optional): The position of the first changed data point. Averages which only depend on
+                earlier data points are kept. Defaults to 0, i.e., all averages are calculated.
+        """
+        num_average_data = self.num_average_data
+        average_function, windowed = AVERAGE_FUNCTIONS[self.average_type]
+        length = max(0, len(data)-num_average_data+1)
+        # the average at position i of the line is the one of the window ending at the data point i+num_average_data-1
+        first = min(max(0, start-num_average_data+1), self.__length, length)
+        if not isinstance(data, np.ndarray):
+            self.__set_lazy_data(data, first, length)
+            return
+        self.__lazy_data = None
+        if windowed or first == 0:
+            new_ys = average_function(np.asarray(data[first:]), num_average_data)
+        else:
+            # an exponential average is continued from the last kept average
+            new_ys = ema_continue(np.asarray(data[first+num_average_data-1:]), 2 / (num_average_data + 1), self.__ys[first-1])
+        self.__reserve(length, first)
+        self.__ys[first:length] = new_ys
+        self.__length = length
+        ys = self.__ys[:length]
+        if self.__range_index is None:
+            self.__range_index = RangeIndex(ys, ys)
+        else:
+            self.__range_index.update(ys, ys, first)
+        self.updateData(x=self.__xs[:length], y=ys, connect="all")
+
+    def __set_lazy_data(self, data, first, length):
+        """
+        Keeps data read on demand, dropping the averages from position `first` on, which are calculated again when
+        they are needed.
+        """
+        self.__lazy_data = data
+        self.__range_index = None
+        self.__reserve(length, first)
+        self.__ys[first:length] = np.nan
+        self.__length = length
+        calculated_blocks = np.zeros(-(-length // self.lazy_block_size), dtype=bool)
+        kept_blocks = min(first // self.lazy_block_size, len(self.__calculated_blocks))
+        calculated_blocks[:kept_blocks] = self.__calculated_blocks[:kept_blocks]
+        self.__calculated_blocks = calculated_blocks
+        # the averages not calculated yet are NaN and not drawn
+        self.updateData(x=self.__xs[:length], y=self.__ys[:length], connect="finite")
+        self.__view_timer.start(0)
+
+    def __calculate_range(self, start, end):
+        """
+        Calculates the missing blocks of averages of data read on demand which contain the averages in [start, end).
+        Consecutive missing blocks are calculated from a single read of the data.
+        """
+        if self.__lazy_data is None or start >= end:
+            return
+        num_average_data, block_size = self.num_average_data, self.lazy_block_size
+        average_function, windowed = AVERAGE_FUNCTIONS[self.average_type]
+        first_block = max(int(start), 0) // block_size
+        last_block = min(int(end) - 1, self.__length - 1) // block_size
+        if not windowed:
+            # an exponential average needs all the previous averages
+            missing = np.flatnonzero(~self.__calculated_blocks[:last_block + 1])
+            first_block = missing[0] if len(missing) > 0 else last_block + 1
+        changed = False
+        block = first_block
+        while block <= last_block:
+            if self.__calculated_blocks[block]:
+                block += 1
+                continue
+            run_end = block
+            while run_end + 1 <= last_block and not self.__calculated_blocks[run_end + 1]:
+                run_end += 1
+            first, length = block * block_size, min((run_end + 1) * block_size, self.__length)
+            if windowed or first == 0:
+                new_ys = average_function(np.asarray(self.__lazy_data[first:length+num_average_data-1]), num_average_data)
+            else:
+                new_ys = ema_continue(np.asarray(self.__lazy_data[first+num_average_data-1:length+num_average_data-1]),
+                                      2 / (num_average_data + 1), self.__ys[first-1])
+            self.__ys[first:length] = new_ys
+            self.__calculated_blocks[block:run_end + 1] = True
+            changed = True
+            block = run_end + 1
+        if changed:
+            self.updateData(x=self.__xs[:self.__length], y=self.__ys[:self.__length], connect="finite")
+
+    def __get_view_x_range(self):
+        """
+        Returns the positions of the averages in the x-range of the view, an empty range if the item is not in a view.
+        """
+        view_box = self.getViewBox()
+        if view_box is None:
+            return 0, 0
+        x_start, x_end = view_box.viewRange()[0]
+        # the segments crossing the edges of the view also need the averages just outside of it
+        return self.__get_positions(x_start-1, x_end+1)
+
+    def __get_positions(self, start, end):
+        # the average at position i of the line is plotted at x = i+num_average_data-1, the positions cover the
+        # x-values in [int(start), int(end)] like the range of the bars, see ChildDataFrame.get_local_range
+        x_offset = self.num_average_data-1
+        return max(0, int(start)-x_offset), max(0, int(end)-x_offset+1)
+
+    def __calculate_view_range(self):
+        if self.__lazy_data is not None and self.isVisible():
+            self.__calculate_range(*self.__get_view_x_range())
+
+    def viewRangeChanged(self):
+        super().viewRangeChanged()
+        if self.__lazy_data is not None:
+            self.__view_timer.start(0)
+
+    def setVisible(self, visible: bool):
+        super().setVisible(visible)
+        if visible and self.__lazy_data is not None:
+            self.__view_timer.start(0)
 
     def get_local_plot_range(self, start: float, end: float):
         """
@@ -47,12 +211,17 @@ class AverageLineItem(PlotCurveItem):
             tuple: A tuple containing the minimum and maximum values of the average line within the range.
                    If there are no data points within the range, returns None.
         """
-        _, ys = self.getData()
-        ys = ys[max(0, int(start-self.num_average_data)):max(0, int(end-self.num_average_data))]
-        if len(ys) > 0:
-            return np.min(ys), np.max(ys)
-        else:
+        start, end = self.__get_positions(start, end)
+        if self.__lazy_data is not None:
+            self.__calculate_range(start, end)
+            ys = self.__ys[start:min(end, self.__length)]
+            if len(ys) == 0 or np.isnan(ys).all():
+                return None
+            return np.nanmin(ys), np.nanmax(ys)
+        min_value, max_value = self.__range_index.query(start, end)
+        if np.isnan(min_value):
             return None
+        return min_value, max_value
 
 class AverageLineButton(ColorfulToggleButton):
     """
@@ -179,17 +348,23 @@ class AverageLineComponent():
         toggle_button.setFixedHeight(25)
         toggle_button.setChecked(True)
         def on_toggle_button_clicked():
+            # hiding a line keeps it plotted, so the bounds of the plot are not calculated again
+            self.plot_widget.set_item_visible(average_line, toggle_button.isChecked())
             if toggle_button.isChecked():
-                self.plot_widget.add_item(average_line)
                 self.average_lines[num_average_data] = average_line
             else:
-                self.plot_widget.remove_item(average_line)
                 self.average_lines.pop(num_average_data)
         def on_remove_button_clicked():
+            if hasattr(self.parent.main_item, "sigDataChanged"):
+                self.parent.main_item.sigDataChanged.disconnect(on_data_changed)
             self.plot_widget.remove_item(average_line)
-            self.average_lines.pop(num_average_data)
+            self.average_lines.pop(num_average_data, None)
             self.plot_items_bar.removeWidget(toggle_button)
             toggle_button.deleteLater()
+        def on_data_changed(start):
+            average_line.set_average_data(self.parent.main_item.get_feature_value(), start)
+        if hasattr(self.parent.main_item, "sigDataChanged"):
+            self.parent.main_item.sigDataChanged.connect(on_data_changed)
         toggle_button.clicked.connect(on_toggle_button_clicked)
         toggle_button.sigRemoveClicked.connect(on_remove_button_clicked)
         self.plot_items_bar._insertWidgetToLayout(len(self.plot_items_bar._widgets)-4, toggle_button)
@@ -199,23 +374,26 @@ class AverageLineComponent():
         Adds the default average lines based on the style of the main item.
         """
         style = self.parent.main_item.style
-        for num_average_data in style.average_line_color.keys():
-            self.add_average_line(num_average_data, style.average_line_color[num_average_data])
+        with self.plot_widget.batch_update():
+            for num_average_data in style.average_line_color.keys():
+                self.add_average_line(num_average_data, style.average_line_color[num_average_data])
     
     def show_all_average_lines(self):
         """
         Shows all the average lines.
         """
-        for item in self.plot_items_bar._widgets:
-            if isinstance(item, AverageLineButton):
-                if not item.isChecked():
-                    item.click()
+        with self.plot_widget.batch_update():
+            for item in self.plot_items_bar._widgets:
+                if isinstance(item, AverageLineButton):
+                    if not item.isChecked():
+                        item.click()
     
     def hide_all_average_lines(self):
         """
         Hides all the average lines.
         """
-        for item in self.plot_items_bar._widgets:
-            if isinstance(item, AverageLineButton):
-                if item.isChecked():
-                    item.click()
\ No newline at end of file
+        with self.plot_widget.batch_update():
+            for item in self.plot_items_bar._widgets:
+                if isinstance(item, AverageLineButton):
+                    if item.isChecked():
+                        item.click()
\ No newline at end of file
@@ -180,7 +180,7 @@ class DrawLineComponent(QObject):
         self.command_bar.hide()
         self.current_custom_line = None
         if self.dynamic_line is not None:
-            self.plot_widget.remove_item(self.dynamic_line)
+            self.plot_widget.remove_overlay_item(self.dynamic_line)
             self.dynamic_line = None
         self.num_new_added_points = 0
 
@@ -394,7 +394,9 @@ class DrawLineComponent(QObject):
                         ),
                         clickable=False
                     )
-                    self.plot_widget.add_item(self.dynamic_line)
+                    self.plot_widget.add_overlay_item(self.dynamic_line)
+                elif not self.dynamic_line.isVisible():
+                    self.dynamic_line.show()
                 self.dynamic_line.updateData(x=np.array([xs[-1],mouse_point.x()]),y=np.array([ys[-1],mouse_point.y()]))
 
     def __on_plot_widget_mouse_clicked(self,event=None):
@@ -428,15 +430,15 @@ class DrawLineComponent(QObject):
     
     def __on_plot_widget_mouse_leaved(self, event):
         """
-        Removes the dynamic line from the plot widget when the mouse leaves.
+        Hides the dynamic line when the mouse leaves. The line stays in the overlay of the plot widget until the
+        command bar is deactivated, so it is only updated in place while drawing.
 
         Parameters:
         - event: The mouse leave event.
 
         """
         if self.dynamic_line is not None:
-            self.plot_widget.remove_item(self.dynamic_line)
-            self.dynamic_line = None
+            self.dynamic_line.hide()
 
     def eventFilter(self, a0: QObject, a1: QEvent) -> bool:
         """
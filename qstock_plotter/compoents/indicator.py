@@ -0,0 +1,536 @@
+import weakref
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from PyQt6.QtGui import QColor
+import pyqtgraph as pg
+from pyqtgraph import PlotCurveItem
+from ..widgets.q_plot_widget import QPlotWidget
+from ..libs.style import DEFAULT_STYLE
+from ..libs.data_handler import ColumnStore, read_only
+from ..libs.rolling import sma, ema, ema_continue, rolling_std, reduce_windows
+from ..libs.range_index import RangeIndex
+
+@dataclass
+class Indicator():
+    """
+    A registered indicator.
+
+    Attributes:
+        function (Callable): The vectorized function computing the indicator. It is called with the input columns as
+            keyword arguments and the parameters, and returns a dictionary mapping the output keys to arrays as long
+            as the inputs, with NaN where the indicator is not defined yet.
+        inputs (tuple): The keys of the input columns, e.g., ("high", "low", "close").
+        outputs (tuple): The keys of the outputs, e.g., ("middle", "upper", "lower").
+        defaults (dict): The default parameters.
+        overlay (bool): Whether the indicator is in the unit of the prices, i.e., drawn over them.
+        update (Callable): An optional function continuing the indicator after the bars from `start` on changed, see
+            `register_indicator_update`. Without it, the indicator is computed again for all the bars.
+    """
+    function: Callable
+    inputs: tuple
+    outputs: tuple
+    defaults: dict = field(default_factory=dict)
+    overlay: bool = True
+    update: Optional[Callable] = None
+
+# indicator name -> Indicator
+INDICATORS = {}
+
+def register_indicator(name: str, inputs: tuple, outputs: tuple, overlay: bool = True, **defaults):
+    """
+    Returns a decorator registering a vectorized indicator function under a name.
+
+    Args:
+        name (str): The name of the indicator.
+        inputs (tuple): The keys of the input columns.
+        outputs (tuple): The keys of the outputs.
+        overlay (bool, optional): Whether the indicator is in the unit of the prices. Defaults to True.
+        **defaults: The default parameters.
+
+    Returns:
+        Callable: The decorator, returning the function unchanged.
+    """
+    def decorator(function):
+        INDICATORS[name] = Indicator(function, tuple(inputs), tuple(outputs), defaults, overlay)
+        return function
+    return decorator
+
+def register_indicator_update(name: str):
+    """
+    Returns a decorator registering the update function of a registered indicator.
+
+    The update function is called with a dictionary mapping the keys of all the results of the indicator to their
+    values before `start`, `start`, the input columns as keyword arguments and the parameters. It returns a dictionary
+    mapping the same keys to the values from `start` on, or None if the indicator has to be computed for all the bars
+    again, e.g., because `start` is within the first window. Results whose keys start with "_" are not outputs but
+    the state needed to continue the indicator, e.g., the exponential averages of a MACD.
+
+    Args:
+        name (str): The name of the indicator.
+
+    Returns:
+        Callable: The decorator, returning the function unchanged.
+    """
+    def decorator(function):
+        INDICATORS[name].update = function
+        return function
+    return decorator
+
+def continue_windows(function, previous, start, window, **inputs_and_params):
+    """
+    Continues an indicator whose values only depend on the bars of a window, by computing it from the first window
+    containing a changed bar.
+
+    Args:
+        function (Callable): The indicator function.
+        previous (dict): The results before `start`, unused.
+        start (int): The first changed bar.
+        window (int): The length of the windows.
+        **inputs_and_params: The input columns and the other parameters.
+
+    Returns:
+        dict: The results from `start` on.
+    """
+    first = max(start - window + 1, 0)
+    inputs_and_params = {key: value[first:] if isinstance(value, np.ndarray) else value
+                         for key, value in inputs_and_params.items()}
+    return {key: values[start-first:] for key, values in function(window=window, **inputs_and_params).items()}
+
+def get_states(previous, start, keys):
+    """
+    Returns the values of results at the bar before `start`, or None if one of them is not defined yet.
+
+    Args:
+        previous (dict): The results before `start`.
+        start (int): The first changed bar.
+        keys (tuple): The keys of the results.
+
+    Returns:
+        list or None: The values.
+    """
+    if start < 1:
+        return None
+    states = [previous[key][start-1] for key in keys]
+    return states if np.all(np.isfinite(states)) else None
+
+def pad(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Pads the values of an indicator with NaN at the start, so they are aligned with the last `length` bars.
+
+    Args:
+        values (np.ndarray): The values for the last bars.
+        length (int): The number of bars.
+
+    Returns:
+        np.ndarray: A float64 array of the given length.
+    """
+    padded = np.full(length, np.nan)
+    if len(values) > 0:
+        padded[length-len(values):] = values
+    return padded
+
+@register_indicator("bollinger", ("close",), ("middle", "upper", "lower"), window=20, num_std=2.0)
+def bollinger_bands(close, window=20, num_std=2.0):
+    middle = sma(np.asarray(close, dtype=np.float64), window)
+    deviation = num_std * rolling_std(np.asarray(close, dtype=np.float64), window)
+    return {key: pad(values, len(close)) for key, values in
+            [("middle", middle), ("upper", middle + deviation), ("lower", middle - deviation)]}
+
+@register_indicator_update("bollinger")
+def update_bollinger_bands(previous, start, close, window=20, num_std=2.0):
+    return continue_windows(bollinger_bands, previous, start, window, close=close, num_std=num_std)
+
+@register_indicator("macd", ("close",), ("macd", "signal", "histogram"), overlay=False, fast=12, slow=26, signal=9)
+def macd(close, fast=12, slow=26, signal=9):
+    fast_average, slow_average = ema(close, fast), ema(close, slow)
+    line = fast_average[len(close)-fast+1-len(slow_average):] - slow_average
+    signal_line = ema(line, signal)
+    return {"macd": pad(line, len(close)),
+            "signal": pad(signal_line, len(close)),
+            "histogram": pad(line[len(line)-len(signal_line):] - signal_line, len(close)),
+            "_fast": pad(fast_average, len(close)),
+            "_slow": pad(slow_average, len(close))}
+
+@register_indicator_update("macd")
+def update_macd(previous, start, close, fast=12, slow=26, signal=9):
+    states = get_states(previous, start, ("_fast", "_slow", "signal"))
+    if states is None:
+        return None
+    close = np.asarray(close[start:], dtype=np.float64)
+    fast_average = ema_continue(close, 2 / (fast + 1), states[0])
+    slow_average = ema_continue(close, 2 / (slow + 1), states[1])
+    line = fast_average - slow_average
+    signal_line = ema_continue(line, 2 / (signal + 1), states[2])
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line,
+            "_fast": fast_average, "_slow": slow_average}
+
+def relative_strength_index(gains, losses):
+    """
+    Returns the relative strength index from the smoothed gains and losses.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(losses > 0, 100 - 100 / (1 + gains / losses), np.where(gains > 0, 100.0, 50.0))
+
+@register_indicator("rsi", ("close",), ("rsi",), overlay=False, window=14)
+def rsi(close, window=14):
+    changes = np.diff(np.asarray(close, dtype=np.float64))
+    # Wilder's smoothing is an exponential average with the smoothing factor 1/window
+    gains = ema(np.maximum(changes, 0), window, alpha=1/window)
+    losses = ema(np.maximum(-changes, 0), window, alpha=1/window)
+    return {"rsi": pad(relative_strength_index(gains, losses), len(close)),
+            "_gains": pad(gains, len(close)),
+            "_losses": pad(losses, len(close))}
+
+@register_indicator_update("rsi")
+def update_rsi(previous, start, close, window=14):
+    states = get_states(previous, start, ("_gains", "_losses"))
+    if states is None:
+        return None
+    changes = np.diff(np.asarray(close[start-1:], dtype=np.float64))
+    gains = ema_continue(np.maximum(changes, 0), 1 / window, states[0])
+    losses = ema_continue(np.maximum(-changes, 0), 1 / window, states[1])
+    return {"rsi": relative_strength_index(gains, losses), "_gains": gains, "_losses": losses}
+
+def true_range(high, low, previous_close):
+    """
+    Returns the true ranges of bars from their high and low prices and the close prices of the bars before them.
+    """
+    return np.maximum(high - low, np.maximum(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+@register_indicator("atr", ("high", "low", "close"), ("atr",), overlay=False, window=14)
+def atr(high, low, close, window=14):
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    return {"atr": pad(ema(true_range(high[1:], low[1:], close[:-1]), window, alpha=1/window), len(close))}
+
+@register_indicator_update("atr")
+def update_atr(previous, start, high, low, close, window=14):
+    states = get_states(previous, start, ("atr",))
+    if states is None:
+        return None
+    high, low, close = (np.asarray(values[start-1:], dtype=np.float64) for values in (high, low, close))
+    return {"atr": ema_continue(true_range(high[1:], low[1:], close[:-1]), 1 / window, states[0])}
+
+@register_indicator("vwap", ("high", "low", "close", "volume"), ("vwap",), window=None)
+def vwap(high, low, close, volume, window=None):
+    typical_price = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) + np.asarray(close, dtype=np.float64)) / 3
+    volume = np.asarray(volume, dtype=np.float64)
+    if window is None:
+        turnover, total_volume = np.cumsum(typical_price * volume), np.cumsum(volume)
+    else:
+        turnover = reduce_windows(typical_price * volume, window, lambda windows: windows.sum(axis=-1))
+        total_volume = reduce_windows(volume, window, lambda windows: windows.sum(axis=-1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(total_volume > 0, turnover / total_volume, np.nan)
+    if window is not None:
+        return {"vwap": pad(values, len(close))}
+    return {"vwap": values, "_turnover": turnover, "_volume": total_volume}
+
+@register_indicator_update("vwap")
+def update_vwap(previous, start, high, low, close, volume, window=None):
+    if window is not None:
+        return continue_windows(vwap, previous, start, window, high=high, low=low, close=close, volume=volume)
+    states = get_states(previous, start, ("_turnover", "_volume"))
+    if states is None:
+        return None
+    typical_price = (np.asarray(high[start:], dtype=np.float64) + np.asarray(low[start:], dtype=np.float64)
+                     + np.asarray(close[start:], dtype=np.float64)) / 3
+    volume = np.asarray(volume[start:], dtype=np.float64)
+    # the sums are continued from the previous ones, adding the values in the same order as the full sums
+    turnover = np.cumsum(np.concatenate(([states[0]], typical_price * volume)))[1:]
+    total_volume = np.cumsum(np.concatenate(([states[1]], volume)))[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(total_volume > 0, turnover / total_volume, np.nan)
+    return {"vwap": values, "_turnover": turnover, "_volume": total_volume}
+
+class IndicatorCache():
+    """
+    A least recently used cache of indicator results, keyed by the identity and the version of the store and the
+    parameters. A result is computed again only after the data of the store changed.
+
+    When the first changed bar is given, a result of the previous version is continued from it by the update function
+    of the indicator instead, e.g., only the new bar is computed after a bar was appended. The results are kept in
+    over-allocated buffers, which grow by doubling. The arrays handed out never change: appended bars are written into
+    the spare capacity behind them, and changed bars which were handed out before, e.g., an updated last bar, are
+    written into new buffers.
+
+    Attributes:
+        max_size (int): The maximum number of cached results.
+
+    Methods:
+        get(store, name, params, start): Returns the outputs of an indicator, from the cache if possible.
+        clear(): Drops all the cached results.
+    """
+
+    def __init__(self, max_size: int = 64) -> None:
+        """
+        Initializes the IndicatorCache object.
+
+        Args:
+            max_size (int, optional): The maximum number of cached results. Defaults to 64.
+        """
+        self.max_size = max_size
+        self.__results = OrderedDict()
+
+    def get(self, store: ColumnStore, name: str, params: Optional[dict] = None, start: Optional[int] = None) -> dict:
+        """
+        Returns the outputs of an indicator, from the cache if possible.
+
+        Args:
+            store (ColumnStore): The store containing the input columns.
+            name (str): The name of the indicator.
+            params (dict, optional): The parameters, completed by the defaults of the indicator. Defaults to None.
+            start (int, optional): The first bar changed by the last change of the store, e.g., passed by a listener
+                of the store. Defaults to None, i.e., unknown, so a result of the previous version is not continued.
+
+        Returns:
+            dict: A dictionary mapping the output keys to read-only arrays.
+
+        Raises:
+            KeyError: If the indicator is not registered.
+        """
+        if name not in INDICATORS:
+            raise KeyError("Unknown indicator {}, registered are {}".format(name, ", ".join(INDICATORS.keys())))
+        indicator = INDICATORS[name]
+        params = {**indicator.defaults, **({} if params is None else params)}
+        params_key = tuple(sorted(params.items()))
+        key = (id(store), store.version, name, params_key)
+        if key in self.__results:
+            store_ref, length, buffers, outputs = self.__results[key]
+            # the identity of a garbage collected store may be reused
+            if store_ref() is store:
+                self.__results.move_to_end(key)
+                return outputs
+        inputs = {input_key: store[input_key] for input_key in indicator.inputs}
+        result = None
+        previous_key = (id(store), store.version - 1, name, params_key)
+        if start is not None and indicator.update is not None and previous_key in self.__results:
+            store_ref, length, buffers, _ = self.__results.pop(previous_key)
+            if store_ref() is store:
+                result = self.__continue(indicator, inputs, params, length, buffers, min(start, length), len(store))
+        if result is None:
+            result = indicator.function(**inputs, **params)
+            result = (len(store), {result_key: np.asarray(values, dtype=np.float64) for result_key, values in result.items()})
+        length, buffers = result
+        outputs = {output_key: read_only(buffers[output_key][:length]) for output_key in indicator.outputs}
+        self.__results[key] = (weakref.ref(store), length, buffers, outputs)
+        while len(self.__results) > self.max_size:
+            self.__results.popitem(last=False)
+        return outputs
+
+    def __continue(self, indicator, inputs, params, length, buffers, start, new_length):
+        """
+        Continues a result of the previous version from the bar `start` on with the update function of the indicator.
+
+        Returns:
+            tuple or None: The new length and the buffers, or None if the indicator has to be computed again.
+        """
+        new_values = indicator.update({result_key: buffer[:start] for result_key, buffer in buffers.items()}, start,
+                                      **inputs, **params)
+        if new_values is None:
+            return None
+        new_buffers = {}
+        for result_key, values in new_values.items():
+            buffer = buffers[result_key]
+            # the values before `length` were handed out with the previous version and must not change
+            if start < length or len(buffer) < new_length:
+                capacity = max(new_length, 2 * len(buffer)) if len(buffer) < new_length else len(buffer)
+                new_buffer = np.empty(capacity, dtype=np.float64)
+                new_buffer[:start] = buffer[:start]
+                buffer = new_buffer
+            buffer[start:new_length] = values
+            new_buffers[result_key] = buffer
+        return new_length, new_buffers
+
+    def clear(self):
+        """
+        Drops all the cached results.
+        """
+        self.__results.clear()
+
+# the cache shared by the indicator items
+INDICATOR_CACHE = IndicatorCache()
+
+def compute_indicator(store: ColumnStore, name: str, **params) -> dict:
+    """
+    Returns the outputs of an indicator, memoized in INDICATOR_CACHE.
+
+    Args:
+        store (ColumnStore): The store containing the input columns, e.g., `TradeData.store`.
+        name (str): The name of the indicator, see INDICATORS.
+        **params: The parameters of the indicator.
+
+    Returns:
+        dict: A dictionary mapping the output keys to read-only arrays.
+    """
+    return INDICATOR_CACHE.get(store, name, params)
+
+class IndicatorLineItem(PlotCurveItem):
+    """
+    A line showing one output of an indicator. It follows the changes of the store and reports its local range from
+    a range index over its values, so the auto range of the plot widget includes it at a constant cost.
+
+    Attributes:
+        store (ColumnStore): The store containing the input columns.
+        indicator_name (str): The name of the indicator.
+        output (str): The key of the output.
+        params (dict): The parameters of the indicator.
+        cache (IndicatorCache): The cache of the indicator results.
+    """
+
+    def __init__(self, store: ColumnStore, name: str, output: str, color: QColor, line_width: float,
+                 params: Optional[dict] = None, cache: Optional[IndicatorCache] = None):
+        """
+        Initializes an IndicatorLineItem object.
+
+        Args:
+            store (ColumnStore): The store containing the input columns.
+            name (str): The name of the indicator.
+            output (str): The key of the output.
+            color (QColor): The color of the line.
+            line_width (float): The width of the line.
+            params (dict, optional): The parameters of the indicator. Defaults to None, i.e., the defaults.
+            cache (IndicatorCache, optional): The cache of the indicator results. Defaults to None, i.e.,
+                INDICATOR_CACHE.
+        """
+        super().__init__(pen=pg.mkPen(color, width=line_width), clickable=False, connect="finite")
+        self.store = store
+        self.indicator_name = name
+        self.output = output
+        self.params = {} if params is None else dict(params)
+        self.cache = INDICATOR_CACHE if cache is None else cache
+        self.__values = None
+        self.__xs = np.empty(0)
+        self.__range_index = None
+        self.refresh()
+        self.store.add_listener(self.__on_store_changed)
+
+    def __on_store_changed(self, start):
+        self.refresh(start)
+
+    def refresh(self, start: Optional[int] = None):
+        """
+        Gets the values of the indicator again, e.g., after the data changed. The indicator is only computed from the
+        first changed bar on if it can be continued, and the x-values and the range index are updated from there.
+
+        Args:
+            start (int, optional): The first changed bar. Defaults to None, i.e., all the bars may have changed.
+        """
+        values = self.cache.get(self.store, self.indicator_name, self.params, start)[self.output]
+        length = len(values)
+        first = 0 if start is None or self.__values is None else min(start, len(self.__values), length)
+        if len(self.__xs) < length:
+            # the buffer of the x-values grows by doubling, so it is not reallocated for every new bar
+            xs = np.empty(max(length, 2 * len(self.__xs), 16), dtype=np.float64)
+            xs[:first] = self.__xs[:first]
+            self.__xs = xs
+        self.__xs[first:length] = self.store.index[first:length]
+        if self.__range_index is None or first == 0:
+            self.__range_index = RangeIndex(values, values)
+        else:
+            self.__range_index.update(values, values, first)
+        self.__values = values
+        self.setData(x=self.__xs[:length], y=values)
+
+    def detach(self):
+        """
+        Stops following the changes of the store, e.g., before the item is dropped.
+        """
+        self.store.remove_listener(self.__on_store_changed)
+
+    def get_local_plot_range(self, start: float, end: float):
+        """
+        Returns the minimum and maximum values of the line within the specified range.
+
+        Args:
+            start (float): The start value of the range.
+            end (float): The end value of the range.
+
+        Returns:
+            tuple: A tuple containing the minimum and maximum values of the line within the range.
+                   If there are no defined values within the range, returns None.
+        """
+        if len(self.__values) == 0:
+            return None
+        index_start = int(self.store.index[0])
+        min_value, max_value = self.__range_index.query(max(0, int(start)-index_start), max(0, int(end)-index_start+1))
+        if np.isnan(min_value):
+            return None
+        return min_value, max_value
+
+class IndicatorComponent():
+    """
+    A component that handles the addition and removal of indicator lines on a plot.
+
+    Methods:
+        add_indicator(store, name, colors, **params): Adds the lines of an indicator.
+        remove_indicator(key): Removes the lines of an indicator.
+        remove_all_indicators(): Removes the lines of all the indicators.
+    """
+
+    def __init__(self, plot_widget: QPlotWidget, style=DEFAULT_STYLE, cache: Optional[IndicatorCache] = None) -> None:
+        """
+        Initializes the IndicatorComponent object.
+
+        Args:
+            plot_widget (QPlotWidget): The plot widget where the indicator lines are added.
+            style (Style, optional): The style providing the default colors and the line width. Defaults to
+                DEFAULT_STYLE.
+            cache (IndicatorCache, optional): The cache of the indicator results. Defaults to None, i.e.,
+                INDICATOR_CACHE.
+        """
+        self.plot_widget = plot_widget
+        self.style = style
+        self.cache = cache
+        self.indicators = {}
+
+    def add_indicator(self, store: ColumnStore, name: str, colors: Optional[list] = None, **params) -> str:
+        """
+        Adds the lines of an indicator, one for each output.
+
+        Args:
+            store (ColumnStore): The store containing the input columns, e.g., `TradeData.store`.
+            name (str): The name of the indicator, see INDICATORS.
+            colors (list, optional): The colors of the outputs. Defaults to None, i.e., the average line colors of
+                the style.
+            **params: The parameters of the indicator.
+
+        Returns:
+            str: The key of the indicator in `indicators`, e.g., "bollinger(window=20)".
+        """
+        if name not in INDICATORS:
+            raise KeyError("Unknown indicator {}, registered are {}".format(name, ", ".join(INDICATORS.keys())))
+        key = "{}({})".format(name, ", ".join("{}={}".format(param, value) for param, value in params.items()))
+        if key in self.indicators:
+            return key
+        outputs = INDICATORS[name].outputs
+        colors = list(self.style.average_line_color.values()) if colors is None else colors
+        items = [IndicatorLineItem(store, name, output, colors[i % len(colors)], self.style.line_width, params, self.cache)
+                 for i, output in enumerate(outputs)]
+        # the bounds are calculated once for all the lines
+        with self.plot_widget.batch_update():
+            for item in items:
+                self.plot_widget.add_item(item)
+        self.indicators[key] = items
+        return key
+
+    def remove_indicator(self, key: str):
+        """
+        Removes the lines of an indicator.
+
+        Args:
+            key (str): The key returned by add_indicator.
+        """
+        with self.plot_widget.batch_update():
+            for item in self.indicators.pop(key):
+                item.detach()
+                self.plot_widget.remove_item(item)
+
+    def remove_all_indicators(self):
+        """
+        Removes the lines of all the indicators.
+        """
+        with self.plot_widget.batch_update():
+            for key in list(self.indicators.keys()):
+                self.remove_indicator(key)
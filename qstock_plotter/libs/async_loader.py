@@ -0,0 +1,159 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from typing import Callable, Optional
+from .data_handler import DataHandler
+
+class LoadSignals(QObject):
+    """
+    The signals of a LoadTask. They are emitted from the worker thread and delivered in the thread of the receivers,
+    e.g., the GUI thread.
+
+    Signals:
+        - sigProgress(int, str): Emitted with the progress in percent and a message.
+        - sigFinished(object): Emitted with the result of the task.
+        - sigError(object): Emitted with the exception raised by the task.
+    """
+
+    sigProgress = pyqtSignal(int, str)
+    sigFinished = pyqtSignal(object)
+    sigError = pyqtSignal(object)
+
+class LoadTask(QRunnable):
+    """
+    A task which runs a loading function in a QThreadPool.
+
+    The function is called as `function(progress, *args, **kwargs)`, where `progress(value, message)` reports the
+    progress in percent. The function must not create or touch any widget or graphics item, these have to be created
+    in the GUI thread when `sigFinished` is received.
+
+    Attributes:
+        signals (LoadSignals): The signals of the task.
+        function (Callable): The loading function.
+        cancelled (bool): Whether the task was cancelled. The result of a cancelled task is not emitted.
+
+    Methods:
+        start(pool): Starts the task in a thread pool.
+        cancel(): Cancels the task.
+    """
+
+    def __init__(self, function: Callable, *args, **kwargs) -> None:
+        """
+        Initializes the LoadTask object.
+
+        Args:
+            function (Callable): The loading function, called as `function(progress, *args, **kwargs)`.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+        """
+        super().__init__()
+        self.signals = LoadSignals()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+
+    def start(self, pool: Optional[QThreadPool] = None):
+        """
+        Starts the task in a thread pool.
+
+        Args:
+            pool (QThreadPool, optional): The thread pool. Defaults to None, i.e., the global thread pool.
+
+        Returns:
+            LoadTask: The task itself.
+        """
+        (QThreadPool.globalInstance() if pool is None else pool).start(self)
+        return self
+
+    def cancel(self):
+        """
+        Cancels the task. A running function is not interrupted, but its result and errors are not emitted.
+        """
+        self.cancelled = True
+
+    def __progress(self, value: int, message: str = ""):
+        if not self.cancelled:
+            self.signals.sigProgress.emit(int(value), message)
+
+    def run(self):
+        try:
+            result = self.function(self.__progress, *self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.sigError.emit(e)
+            return
+        if not self.cancelled:
+            self.signals.sigFinished.emit(result)
+
+def load_timeframes(progress: Callable, handler_factory: Callable[[], DataHandler], timeframes: list = None):
+    """
+    Creates a DataHandler and loads its timeframes. It is meant to be run by a LoadTask.
+
+    Loading a timeframe reads it, coerces the columns and builds its range index and resampled timeframes, so the
+    result can be plotted right away.
+
+    Args:
+        progress (Callable): The function reporting the progress, `progress(value, message)`.
+        handler_factory (Callable[[], DataHandler]): A function creating the handler, e.g., `lambda: HDF5Handler(path)`.
+        timeframes (list, optional): The timeframes to load. Defaults to None, i.e., all the timeframes of the handler.
+
+    Returns:
+        DataHandler: The handler with the timeframes loaded.
+
+    Raises:
+        ValueError: If a timeframe can not be loaded. The error raised by the handler is its `__cause__`.
+    """
+    progress(0, "Opening data")
+    handler = handler_factory()
+    timeframes = handler.timeframes if timeframes is None else timeframes
+    for i, key in enumerate(timeframes):
+        progress(int(100 * i / len(timeframes)), f"Loading {key}")
+        try:
+            data = getattr(handler, key)
+        except Exception as e:
+            # the reading error, e.g., a missing file, is kept as the cause
+            raise ValueError(f"Failed to load {key}: {e}") from e
+        if data is None:
+            raise ValueError(f"Failed to load {key}, the handler has no data source")
+    progress(100, "Loaded")
+    return handler
+
+def load_timeframe(progress: Callable, handler_factory: Callable[[], DataHandler], key: str = "day_data"):
+    """
+    Creates a DataHandler and loads one of its timeframes. It is meant to be run by a LoadTask, e.g., with
+    `PriceVolumePlotter.plot_trade_data_async(load_timeframe, lambda: HDF5Handler(path), "week_data")`.
+
+    Args:
+        progress (Callable): The function reporting the progress, `progress(value, message)`.
+        handler_factory (Callable[[], DataHandler]): A function creating the handler, e.g., `lambda: HDF5Handler(path)`.
+        key (str, optional): The timeframe. Defaults to "day_data".
+
+    Returns:
+        TradeData: The data of the timeframe.
+    """
+    return getattr(load_timeframes(progress, handler_factory, [key]), key)
+
+def load_handler_async(handler_factory: Callable[[], DataHandler], timeframes: list = None,
+                       on_finished: Callable = None, on_progress: Callable = None, on_error: Callable = None,
+                       pool: Optional[QThreadPool] = None) -> LoadTask:
+    """
+    Creates a DataHandler and loads its timeframes in a thread pool.
+
+    Args:
+        handler_factory (Callable[[], DataHandler]): A function creating the handler, e.g., `lambda: HDF5Handler(path)`.
+        timeframes (list, optional): The timeframes to load. Defaults to None, i.e., all the timeframes of the handler.
+        on_finished (Callable, optional): Called with the loaded handler. Defaults to None.
+        on_progress (Callable, optional): Called with the progress in percent and a message. Defaults to None.
+        on_error (Callable, optional): Called with the exception if the loading failed. Defaults to None.
+        pool (QThreadPool, optional): The thread pool. Defaults to None, i.e., the global thread pool.
+
+    Returns:
+        LoadTask: The started task.
+    """
+    task = LoadTask(load_timeframes, handler_factory, timeframes)
+    # the callbacks are connected before the task is started, so no signal is missed
+    for signal, callback in [(task.signals.sigFinished, on_finished),
+                             (task.signals.sigProgress, on_progress),
+                             (task.signals.sigError, on_error)]:
+        if callback is not None:
+            signal.connect(callback)
+    return task.start(pool)
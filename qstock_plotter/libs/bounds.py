@@ -0,0 +1,95 @@
+import heapq
+import math
+from collections import Counter
+
+class BoundsMultiset():
+    """
+    A multiset of the bounding rectangles of keyed items, answering the bounds of all the items.
+
+    Every edge, i.e., left, right, top and bottom, is kept in a heap with lazy deletion: removing an item only counts
+    its edges as removed, and removed edges are discarded when they come to the top of a heap. Adding and removing an
+    item therefore cost O(log n) and querying the bounds amortized O(log n), instead of rescanning all the items.
+    Non-finite edges, e.g., of an item without data, are ignored.
+
+    Methods:
+        add(key, left, right, top, bottom): Adds an item or replaces the rectangle of an added item.
+        remove(key): Removes an item.
+        get_bounds(): Returns the bounds of all the items.
+    """
+
+    # the sign of the values in the heaps of left, right, top and bottom, so every heap is a min-heap
+    __SIGNS = (1, -1, 1, -1)
+
+    def __init__(self) -> None:
+        """
+        Initializes the BoundsMultiset object.
+        """
+        self.__rects = {}
+        self.__heaps = [[] for _ in self.__SIGNS]
+        self.__removed = [Counter() for _ in self.__SIGNS]
+
+    def __len__(self):
+        """
+        Returns the number of items.
+
+        Returns:
+            int: The number of items.
+        """
+        return len(self.__rects)
+
+    def __contains__(self, key):
+        return key in self.__rects
+
+    def add(self, key, left: float, right: float, top: float, bottom: float):
+        """
+        Adds an item, or replaces the rectangle of an item if it was already added.
+
+        Args:
+            key: The item, it must be hashable.
+            left (float): The left edge of the rectangle of the item.
+            right (float): The right edge of the rectangle of the item.
+            top (float): The top edge, i.e., the smaller y-value, of the rectangle of the item.
+            bottom (float): The bottom edge, i.e., the larger y-value, of the rectangle of the item.
+        """
+        rect = tuple(float(value) for value in (left, right, top, bottom))
+        if self.__rects.get(key) == rect:
+            return
+        self.remove(key)
+        self.__rects[key] = rect
+        for heap, sign, value in zip(self.__heaps, self.__SIGNS, rect):
+            if math.isfinite(value):
+                heapq.heappush(heap, sign * value)
+
+    def remove(self, key):
+        """
+        Removes an item. Nothing happens if the item was not added.
+
+        Args:
+            key: The item.
+        """
+        rect = self.__rects.pop(key, None)
+        if rect is None:
+            return
+        for removed, sign, value in zip(self.__removed, self.__SIGNS, rect):
+            if math.isfinite(value):
+                removed[sign * value] += 1
+
+    def get_bounds(self):
+        """
+        Returns the bounds of all the items.
+
+        Returns:
+            tuple or None: The left, right, top and bottom edges of the bounds, or None if there is no item with
+                finite edges.
+        """
+        bounds = []
+        for heap, removed, sign in zip(self.__heaps, self.__removed, self.__SIGNS):
+            while len(heap) > 0 and removed[heap[0]] > 0:
+                removed[heap[0]] -= 1
+                if removed[heap[0]] == 0:
+                    del removed[heap[0]]
+                heapq.heappop(heap)
+            if len(heap) == 0:
+                return None
+            bounds.append(sign * heap[0])
+        return tuple(bounds)
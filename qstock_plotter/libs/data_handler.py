@@ -1,41 +1,819 @@
+import os
+import threading
+import json
+import warnings
+import weakref
+import numpy as np
 import pandas as pd
 from abc import *
 from typing import Union
+from types import MethodType
 from dataclasses import dataclass,field
 from copy import deepcopy
+from collections import OrderedDict
+from .range_index import RangeIndex
+from .tick_labels import TickLabelProvider, to_datetime64, is_consecutive
+from .resample import resample_ohlcv
+
+# the HDF5 library is not thread-safe, every access to an HDF5 file has to hold this lock, e.g., when data is
+# loaded in a background thread while a windowed store reads rows in the GUI thread
+HDF5_LOCK = threading.RLock()
+
+def to_numeric_array(values) -> np.ndarray:
+    """
+    Coerces a column of raw values into a contiguous numeric NumPy array.
+
+    Values that cannot be converted are set to NaN. Integer columns are stored as int64, everything else as float64.
+
+    Args:
+        values (array-like): The raw column values, e.g., a pandas Series of strings.
+
+    Returns:
+        np.ndarray: The coerced column.
+    """
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy()
+    if values.dtype.kind in "iu":
+        return np.ascontiguousarray(values, dtype=np.int64)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def read_only(values: np.ndarray) -> np.ndarray:
+    """
+    Returns a read-only view of an array.
+
+    Args:
+        values (np.ndarray): The array.
+
+    Returns:
+        np.ndarray: A view of the array that can not be written to.
+    """
+    values = values.view()
+    values.setflags(write=False)
+    return values
+
+def as_column(values) -> np.ndarray:
+    """
+    Returns a column as a read-only NumPy array, without copying it if it is already numeric or a date column.
+
+    Args:
+        values (array-like): The column values.
+
+    Returns:
+        np.ndarray: The column.
+    """
+    if isinstance(values, np.ndarray) and (values.dtype.kind in "fiu" or np.issubdtype(values.dtype, np.datetime64)):
+        return read_only(values)
+    return read_only(to_numeric_array(values))
+
+def compact_array(values: np.ndarray, tick_size: float = 0.01) -> np.ndarray:
+    """
+    Downcasts a numeric column to the smallest type which represents it well enough.
+
+    Integer values, including floats without fractional part, are stored as uint32/uint64 if they are not negative
+    and as int32/int64 otherwise. Other floats are stored as float32, unless the round-trip error exceeds half of the
+    tick size, e.g., for large prices with a fine tick size. Date and other columns are kept as they are.
+
+    Args:
+        values (np.ndarray): The column.
+        tick_size (float, optional): The smallest price increment which has to be represented exactly.
+            Defaults to 0.01.
+
+    Returns:
+        np.ndarray: The downcast column, or the column itself if it can not be downcast.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "fiu" or len(values) == 0:
+        return values
+    if values.dtype.kind == "f":
+        finite = np.isfinite(values)
+        if not finite.all() or not np.array_equal(values, np.round(values)):
+            if values.dtype.itemsize <= 4:
+                return values
+            compact = values.astype(np.float32)
+            error = np.abs(compact[finite].astype(values.dtype) - values[finite])
+            if len(error) > 0 and np.max(error) > tick_size / 2:
+                warnings.warn(f"Not downcasting to float32, the round-trip error {np.max(error)} exceeds half the tick "
+                              f"size {tick_size}", RuntimeWarning)
+                return values
+            return compact
+    min_value, max_value = values.min(), values.max()
+    if min_value >= 0:
+        dtype = np.uint32 if max_value <= np.iinfo(np.uint32).max else np.uint64
+    else:
+        dtype = np.int32 if np.iinfo(np.int32).min <= min_value and max_value <= np.iinfo(np.int32).max else np.int64
+    return values.astype(dtype)
+
+class Listeners():
+    """
+    A list of callbacks called after data changed.
+
+    Bound methods are kept as weak references, so a listening object, e.g., a plot item or a child DataFrame, can be
+    garbage collected without removing its callback first. The callbacks of collected objects are dropped when the
+    listeners are called. Other callables, e.g., lambdas, are kept as they are and have to be removed with `remove`.
+    """
+
+    def __init__(self) -> None:
+        self.__callbacks = []
+
+    def __len__(self):
+        return len(self.__callbacks)
+
+    def add(self, callback):
+        """
+        Adds a callback.
+
+        Args:
+            callback (Callable): The callback, a bound method is kept as a weak reference.
+        """
+        self.__callbacks.append(weakref.WeakMethod(callback) if isinstance(callback, MethodType) else callback)
+
+    def remove(self, callback):
+        """
+        Removes a callback added with add.
+
+        Args:
+            callback (Callable): The callback.
+
+        Raises:
+            ValueError: If the callback was not added.
+        """
+        for i, reference in enumerate(self.__callbacks):
+            if (reference() if isinstance(reference, weakref.WeakMethod) else reference) == callback:
+                del self.__callbacks[i]
+                return
+        raise ValueError("The callback was not added")
+
+    def __call__(self, *args):
+        """
+        Calls the callbacks, dropping the ones of garbage collected objects.
+
+        Args:
+            *args: The arguments of the callbacks.
+        """
+        callbacks = []
+        for reference in list(self.__callbacks):
+            callback = reference() if isinstance(reference, weakref.WeakMethod) else reference
+            if callback is None:
+                self.__callbacks.remove(reference)
+            else:
+                callbacks.append(callback)
+        for callback in callbacks:
+            callback(*args)
+
+class ColumnStore():
+    """
+    Columnar storage of trade data.
+
+    Every column is a contiguous NumPy array, e.g., memory-mapped `.npy` files. Numeric and date columns are used
+    as they are without copying, other columns are coerced to numbers.
+
+    Rows can be appended and the last row can be updated, e.g., for a live feed. The first change copies the
+    columns into writable buffers with spare capacity, which grow by doubling, so appending a row costs amortized
+    O(1). Listeners added with `add_listener` are called with the position of the first changed row, bound methods
+    are only weakly referenced, see `Listeners`.
+
+    Attributes:
+        index (np.ndarray): The index values of the rows, i.e., the x-values. They are consecutive integers.
+        columns (dict): A dictionary mapping column keys to read-only arrays.
+        version (int): A counter which is increased on every change of the data.
+
+    Methods:
+        from_data_frame(data_frame, keys, label_keys): Creates a store from a pandas DataFrame.
+        keys(): Returns the column keys.
+        prefetch(start, end): Makes sure that the rows in [start, end) are in memory.
+        get_range_index(min_key, max_key): Returns the shared range index over two columns.
+        get_tick_labels(key): Returns the shared tick-label provider over a label column.
+        compact(tick_size): Returns a copy of the store with downcast columns.
+        append_rows(rows): Appends rows.
+        update_last_row(row): Updates values of the last row.
+        add_listener(callback): Adds a callback which is called after the data changed.
+        remove_listener(callback): Removes a callback added with add_listener.
+        __len__(): Returns the number of rows.
+        __getitem__(key): Returns a column.
+    """
+
+    def __init__(self, columns: dict, index=None) -> None:
+        """
+        Initializes the ColumnStore object.
+
+        Args:
+            columns (dict): A dictionary mapping column keys to column values.
+            index (array-like, optional): The index values of the rows, consecutive integers. Defaults to None, i.e.,
+                0, 1, 2, ...
+
+        Raises:
+            ValueError: If the index values are not consecutive integers, e.g., after rows were dropped.
+        """
+        self.columns = {key: as_column(values) for key, values in columns.items()}
+        length = len(next(iter(self.columns.values()))) if len(self.columns) > 0 else 0
+        if index is None:
+            index = np.arange(length, dtype=np.int64)
+        elif not (isinstance(index, np.ndarray) and index.dtype.kind in "iu"):
+            index = np.asarray(index, dtype=np.int64)
+        # the rows are looked up by their position, i.e., the index value minus the first index value
+        if not is_consecutive(index):
+            raise ValueError("The index values of the rows must be consecutive integers")
+        self.index = as_column(index)
+        self.version = 0
+        self.__buffers = None
+        self.__listeners = Listeners()
+        self.__range_indexes = {}
+        self.__tick_labels = {}
+
+    @classmethod
+    def from_data_frame(cls, data_frame: pd.DataFrame, keys=None, label_keys=["date"]):
+        """
+        Creates a store from a pandas DataFrame.
+
+        The index of the DataFrame is kept if it holds consecutive integers. Any other index, e.g., with gaps after
+        `dropna()` or of dates, is reset to the row positions 0, 1, 2, ...
+
+        Args:
+            data_frame (pd.DataFrame): The DataFrame.
+            keys (list, optional): The keys of the columns to store. Defaults to None, i.e., all the columns.
+            label_keys (list, optional): The keys of the label columns. They are stored as datetime64 if they can be
+                parsed as dates and as they are otherwise. Defaults to ["date"].
+
+        Returns:
+            ColumnStore: The store.
+        """
+        keys = list(data_frame.columns) if keys is None else keys
+        columns = {}
+        for key in keys:
+            if key in label_keys:
+                dates = to_datetime64(data_frame[key])
+                columns[key] = dates if dates is not None else np.asarray(data_frame[key])
+            else:
+                columns[key] = to_numeric_array(data_frame[key])
+        index = data_frame.index.to_numpy()
+        return cls(columns, index=index if is_consecutive(index) else None)
+
+    def compact(self, tick_size: float = 0.01):
+        """
+        Returns a copy of the store with downcast columns, see `compact_array`. The index is stored as int32 if possible.
+
+        Args:
+            tick_size (float, optional): The smallest price increment which has to be represented exactly.
+                Defaults to 0.01.
+
+        Returns:
+            ColumnStore: The compact store.
+        """
+        index = np.asarray(self.index)
+        if len(index) > 0 and np.iinfo(np.int32).min <= index.min() and index.max() <= np.iinfo(np.int32).max:
+            index = index.astype(np.int32)
+        return ColumnStore({key: compact_array(values, tick_size) for key, values in self.columns.items()},
+                           index=index)
+
+    def keys(self):
+        """
+        Returns the column keys.
+
+        Returns:
+            list: The column keys.
+        """
+        return list(self.columns.keys())
+
+    def prefetch(self, start, end):
+        """
+        Makes sure that the rows in [start, end) are in memory. All the rows of an in-memory store always are.
+
+        Args:
+            start (int): The first row position.
+            end (int): The row position after the last row.
+        """
+        pass
+
+    def get_range_index(self, min_key, max_key) -> RangeIndex:
+        """
+        Returns a range index over two columns. The index is built once and shared by all its users, it is kept up to
+        date when rows are appended or updated.
+
+        Args:
+            min_key (str): The key of the column for the range-minimum queries.
+            max_key (str): The key of the column for the range-maximum queries.
+
+        Returns:
+            RangeIndex: The range index.
+        """
+        if (min_key, max_key) not in self.__range_indexes:
+            self.__range_indexes[(min_key, max_key)] = self._build_range_index(min_key, max_key)
+        return self.__range_indexes[(min_key, max_key)]
+
+    def _build_range_index(self, min_key, max_key) -> RangeIndex:
+        return RangeIndex(self[min_key], self[max_key])
+
+    def get_block_aggregates(self, aggregations: dict):
+        """
+        Returns aggregates of blocks of consecutive rows saved together with the data, so coarse views do not have to
+        read all the rows. An in-memory store has none.
+
+        Args:
+            aggregations (dict): A dictionary mapping column keys to "first", "last", "max" or "min".
+
+        Returns:
+            tuple or None: The number of rows of a block and a dictionary mapping the column keys to the aggregates of
+                the blocks, or None if the aggregates are not available.
+        """
+        return None
+
+    def get_tick_labels(self, key) -> TickLabelProvider:
+        """
+        Returns a lazy tick-label provider over a label column. The provider is created once and shared by all its
+        users, it is kept up to date when rows are appended or updated.
+
+        Args:
+            key (str): The key of the label column.
+
+        Returns:
+            TickLabelProvider: The provider mapping index values to formatted labels.
+        """
+        if key not in self.__tick_labels:
+            self.__tick_labels[key] = TickLabelProvider(self[key], index_start=self.index[0] if len(self) > 0 else 0)
+        return self.__tick_labels[key]
+
+    def add_listener(self, callback):
+        """
+        Adds a callback which is called after the data changed.
+
+        Args:
+            callback (Callable): A function called with the position of the first changed row. A bound method is
+                only weakly referenced, see `Listeners`.
+        """
+        self.__listeners.add(callback)
+
+    def remove_listener(self, callback):
+        """
+        Removes a callback added with add_listener.
+
+        Args:
+            callback (Callable): The callback.
+        """
+        self.__listeners.remove(callback)
+
+    def __notify(self, start):
+        self.version += 1
+        for (min_key, max_key), range_index in self.__range_indexes.items():
+            range_index.update(self[min_key], self[max_key], start)
+        for key, tick_labels in self.__tick_labels.items():
+            tick_labels.update(self[key], start)
+        self.__listeners(start)
+
+    def __reserve(self, length):
+        """
+        Makes sure that the writable buffers can hold `length` rows, growing them by doubling.
+
+        Args:
+            length (int): The number of rows.
+        """
+        capacity = 0 if self.__buffers is None else len(self.__buffers["index"])
+        if capacity >= length and self.__buffers is not None:
+            return
+        capacity = max(length, 2 * capacity, 16)
+        buffers = {}
+        for key, values in [("index", self.index), *self.columns.items()]:
+            buffers[key] = np.empty(capacity, dtype=values.dtype)
+            buffers[key][:len(values)] = values
+        self.__buffers = buffers
+
+    def __set_length(self, length):
+        self.index = read_only(self.__buffers["index"][:length])
+        self.columns = {key: read_only(self.__buffers[key][:length]) for key in self.columns.keys()}
+
+    def __convert(self, key, values):
+        """
+        Converts new values to the type of a column.
+
+        Args:
+            key (str): The column key.
+            values (array-like): The new values.
+
+        Returns:
+            np.ndarray: The converted values.
+        """
+        dtype = self.columns[key].dtype
+        values = np.atleast_1d(np.asarray(values))
+        if dtype.kind in "fiu" and values.dtype.kind not in "fiub":
+            values = to_numeric_array(values)
+        if dtype.kind in "iu" and len(values) > 0:
+            if values.dtype.kind == "f" and not np.array_equal(values, np.round(values)):
+                # an integer column, e.g., a compact volume, becomes a float column rather than dropping fractions
+                dtype = self.__widen(key, np.float64)
+            else:
+                # a compact column is widened rather than silently wrapping around
+                limits = np.iinfo(dtype)
+                if np.min(values) < limits.min or np.max(values) > limits.max:
+                    dtype = self.__widen(key, np.uint64 if dtype.kind == "u" and np.min(values) >= 0 else np.int64)
+        return values.astype(dtype)
+
+    def __widen(self, key, dtype):
+        """
+        Converts a column and its writable buffer to a wider type.
+
+        Returns:
+            np.dtype: The new type of the column.
+        """
+        dtype = np.dtype(dtype)
+        self.columns[key] = read_only(self.columns[key].astype(dtype))
+        if self.__buffers is not None:
+            self.__buffers[key] = self.__buffers[key].astype(dtype)
+        return dtype
+
+    def append_rows(self, rows: dict):
+        """
+        Appends rows. The index values of the new rows continue the index.
+
+        Args:
+            rows (dict): A dictionary mapping every column key to the values of the new rows, either a single value
+                or an array-like of values.
+
+        Raises:
+            KeyError: If a column is missing.
+            ValueError: If the columns have different lengths.
+        """
+        missing = [key for key in self.columns.keys() if key not in rows]
+        if len(missing) > 0:
+            raise KeyError(f"Values of the columns {missing} are missing")
+        rows = {key: self.__convert(key, rows[key]) for key in self.columns.keys()}
+        num_rows = set(len(values) for values in rows.values())
+        if len(num_rows) != 1:
+            raise ValueError("All the columns must have the same number of new rows")
+        num_rows = num_rows.pop()
+        start = len(self)
+        index_start = self.index[-1] + 1 if start > 0 else 0
+        self.__reserve(start + num_rows)
+        self.__buffers["index"][start:start + num_rows] = np.arange(index_start, index_start + num_rows)
+        for key, values in rows.items():
+            self.__buffers[key][start:start + num_rows] = values
+        self.__set_length(start + num_rows)
+        self.__notify(start)
+
+    def update_last_row(self, row: dict):
+        """
+        Updates values of the last row.
+
+        Args:
+            row (dict): A dictionary mapping column keys to their new values. Columns which are not given are kept.
+        """
+        length = len(self)
+        if length == 0:
+            raise IndexError("There is no row to update")
+        row = {key: self.__convert(key, values)[-1] for key, values in row.items()}
+        self.__reserve(length)
+        for key, value in row.items():
+            self.__buffers[key][length - 1] = value
+        self.__set_length(length)
+        self.__notify(length - 1)
+
+    def __len__(self):
+        """
+        Returns the number of rows.
+
+        Returns:
+            int: The number of rows.
+        """
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __getitem__(self, key) -> np.ndarray:
+        """
+        Returns a column.
+
+        Args:
+            key (str): The column key.
+
+        Returns:
+            np.ndarray: The read-only column.
+        """
+        return self.columns[key]
+
+class WindowedColumn():
+    """
+    A column of a WindowedColumnStore.
+
+    It behaves like a read-only one-dimensional array, but indexing it only reads the requested rows.
+    """
+
+    def __init__(self, store, key) -> None:
+        self.store = store
+        self.key = key
+
+    @property
+    def dtype(self):
+        return self.store.dtypes[self.key]
+
+    def __len__(self):
+        return len(self.store)
+
+    def __array__(self, dtype=None, copy=None):
+        # converting the column, e.g., with np.asarray, reads all of its rows
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+    def __getitem__(self, item):
+        length = len(self)
+        if isinstance(item, slice):
+            start, stop, step = item.indices(length)
+            if step == 1:
+                return self.store.read(self.key, start, max(start, stop))
+            item = np.arange(start, stop, step)
+        if np.ndim(item) == 0:
+            position = int(item) + length if int(item) < 0 else int(item)
+            if not 0 <= position < length:
+                raise IndexError("index {} is out of bounds for a column of length {}".format(item, length))
+            return self.store.read(self.key, position, position + 1)[0]
+        positions = np.asarray(item, dtype=np.int64)
+        positions = np.where(positions < 0, positions + length, positions)
+        if len(positions) == 0:
+            return np.empty(0, dtype=self.dtype)
+        first = int(positions.min())
+        return self.store.read(self.key, first, int(positions.max()) + 1)[positions - first]
+
+class MappedColumn():
+    """
+    A read-only column whose values are computed from the rows of another column by a vectorized function, e.g., a
+    scaling, when they are indexed.
+
+    It keeps a column read on demand, e.g., a WindowedColumn, lazy: only the indexed rows are read and mapped.
+    """
+
+    def __init__(self, column, function) -> None:
+        self.column = column
+        self.function = function
+
+    def __len__(self):
+        return len(self.column)
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+    def __getitem__(self, item):
+        return self.function(self.column[item])
+
+def map_column(column, function):
+    """
+    Applies a vectorized function to the values of a column, lazily for a column read on demand.
+
+    Args:
+        column (Union[np.ndarray, WindowedColumn]): The column.
+        function (Callable): The vectorized function.
+
+    Returns:
+        Union[np.ndarray, MappedColumn]: The mapped values of an in-memory column, or a MappedColumn computing them
+            when they are indexed.
+    """
+    if isinstance(column, np.ndarray):
+        return function(column)
+    return MappedColumn(column, function)
+
+class WindowedColumnStore(ColumnStore):
+    """
+    Columnar storage of trade data that reads the rows from an HDF5 table on demand.
+
+    The table has to be written in `table` format with an indexed `row` column holding the row positions, see
+    `WindowedHDF5Handler`. Rows are read in chunks of `chunk_size` rows with `where=` queries, and the chunks are kept
+    in an LRU cache of at most `max_chunks` chunks. The range index is built from block extrema saved together with
+    the table, so neither the construction nor the queries of the range index read the whole table. The saved first
+    and last values of the blocks give the coarse levels of the level-of-detail drawing, see `get_block_aggregates`.
+
+    The store is read-only: `append_rows` and `update_last_row` raise a TypeError, convert the data into an in-memory
+    or NPY handler to stream bars into it.
+
+    Attributes:
+        index (WindowedColumn): The index values of the rows, i.e., the x-values.
+        columns (dict): A dictionary mapping column keys to WindowedColumns.
+        chunk_size (int): The number of rows in a chunk.
+        max_chunks (int): The maximum number of chunks kept in memory.
+        prefetch_margin (int): The number of rows prefetched before and after a prefetched range.
+        select_rows (int): The maximum number of rows read at once for a range larger than the cache.
+    """
+
+    select_rows = 1 << 16
+
+    def __init__(self, hdf_store: pd.HDFStore, key: str, chunk_size: int = 4096, max_chunks: int = 64,
+                 prefetch_margin: int = 2048) -> None:
+        """
+        Initializes the WindowedColumnStore object.
+
+        Args:
+            hdf_store (pd.HDFStore): The opened HDF5 file.
+            key (str): The key of the table in the HDF5 file.
+            chunk_size (int, optional): The number of rows in a chunk. Defaults to 4096.
+            max_chunks (int, optional): The maximum number of chunks kept in memory. Defaults to 64.
+            prefetch_margin (int, optional): The number of rows prefetched before and after a prefetched range.
+                Defaults to 2048.
+        """
+        super().__init__({})
+        self.hdf_store = hdf_store
+        self.key = key
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.prefetch_margin = prefetch_margin
+        with HDF5_LOCK:
+            storer = hdf_store.get_storer(key)
+            if not storer.is_table:
+                raise TypeError(f"{key} is not saved in table format")
+            self.__length = storer.nrows
+            self.__date_unit = getattr(storer.attrs, "date_unit", None)
+        self.__chunks = OrderedDict()
+        self.__blocks = None
+        first_rows = self.__select(0, min(1, self.__length))
+        self.dtypes = {column_key: values.dtype for column_key, values in first_rows.items()}
+        self.index = WindowedColumn(self, "index")
+        self.columns = {column_key: WindowedColumn(self, column_key) for column_key in first_rows.keys() if column_key != "index"}
+
+    def __len__(self):
+        return self.__length
+
+    def __select(self, start, end, keys=None):
+        """
+        Reads the rows in [start, end) from the HDF5 file.
+
+        Args:
+            start (int): The first row position.
+            end (int): The row position after the last row.
+            keys (list, optional): The keys of the columns to read. The index is always read. Defaults to None, i.e.,
+                all the columns.
+
+        Returns:
+            dict: A dictionary mapping column keys to arrays, including the index.
+        """
+        columns = None if keys is None else [key for key in keys if key != "index"]
+        with HDF5_LOCK:
+            data_frame = self.hdf_store.select(self.key, where="row>={} & row<{}".format(int(start), int(end)),
+                                               columns=columns if columns != [] else ["row"])
+        data_frame = data_frame.drop(columns=["row"], errors="ignore")
+        rows = {"index": np.asarray(data_frame.index, dtype=np.int64)}
+        for column_key in data_frame.columns:
+            values = data_frame[column_key].to_numpy()
+            if np.issubdtype(values.dtype, np.datetime64):
+                rows[column_key] = values.astype("datetime64[{}]".format(self.__date_unit)) if self.__date_unit else values
+            elif values.dtype.kind in "fiu":
+                rows[column_key] = values
+            else:
+                rows[column_key] = to_numeric_array(values)
+        return rows
+
+    def __get_chunk(self, chunk):
+        """
+        Returns a chunk of rows, from the cache if possible.
+
+        Args:
+            chunk (int): The chunk number.
+
+        Returns:
+            dict: A dictionary mapping column keys to arrays, including the index.
+        """
+        if chunk in self.__chunks:
+            self.__chunks.move_to_end(chunk)
+            return self.__chunks[chunk]
+        rows = self.__select(chunk * self.chunk_size, min((chunk + 1) * self.chunk_size, self.__length))
+        self.__chunks[chunk] = rows
+        while len(self.__chunks) > self.max_chunks:
+            self.__chunks.popitem(last=False)
+        return rows
+
+    def read(self, key, start, end) -> np.ndarray:
+        """
+        Reads the values of a column for the rows in [start, end).
+
+        Ranges larger than half of the cache are read directly without caching them, so they do not evict the rows of
+        the view, only the column is read and in pieces of at most `select_rows` rows.
+
+        Args:
+            key (str): The column key, or "index" for the index values.
+            start (int): The first row position.
+            end (int): The row position after the last row.
+
+        Returns:
+            np.ndarray: The read-only values.
+        """
+        start, end = max(int(start), 0), min(int(end), self.__length)
+        if start >= end:
+            return read_only(np.empty(0, dtype=self.dtypes[key]))
+        first_chunk, last_chunk = start // self.chunk_size, (end - 1) // self.chunk_size
+        if last_chunk - first_chunk + 1 > self.max_chunks // 2:
+            values = np.empty(end - start, dtype=self.dtypes[key])
+            for piece_start in range(start, end, self.select_rows):
+                piece_end = min(piece_start + self.select_rows, end)
+                values[piece_start - start:piece_end - start] = self.__select(piece_start, piece_end, [key])[key]
+            return read_only(values)
+        parts = [self.__get_chunk(chunk)[key] for chunk in range(first_chunk, last_chunk + 1)]
+        values = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        offset = first_chunk * self.chunk_size
+        return read_only(values[start - offset:end - offset])
+
+    def prefetch(self, start, end):
+        start = max(int(start) - self.prefetch_margin, 0)
+        end = min(int(end) + self.prefetch_margin, self.__length)
+        if start >= end:
+            return
+        first_chunk, last_chunk = start // self.chunk_size, (end - 1) // self.chunk_size
+        if last_chunk - first_chunk + 1 > self.max_chunks:
+            # the range does not fit into the cache, e.g., a zoomed-out view drawn from the block aggregates
+            return
+        for chunk in range(first_chunk, last_chunk + 1):
+            self.__get_chunk(chunk)
+
+    def append_rows(self, rows: dict):
+        raise TypeError("A windowed store is read-only, rows can not be appended to {}".format(self.key))
+
+    def update_last_row(self, row: dict):
+        raise TypeError("A windowed store is read-only, the last row of {} can not be updated".format(self.key))
+
+    def __get_blocks(self):
+        """
+        Returns the saved aggregates of the blocks of rows, read once.
+
+        Returns:
+            tuple or None: The number of rows of a block and the DataFrame of the aggregates, or None if the file has
+                no aggregates.
+        """
+        if self.__blocks is None:
+            blocks_key = self.key + WindowedHDF5Handler.blocks_suffix
+            with HDF5_LOCK:
+                if blocks_key not in self.hdf_store:
+                    self.__blocks = (None, None)
+                else:
+                    self.__blocks = (int(self.hdf_store.get_storer(blocks_key).attrs.block_size),
+                                     self.hdf_store.get(blocks_key))
+        return None if self.__blocks[1] is None else self.__blocks
+
+    def _build_range_index(self, min_key, max_key) -> RangeIndex:
+        blocks = self.__get_blocks()
+        if blocks is None:
+            return super()._build_range_index(min_key, max_key)
+        block_size, blocks = blocks
+        return RangeIndex(self[min_key], self[max_key], block_size=block_size,
+                          block_min=blocks[min_key + "_min"].to_numpy(), block_max=blocks[max_key + "_max"].to_numpy())
+
+    def get_block_aggregates(self, aggregations: dict):
+        blocks = self.__get_blocks()
+        if blocks is None:
+            return None
+        block_size, blocks = blocks
+        keys = [key + "_" + how for key, how in aggregations.items()]
+        if any(key not in blocks.columns for key in keys):
+            # files saved before the first and last values of the blocks were saved
+            return None
+        return block_size, {key: blocks[block_key].to_numpy() for key, block_key in zip(aggregations.keys(), keys)}
 
 class ChildDataFrame():
     """
     A class representing a child DataFrame.
 
+    The data of the child DataFrame is kept in a ColumnStore, i.e., column by column as contiguous, pre-coerced
+    NumPy arrays. Plot items should use the bulk accessors (`get_x`, `get_column`, `get_columns`) rather than
+    iterating row by row. Several child DataFrames can be zero-copy views over one store, e.g., the prices and the
+    volume of a TradeData, and then share its x-ticks and range indexes.
+
     Attributes:
-        data_frame (pd.DataFrame): The parent DataFrame.
+        store (ColumnStore): The columnar storage of the data.
         data_keys (list): The key(s) of the data column(s) in the parent DataFrame.
         max_y_key (str): The key of the maximum y-value column.
         min_y_key (str): The key of the minimum y-value column.
-        x_ticks (dict): A dictionary mapping index values to x-labels.
+        x_label_key (str): The key of the x-label column.
+        x_ticks (TickLabelProvider): A lazy provider mapping index values to formatted x-labels, shared through the store.
+        range_index (RangeIndex): The range-minimum/maximum index over the min_y_key and max_y_key columns, shared
+            through the store.
         __index_start (int): The starting index of the child DataFrame.
 
     Methods:
         get_min_x(): Returns the minimum x-value in the parent DataFrame.
         get_max_x(): Returns the maximum x-value in the parent DataFrame.
         get_local_range(x_start, x_end): Returns the local range of y-values between x_start and x_end.
-        get_x_ticks(): Returns the x-ticks dictionary.
+        get_x_ticks(): Returns the x-ticks label provider.
+        get_x(start, end): Returns the x-values of the rows in [start, end).
+        get_column(key, start, end): Returns the values of a column for the rows in [start, end).
+        get_columns(keys, start, end): Returns the values of several columns for the rows in [start, end).
+        to_data_frame(): Returns the data as a pandas DataFrame.
+        append_bars(bars): Appends new bars, e.g., from a live feed.
+        update_last_bar(bar): Updates the values of the last bar.
+        add_listener(callback): Adds a callback which is called after the data changed.
+        remove_listener(callback): Removes a callback added with add_listener.
         __len__(): Returns the length of the child DataFrame.
         __getitem__(idx): Returns a tuple of data values at the given index.
 
     """
 
-    def __init__(self, data_frame: pd.DataFrame, data_keys: Union[str, list], max_y_key=None, min_y_key=None, x_label_key=None) -> None:
+    def __init__(self, data_frame: Union[pd.DataFrame, ColumnStore], data_keys: Union[str, list], max_y_key=None, min_y_key=None, x_label_key=None,
+                 compact: bool = False, tick_size: float = 0.01) -> None:
         """
         Initialize the DataHandler object.
 
         Args:
-            data_frame (pd.DataFrame): The parent DataFrame containing the data.
+            data_frame (Union[pd.DataFrame, ColumnStore]): The parent DataFrame containing the data.
+                The columns of a ColumnStore are used without copying them.
             data_keys (Union[str, list]): The key(s) to access the data in the parent DataFrame.
             max_y_key (str, optional): The key to access the maximum y-value data. Defaults to None.
             min_y_key (str, optional): The key to access the minimum y-value data. Defaults to None.
             x_label_key (str, optional): The key to access the x-label data. Defaults to None.
+            compact (bool, optional): Whether to store the data with downcast types, e.g., float32 prices and uint32
+                volumes, see `ColumnStore.compact`. A ColumnStore is copied in this case. Defaults to False.
+            tick_size (float, optional): The smallest price increment which has to be represented exactly in the
+                compact mode. Columns which would lose it are not downcast. Defaults to 0.01.
         """
         data_keys = data_keys if isinstance(data_keys, list) else [data_keys]
         self.data_keys = deepcopy(data_keys)
@@ -52,11 +830,94 @@ class ChildDataFrame():
             min_y_key = data_keys[0]
         self.min_y_key = min_y_key
         x_label_key = x_label_key if x_label_key is not None else "date"
+        self.x_label_key = x_label_key
         if x_label_key not in data_keys:
             data_keys.append(x_label_key)
-        self.data_frame = data_frame[data_keys]
-        self.x_ticks : dict = {i: str(self.data_frame[x_label_key][i]) for i in self.data_frame.index}
+        self.__keys = data_keys
+        if isinstance(data_frame, pd.DataFrame):
+            data_frame = ColumnStore.from_data_frame(data_frame, keys=data_keys, label_keys=[x_label_key])
+        if compact:
+            data_frame = data_frame.compact(tick_size)
+        self.store = data_frame
+        self.range_index = self.store.get_range_index(self.min_y_key, self.max_y_key)
         self.__index_start = self.get_min_x()
+        self.x_ticks = self.store.get_tick_labels(x_label_key)
+        self.__listeners = Listeners()
+        # the store only keeps a weak reference, so the child DataFrame can be collected while the store is in use
+        self.store.add_listener(self.__on_store_changed)
+
+    def __on_store_changed(self, start):
+        """
+        Notifies the listeners after the rows from `start` on were changed or appended. The range index and the x-ticks
+        are shared through the store, which already updated them.
+
+        Args:
+            start (int): The position of the first changed row.
+        """
+        self.__listeners(start)
+
+    def add_listener(self, callback):
+        """
+        Adds a callback which is called after the data changed.
+
+        Args:
+            callback (Callable): A function called with the position of the first changed row. A bound method is
+                only weakly referenced, see `Listeners`.
+        """
+        self.__listeners.add(callback)
+
+    def remove_listener(self, callback):
+        """
+        Removes a callback added with add_listener.
+
+        Args:
+            callback (Callable): The callback.
+        """
+        self.__listeners.remove(callback)
+
+    def append_bars(self, bars: Union[dict, pd.DataFrame]):
+        """
+        Appends new bars, e.g., from a live feed. The index values of the new bars continue the index.
+
+        Args:
+            bars (Union[dict, pd.DataFrame]): The new bars, mapping every column of the store to a single value or
+                to an array-like of values. A store shared with other child DataFrames, e.g., the prices and the
+                volume, also needs the values of their columns.
+        """
+        self.store.append_rows({key: bars[key] for key in self.store.keys() if key in bars})
+
+    def update_last_bar(self, bar: Union[dict, pd.Series]):
+        """
+        Updates the values of the last bar, e.g., while the current period is not finished.
+
+        Args:
+            bar (Union[dict, pd.Series]): The new values. Keys which are not given are kept.
+        """
+        self.store.update_last_row({key: bar[key] for key in self.__keys if key in bar})
+
+    @property
+    def index(self) -> np.ndarray:
+        """
+        The index values of the rows, i.e., the x-values.
+        """
+        return self.store.index
+
+    @property
+    def x_labels(self) -> np.ndarray:
+        """
+        The x-labels, as datetime64 if they can be parsed as dates.
+        """
+        return self.store[self.x_label_key]
+
+    @property
+    def data_frame(self) -> pd.DataFrame:
+        """
+        The data of the child DataFrame as a pandas DataFrame.
+
+        Returns:
+            pd.DataFrame: The data.
+        """
+        return self.to_data_frame()
 
     def get_min_x(self):
         """
@@ -66,7 +927,7 @@ class ChildDataFrame():
             int: The minimum x-value.
 
         """
-        return self.data_frame.index[0]
+        return self.index[0]
 
     def get_max_x(self):
         """
@@ -76,12 +937,15 @@ class ChildDataFrame():
             int: The maximum x-value.
 
         """
-        return self.data_frame.index[-1]
+        return self.index[-1]
 
     def get_local_range(self, x_start, x_end):
         """
         Returns the local range of y-values between x_start and x_end.
 
+        The range is answered by the range index of the child DataFrame,
+        so the cost does not grow with the distance between x_start and x_end.
+
         Args:
             x_start (int): The starting x-value.
             x_end (int): The ending x-value.
@@ -90,20 +954,97 @@ class ChildDataFrame():
             tuple: A tuple containing the minimum and maximum y-values.
 
         """
-        x_start = int(x_start)
-        x_end = int(x_end)
-        return pd.to_numeric(self.data_frame.loc[x_start:x_end, self.min_y_key]).min(), pd.to_numeric(self.data_frame.loc[x_start:x_end, self.max_y_key]).max()
+        start, end = int(x_start) - self.__index_start, int(x_end) - self.__index_start + 1
+        self.store.prefetch(start, end)
+        return self.range_index.query(start, end)
 
     def get_x_ticks(self):
         """
-        Returns the x-ticks dictionary.
+        Returns the x-ticks label provider.
 
         Returns:
-            dict: A dictionary mapping index values to x-labels.
+            TickLabelProvider: A lazy provider mapping index values to formatted x-labels.
 
         """
         return self.x_ticks
 
+    def get_x(self, start=None, end=None) -> np.ndarray:
+        """
+        Returns the x-values, i.e., the index values, of the rows in [start, end).
+
+        Args:
+            start (int, optional): The first row position. Defaults to None, i.e., the first row.
+            end (int, optional): The row position after the last row. Defaults to None, i.e., after the last row.
+
+        Returns:
+            np.ndarray: A read-only array of the x-values.
+        """
+        return self.index[start:end]
+
+    def get_column(self, key, start=None, end=None) -> np.ndarray:
+        """
+        Returns the values of a column for the rows in [start, end).
+
+        Args:
+            key (str): The key of the column.
+            start (int, optional): The first row position. Defaults to None, i.e., the first row.
+            end (int, optional): The row position after the last row. Defaults to None, i.e., after the last row.
+
+        Returns:
+            np.ndarray: A read-only array of the column values.
+
+        Raises:
+            KeyError: If the column is not stored in the child DataFrame.
+        """
+        return self.store[key][start:end]
+
+    def get_lazy_column(self, key):
+        """
+        Returns a column whose rows are only read when they are indexed, i.e., the column of the store itself: a
+        WindowedColumn for a windowed store and a read-only array for an in-memory store.
+
+        Args:
+            key (str): The key of the column.
+
+        Returns:
+            Union[np.ndarray, WindowedColumn]: The column.
+        """
+        return self.store[key]
+
+    def get_columns(self, keys=None, start=None, end=None) -> tuple:
+        """
+        Returns the values of several columns for the rows in [start, end).
+
+        Args:
+            keys (list, optional): The keys of the columns. Defaults to None, i.e., the data keys.
+            start (int, optional): The first row position. Defaults to None, i.e., the first row.
+            end (int, optional): The row position after the last row. Defaults to None, i.e., after the last row.
+
+        Returns:
+            tuple: A tuple of read-only arrays, one for each key.
+        """
+        keys = self.data_keys if keys is None else keys
+        return tuple(self.get_column(key, start, end) for key in keys)
+
+    def to_data_frame(self) -> pd.DataFrame:
+        """
+        Returns the data of the child DataFrame as a pandas DataFrame.
+
+        Note:
+            All the rows are read, also for a windowed store.
+
+        Returns:
+            pd.DataFrame: A DataFrame with the data columns, the y-range columns and the x-label column.
+        """
+        data = {}
+        for key in self.__keys:
+            values = np.asarray(self.store[key])
+            if np.issubdtype(values.dtype, np.datetime64):
+                # pandas only handles nanosecond dates reliably, e.g., when writing HDF5 files
+                values = values.astype("datetime64[ns]")
+            data[key] = values
+        return pd.DataFrame(data, index=np.asarray(self.index))
+
     def __len__(self):
         """
         Returns the length of the child DataFrame.
@@ -112,12 +1053,15 @@ class ChildDataFrame():
             int: The length of the child DataFrame.
 
         """
-        return len(self.data_frame)
+        return len(self.index)
 
     def __getitem__(self, idx):
         """
         Returns a tuple of data values at the given index.
 
+        Note:
+            This per-row protocol is kept for compatibility. Use the bulk accessors for anything performance related.
+
         Args:
             idx (int): The index.
 
@@ -125,8 +1069,7 @@ class ChildDataFrame():
             tuple: A tuple containing the index value and data values.
 
         """
-
-        return tuple([self.data_frame.index[idx]]) + tuple(pd.to_numeric(self.data_frame[key][self.__index_start + idx],errors='coerce') for key in self.data_keys)
+        return tuple([self.index[idx]]) + tuple(self.store[key][idx] for key in self.data_keys)
 
 class PricesDataFrame(ChildDataFrame):
     """
@@ -134,13 +1077,17 @@ class PricesDataFrame(ChildDataFrame):
 
     Parameters:
     data_frame (pd.DataFrame): The parent DataFrame containing the prices data.
+    compact (bool, optional): Whether to store the data with downcast types. Defaults to False.
+    tick_size (float, optional): The smallest price increment kept exactly in the compact mode. Defaults to 0.01.
     """
 
-    def __init__(self, data_frame: pd.DataFrame):
+    def __init__(self, data_frame: pd.DataFrame, compact: bool = False, tick_size: float = 0.01):
         super().__init__(data_frame, data_keys=["open","close","high","low"],
                          max_y_key="high",
                          min_y_key="low",
-                         x_label_key="date")
+                         x_label_key="date",
+                         compact=compact,
+                         tick_size=tick_size)
 
 class VolumeDataFrame(ChildDataFrame):
     """
@@ -151,6 +1098,7 @@ class VolumeDataFrame(ChildDataFrame):
 
     Args:
         data_frame (pd.DataFrame): The parent data frame from which the volume data frame is derived.
+        compact (bool, optional): Whether to store the data with downcast types. Defaults to False.
 
     Attributes:
         data_keys (list): A list of data keys for the volume data.
@@ -158,60 +1106,553 @@ class VolumeDataFrame(ChildDataFrame):
 
     """
 
-    def __init__(self, data_frame: pd.DataFrame):
-        super().__init__(data_frame, data_keys=["volume"], x_label_key="date")
+    def __init__(self, data_frame: pd.DataFrame, compact: bool = False):
+        super().__init__(data_frame, data_keys=["volume"], x_label_key="date", compact=compact)
 
 @dataclass
 class TradeData:
+    """
+    The prices and the volume of one timeframe.
+
+    The prices and the volume are usually views over one ColumnStore, see `from_data_frame`.
+
+    Attributes:
+        prices (PricesDataFrame): The prices.
+        volume (VolumeDataFrame): The volume.
+    """
+
     prices:PricesDataFrame
     volume:VolumeDataFrame
 
+    @classmethod
+    def from_data_frame(cls, data_frame: pd.DataFrame, compact: bool = False, tick_size: float = 0.01):
+        """
+        Creates the TradeData from a DataFrame with the columns "open", "close", "high", "low", "volume" and "date".
+
+        The columns are coerced once into a single ColumnStore, the prices and the volume are zero-copy views over it.
+
+        Args:
+            data_frame (pd.DataFrame): The DataFrame.
+            compact (bool, optional): Whether to store the data with downcast types. Defaults to False.
+            tick_size (float, optional): The smallest price increment kept exactly in the compact mode. Defaults to 0.01.
+
+        Returns:
+            TradeData: The trade data.
+        """
+        store = ColumnStore.from_data_frame(data_frame, keys=["open", "high", "low", "close", "volume", "date"],
+                                            label_keys=["date"])
+        if compact:
+            store = store.compact(tick_size)
+        return cls(PricesDataFrame(store), VolumeDataFrame(store))
+
+    @property
+    def store(self) -> ColumnStore:
+        """
+        The store of the prices. It is also the store of the volume unless they were created separately.
+        """
+        return self.prices.store
+
+    def __stores(self):
+        stores = []
+        for child in [self.prices, self.volume]:
+            if all(store is not child.store for store in stores):
+                stores.append(child.store)
+        return stores
+
+    def append_bars(self, bars: Union[dict, pd.DataFrame]):
+        """
+        Appends new bars to the prices and the volume, e.g., from a live feed.
+
+        Args:
+            bars (Union[dict, pd.DataFrame]): The new bars, mapping "open", "close", "high", "low", "volume" and
+                "date" to a single value or to an array-like of values.
+        """
+        for store in self.__stores():
+            store.append_rows({key: bars[key] for key in store.keys()})
+
+    def update_last_bar(self, bar: Union[dict, pd.Series]):
+        """
+        Updates the values of the last bar of the prices and the volume.
+
+        Args:
+            bar (Union[dict, pd.Series]): The new values. Keys which are not given are kept.
+        """
+        for store in self.__stores():
+            store.update_last_row({key: bar[key] for key in store.keys() if key in bar})
+
+class LazyTradeData():
+    """
+    A descriptor for the TradeData of one timeframe of a DataHandler.
+
+    The data is read and built by `DataHandler._load_data` on first access and cached on the handler until
+    `DataHandler.unload` releases it. Timeframes with a resampling rule in `DataHandler.resample_rules` are derived
+    from the base timeframe instead. Assigning a TradeData to the attribute replaces the cached data.
+
+    A failed load is not cached, the exception of `DataHandler._load_data` is raised and the next access reads the
+    data source again.
+    """
+
+    def __set_name__(self, owner, name):
+        self.key = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.key not in instance.__dict__ and self.key in instance.resample_rules:
+            return instance.resample(instance.resample_rules[self.key])
+        if self.key not in instance.__dict__:
+            if instance.data_path is None:
+                return None
+            instance.__dict__[self.key] = instance._load_data(instance.data_path, self.key)
+        return instance.__dict__[self.key]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.key] = value
+
 class DataHandler():
+    """
+    A base class for the handlers of candlestick data.
+
+    The data of every timeframe is loaded lazily, i.e., only the timeframes which are accessed are read from the
+    data source. Loaded timeframes can be released with `unload`, they will be read again on the next access.
+
+    Only the base timeframe is read from the data source. Coarser timeframes, e.g., weeks and months, are resampled
+    from it on first access and cached. They follow bars appended to the base timeframe, only the periods of the new
+    bars are resampled again. The base timeframe is resampled in blocks of `resample_block_rows` rows, so a windowed
+    base timeframe is read block by block rather than column by column at once.
+
+    Attributes:
+        day_data (TradeData): Candlestick data for daily intervals.
+        week_data (TradeData): Candlestick data for weekly intervals, resampled from day_data.
+        month_data (TradeData): Candlestick data for monthly intervals, resampled from day_data.
+        data_path (str): The path of the data source. None if the data is not loaded from a source.
+        compact (bool): Whether the data is stored with downcast types, e.g., float32 prices and uint32 volumes.
+        tick_size (float): The smallest price increment which has to be represented exactly in the compact mode.
+        base_timeframe (str): The timeframe which is read from the data source.
+        resample_rules (dict): A dictionary mapping the derived timeframes to their resampling rules.
+        resample_block_rows (int): The number of rows of the base timeframe resampled at once.
 
-    def __init__(self):
-        self.day_data:TradeData=None
-        self.week_data:TradeData=None
-        self.month_data:TradeData=None
+    Methods:
+        save(hdf5_path): Saves the base timeframe to an HDF5 file.
+        load(hdf5_path): Sets the data source, the data will be read on first access.
+        resample(rule): Returns the data of the base timeframe resampled with any rule, e.g., "2D", "Q" or "15min".
+        is_loaded(key): Returns whether a timeframe is loaded.
+        unload(*keys): Releases loaded timeframes.
+    """
+
+    timeframes = ["day_data","week_data","month_data"]
+    base_timeframe = "day_data"
+    resample_rules = {"week_data": "W", "month_data": "M"}
+    resample_block_rows = 1 << 16
+    day_data:TradeData = LazyTradeData()
+    week_data:TradeData = LazyTradeData()
+    month_data:TradeData = LazyTradeData()
+
+    def __init__(self, compact: bool = False, tick_size: float = 0.01):
+        """
+        Initializes the DataHandler object.
+
+        Args:
+            compact (bool, optional): Whether to store the data with downcast types, e.g., float32 prices, uint32
+                volumes and int32 indexes. It roughly halves the memory of a timeframe. Defaults to False.
+            tick_size (float, optional): The smallest price increment which has to be represented exactly in the
+                compact mode. Price columns whose float32 round-trip error exceeds half of it are not downcast.
+                Defaults to 0.01.
+        """
+        self.data_path = None
+        self.compact = compact
+        self.tick_size = tick_size
+        self.__resampled = {}
 
     def save(self, hdf5_path):
-        for key,data in zip(["day_data","week_data","month_data"],[self.day_data,self.week_data,self.month_data]):
+        for key in [self.base_timeframe]:
+            data=getattr(self,key)
             price=data.prices.data_frame
             volume=data.volume.data_frame
             volume=volume.drop(columns=['date'])
             df=price.join(volume)
-            df.to_hdf(hdf5_path,key=key)
+            with HDF5_LOCK:
+                df.to_hdf(hdf5_path,key=key)
 
     def load(self, hdf5_path):
-        #self.__df_day = pd.read_hdf(hdf5_path, key="day_data")
-        #self.__df_week = pd.read_hdf(hdf5_path, key="week_data")
-        #self.__df_month = pd.read_hdf(hdf5_path, key="month_data")
-        self.day_data=self._load_data(hdf5_path,"day_data")
-        self.week_data=self._load_data(hdf5_path,"week_data")
-        self.month_data=self._load_data(hdf5_path,"month_data")
-    
+        """
+        Sets the data source. The data of a timeframe is only read when it is accessed for the first time.
+
+        Note:
+            Timeframes loaded from a previous data source are released.
+
+        Args:
+            hdf5_path (str): The path of the HDF5 file.
+        """
+        self.unload()
+        self.data_path=hdf5_path
+
+    def is_loaded(self, key):
+        """
+        Returns whether a timeframe is loaded.
+
+        Args:
+            key (str): The timeframe, e.g., "day_data".
+
+        Returns:
+            bool: True if the data of the timeframe is in memory.
+        """
+        return key in self.__dict__ or (key in self.resample_rules and self.resample_rules[key] in self.__resampled)
+
+    def unload(self, *keys):
+        """
+        Releases loaded timeframes. They will be read from the data source again on the next access.
+
+        Note:
+            Timeframes which were assigned directly rather than loaded from a data source can not be read again.
+
+        Args:
+            *keys (str): The timeframes to release, e.g., "day_data". All the timeframes are released if no key is given.
+        """
+        keys = keys if len(keys) > 0 else self.timeframes
+        for key in keys:
+            self.__dict__.pop(key, None)
+            if key == self.base_timeframe:
+                for rule in list(self.__resampled.keys()):
+                    self.__release_resampled(rule)
+            elif key in self.resample_rules and self.resample_rules[key] in self.__resampled:
+                self.__release_resampled(self.resample_rules[key])
+
+    def resample(self, rule: str) -> TradeData:
+        """
+        Returns the data of the base timeframe resampled with a rule.
+
+        The result is cached and updated when bars are appended to the base timeframe or its last bar is updated.
+
+        Args:
+            rule (str): The resampling rule, e.g., "W", "M", "2D", "Q" or "15min", see `resample.parse_rule`.
+
+        Returns:
+            TradeData: The resampled data, or None if the base timeframe is not available.
+        """
+        base = getattr(self, self.base_timeframe)
+        if rule in self.__resampled and self.__resampled[rule]["base"] is not base:
+            self.__release_resampled(rule)
+        if rule not in self.__resampled:
+            if base is None:
+                return None
+            columns, starts = self.__resample_blocks(base, rule)
+            store = ColumnStore(columns)
+            if self.compact:
+                store = store.compact(self.tick_size)
+            resampled = {"base": base, "data": TradeData(PricesDataFrame(store), VolumeDataFrame(store)),
+                         "starts": starts, "listener": lambda start: self.__on_base_changed(rule, start)}
+            for child_store in set([base.prices.store, base.volume.store]):
+                child_store.add_listener(resampled["listener"])
+            self.__resampled[rule] = resampled
+        return self.__resampled[rule]["data"]
+
+    def __get_base_columns(self, base: TradeData, start: int = 0, end: int = None) -> dict:
+        columns = {key: base.prices.get_column(key, start, end) for key in ["open", "high", "low", "close"]}
+        columns["volume"] = base.volume.get_column("volume", start, end)
+        columns["date"] = base.prices.x_labels[start:end]
+        return columns
+
+    def __resample_blocks(self, base: TradeData, rule: str):
+        """
+        Resamples the base timeframe block by block. The last period of a block may continue in the next block, so
+        it is resampled again together with the next block.
+
+        Returns:
+            tuple: A tuple containing a dictionary mapping column keys to the resampled arrays and the positions of
+                the first bar of every period.
+        """
+        length = len(base.prices)
+        if length <= self.resample_block_rows:
+            return resample_ohlcv(self.__get_base_columns(base), rule)
+        parts, part_starts = [], []
+        first, end = 0, 0
+        while end < length:
+            end = min(end + self.resample_block_rows, length)
+            columns, starts = resample_ohlcv(self.__get_base_columns(base, first, end), rule)
+            # the last period is only complete after the last block
+            num_periods = len(starts) if end == length else max(len(starts) - 1, 0)
+            parts.append({key: values[:num_periods] for key, values in columns.items()})
+            part_starts.append(starts[:num_periods] + first)
+            if num_periods > 0 and end < length:
+                first += int(starts[num_periods])
+        columns = {key: np.concatenate([part[key] for part in parts]) for key in parts[0].keys()}
+        return columns, np.concatenate(part_starts)
+
+    def __on_base_changed(self, rule, start):
+        """
+        Resamples the periods from the period of the last bar of the resampled data on again.
+        """
+        resampled = self.__resampled[rule]
+        base = resampled["base"]
+        if len(base.prices) != len(base.volume):
+            # the prices are changed before the volume if they are stored separately
+            return
+        starts = resampled["starts"]
+        first = starts[-1]
+        columns, new_starts = resample_ohlcv(self.__get_base_columns(base, first), rule)
+        if len(new_starts) == 0:
+            return
+        store = resampled["data"].prices.store
+        # the first new period replaces the last resampled period, the others are appended
+        store.update_last_row({key: values[0] for key, values in columns.items()})
+        if len(new_starts) > 1:
+            store.append_rows({key: values[1:] for key, values in columns.items()})
+        resampled["starts"] = np.concatenate([starts[:-1], new_starts + first])
+
+    def __release_resampled(self, rule):
+        resampled = self.__resampled.pop(rule)
+        for child_store in set([resampled["base"].prices.store, resampled["base"].volume.store]):
+            child_store.remove_listener(resampled["listener"])
+
     def _load_data(self, path, key):
-        try:
+        with HDF5_LOCK:
             df=pd.read_hdf(path,key=key)
-        except Exception as e:
-            print(f"Error loading data from {path} with key {key}: {e}")
-            return None
-        return TradeData(PricesDataFrame(df),VolumeDataFrame(df))
+        return TradeData.from_data_frame(df, compact=self.compact, tick_size=self.tick_size)
 
 class HDF5Handler(DataHandler):
     """
     A class that handles candlestick data from an HDF5 file.
 
+    The timeframes are read from the file on first access, so the file has to stay available.
+
     Attributes:
         day_data (TradeData): Candlestick data for daily intervals.
-        week_data (TradeData): Candlestick data for weekly intervals.
-        month_data (TradeData): Candlestick data for monthly intervals.
+        week_data (TradeData): Candlestick data for weekly intervals, resampled from day_data.
+        month_data (TradeData): Candlestick data for monthly intervals, resampled from day_data.
 
     Methods:
-        __init__(hdf5_path): Initializes the HDF5Handler object.
+        __init__(hdf5_path, compact, tick_size): Initializes the HDF5Handler object.
 
     """
 
-    def __init__(self, hdf5_path:str) -> None:
+    def __init__(self, hdf5_path:str, compact:bool=False, tick_size:float=0.01) -> None:
+        super().__init__(compact=compact, tick_size=tick_size)
+        self.load(hdf5_path)
+
+
+class NPYHandler(DataHandler):
+    """
+    A class that handles candlestick data stored as memory-mapped NumPy columns.
+
+    Every timeframe is a directory of raw `.npy` files, one for each column, together with a small JSON manifest:
+
+        npy_dir/day_data/manifest.json
+        npy_dir/day_data/index.npy
+        npy_dir/day_data/open.npy
+        ...
+
+    Dates are stored as int64 epoch values in the unit given by the manifest. The files are opened with
+    `np.load(mmap_mode='r')`, so opening a timeframe reads nothing but the manifest, the columns are used by the
+    ChildDataFrames without copying them and the OS page cache is shared between processes.
+
+    Attributes:
+        day_data (TradeData): Candlestick data for daily intervals.
+        week_data (TradeData): Candlestick data for weekly intervals, resampled from day_data.
+        month_data (TradeData): Candlestick data for monthly intervals, resampled from day_data.
+
+    Methods:
+        __init__(npy_dir, compact, tick_size): Initializes the NPYHandler object.
+        save(npy_dir): Saves the base timeframe as `.npy` columns.
+        save_handler(handler, npy_dir): Saves the base timeframe of any DataHandler as `.npy` columns.
+        from_hdf5(hdf5_path, npy_dir): Converts an HDF5 file of an HDF5Handler and opens the result.
+    """
+
+    manifest_name = "manifest.json"
+    format_name = "qstock_plotter.npy_columns"
+    format_version = 1
+
+    def __init__(self, npy_dir:str, compact:bool=False, tick_size:float=0.01) -> None:
+        super().__init__(compact=compact, tick_size=tick_size)
+        self.load(npy_dir)
+
+    def save(self, npy_dir):
+        NPYHandler.save_handler(self, npy_dir)
+
+    @staticmethod
+    def save_handler(handler: DataHandler, npy_dir: str):
+        """
+        Saves the base timeframe of a DataHandler as `.npy` columns.
+
+        Args:
+            handler (DataHandler): The handler to save.
+            npy_dir (str): The directory to save the timeframes in.
+        """
+        for key in [handler.base_timeframe]:
+            data = getattr(handler, key)
+            if data is None:
+                continue
+            timeframe_dir = os.path.join(npy_dir, key)
+            os.makedirs(timeframe_dir, exist_ok=True)
+            columns = {"index": data.prices.get_x()}
+            for column_key in ["open", "high", "low", "close"]:
+                columns[column_key] = data.prices.get_column(column_key)
+            columns["volume"] = data.volume.get_column("volume")
+            dates = data.prices.get_column("date")
+            if not np.issubdtype(dates.dtype, np.datetime64):
+                raise TypeError(f"The date column of {key} can not be saved as epoch values: {dates.dtype}")
+            date_unit, _ = np.datetime_data(dates.dtype)
+            columns["date"] = dates.view(np.int64)
+            for column_key, values in columns.items():
+                np.save(os.path.join(timeframe_dir, column_key + ".npy"), np.ascontiguousarray(values))
+            manifest = {
+                "format": NPYHandler.format_name,
+                "version": NPYHandler.format_version,
+                "length": len(data.prices),
+                "date_unit": date_unit,
+                "columns": {column_key: str(values.dtype) for column_key, values in columns.items()},
+            }
+            with open(os.path.join(timeframe_dir, NPYHandler.manifest_name), "w") as f:
+                json.dump(manifest, f, indent=4)
+
+    @classmethod
+    def from_hdf5(cls, hdf5_path: str, npy_dir: str):
+        """
+        Converts the HDF5 file of an HDF5Handler into `.npy` columns and opens the result.
+
+        Args:
+            hdf5_path (str): The path of the HDF5 file.
+            npy_dir (str): The directory to save the timeframes in.
+
+        Returns:
+            NPYHandler: The handler of the converted data.
+        """
+        cls.save_handler(HDF5Handler(hdf5_path), npy_dir)
+        return cls(npy_dir)
+
+    def _load_data(self, path, key):
+        timeframe_dir = os.path.join(path, key)
+        with open(os.path.join(timeframe_dir, self.manifest_name), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != self.format_name:
+            raise ValueError(f"Unknown format {manifest.get('format')} of {timeframe_dir}")
+        columns = {column_key: np.load(os.path.join(timeframe_dir, column_key + ".npy"), mmap_mode='r')
+                   for column_key in manifest["columns"].keys()}
+        index = columns.pop("index")
+        columns["date"] = columns["date"].view("datetime64[{}]".format(manifest["date_unit"]))
+        store = ColumnStore(columns, index=index)
+        if self.compact:
+            # the compact copy is in memory, save a compact handler to keep the columns memory-mapped
+            store = store.compact(self.tick_size)
+        return TradeData(PricesDataFrame(store),VolumeDataFrame(store))
+
+class WindowedHDF5Handler(DataHandler):
+    """
+    A class that handles candlestick data from HDF5 files larger than the memory.
+
+    Every timeframe is saved in `table` format with an indexed `row` column, together with the minima, maxima, first
+    and last values of blocks of rows. The rows are only read around the range that is plotted, e.g., the ranges queried by
+    `QPlotWidget.update_plot` through `get_local_range`, plus a prefetch margin, and kept in an LRU cache of chunks.
+    Use `save_handler` or `from_hdf5` to convert data into this format.
+
+    Attributes:
+        day_data (TradeData): Candlestick data for daily intervals.
+        week_data (TradeData): Candlestick data for weekly intervals, resampled from day_data.
+        month_data (TradeData): Candlestick data for monthly intervals, resampled from day_data.
+        chunk_size (int): The number of rows in a chunk.
+        max_chunks (int): The maximum number of chunks kept in memory for every timeframe.
+        prefetch_margin (int): The number of rows prefetched before and after the plotted range.
+
+    Methods:
+        __init__(hdf5_path, chunk_size, max_chunks, prefetch_margin): Initializes the WindowedHDF5Handler object.
+        save(hdf5_path): Saves the base timeframe in the windowed format.
+        save_handler(handler, hdf5_path, block_size): Saves the base timeframe of any DataHandler in the windowed format.
+        from_hdf5(hdf5_path, windowed_hdf5_path): Converts an HDF5 file of an HDF5Handler and opens the result.
+        close(): Releases all the timeframes and closes the HDF5 file.
+
+    The handler can be used as a context manager, which closes it at the end:
+
+        with WindowedHDF5Handler(path) as handler:
+            plotter.plot_trade_data(handler.day_data)
+    """
+
+    blocks_suffix = "_blocks"
+
+    def __init__(self, hdf5_path:str, chunk_size:int=4096, max_chunks:int=64, prefetch_margin:int=2048) -> None:
         super().__init__()
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.prefetch_margin = prefetch_margin
+        self.hdf_store = None
         self.load(hdf5_path)
 
+    def save(self, hdf5_path):
+        WindowedHDF5Handler.save_handler(self, hdf5_path)
+
+    @staticmethod
+    def save_handler(handler: DataHandler, hdf5_path: str, block_size: int = 64):
+        """
+        Saves the base timeframe of a DataHandler in the windowed format.
+
+        Args:
+            handler (DataHandler): The handler to save.
+            hdf5_path (str): The path of the HDF5 file.
+            block_size (int, optional): The number of rows of the blocks whose extrema and first and last values are
+                saved. Defaults to 64.
+        """
+        with HDF5_LOCK, pd.HDFStore(hdf5_path, mode="a") as hdf_store:
+            for key in [handler.base_timeframe]:
+                data = getattr(handler, key)
+                if data is None:
+                    continue
+                df = data.prices.data_frame.join(data.volume.data_frame.drop(columns=['date']))
+                df["row"] = np.arange(len(df), dtype=np.int64)
+                hdf_store.put(key, df, format="table", data_columns=["row"], index=True)
+                dates = data.prices.get_column("date")
+                if np.issubdtype(dates.dtype, np.datetime64):
+                    hdf_store.get_storer(key).attrs.date_unit = np.datetime_data(dates.dtype)[0]
+                starts = np.arange(0, len(df), block_size)
+                blocks = {}
+                for column_key in df.columns.drop(["row", "date"]):
+                    values = df[column_key].to_numpy()
+                    blocks[column_key + "_min"] = np.fmin.reduceat(values, starts)
+                    blocks[column_key + "_max"] = np.fmax.reduceat(values, starts)
+                    blocks[column_key + "_first"] = values[starts]
+                    blocks[column_key + "_last"] = values[np.minimum(starts + block_size, len(df)) - 1]
+                blocks_key = key + WindowedHDF5Handler.blocks_suffix
+                hdf_store.put(blocks_key, pd.DataFrame(blocks))
+                hdf_store.get_storer(blocks_key).attrs.block_size = block_size
+
+    @classmethod
+    def from_hdf5(cls, hdf5_path: str, windowed_hdf5_path: str, **kwargs):
+        """
+        Converts the HDF5 file of an HDF5Handler into the windowed format and opens the result.
+
+        Args:
+            hdf5_path (str): The path of the HDF5 file.
+            windowed_hdf5_path (str): The path of the converted HDF5 file.
+            **kwargs: Additional arguments of `__init__`.
+
+        Returns:
+            WindowedHDF5Handler: The handler of the converted data.
+        """
+        cls.save_handler(HDF5Handler(hdf5_path), windowed_hdf5_path)
+        return cls(windowed_hdf5_path, **kwargs)
+
+    def unload(self, *keys):
+        super().unload(*keys)
+        if self.hdf_store is not None and not any(self.is_loaded(key) for key in self.timeframes):
+            with HDF5_LOCK:
+                self.hdf_store.close()
+            self.hdf_store = None
+
+    def close(self):
+        """
+        Releases all the timeframes and closes the HDF5 file. The data of the released timeframes can not be read
+        anymore, but the handler reopens the file on the next access of a timeframe.
+        """
+        self.unload()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _load_data(self, path, key):
+        if self.hdf_store is None:
+            with HDF5_LOCK:
+                self.hdf_store = pd.HDFStore(path, mode="r")
+        store = WindowedColumnStore(self.hdf_store, key, chunk_size=self.chunk_size,
+                                    max_chunks=self.max_chunks, prefetch_margin=self.prefetch_margin)
+        return TradeData(PricesDataFrame(store),VolumeDataFrame(store))
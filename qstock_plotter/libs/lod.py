@@ -0,0 +1,165 @@
+import numpy as np
+
+def aggregate_buckets(x: np.ndarray, columns: dict, aggregations: dict, bucket_size: int) -> dict:
+    """
+    Aggregates consecutive bars into buckets of `bucket_size` bars directly, the last bucket may be smaller. The
+    buckets equal those of a level of an LODPyramid built from the same bars.
+
+    Args:
+        x (np.ndarray): The x-values of the bars.
+        columns (dict): A dictionary mapping column keys to the values of the bars.
+        aggregations (dict): A dictionary mapping the column keys to "first", "last", "max", "min" or "sum".
+        bucket_size (int): The number of bars of a bucket.
+
+    Returns:
+        dict: A dictionary mapping the column keys, "x_first" and "x_last" to the values of the buckets.
+    """
+    x = np.asarray(x)
+    first = np.arange(0, len(x), bucket_size)
+    last = np.minimum(first + bucket_size, len(x)) - 1
+    buckets = {"x_first": x[first], "x_last": x[last]}
+    for key, how in aggregations.items():
+        values = np.asarray(columns[key])
+        if len(first) == 0:
+            buckets[key] = values[:0]
+        elif how == "first":
+            buckets[key] = values[first]
+        elif how == "last":
+            buckets[key] = values[last]
+        elif how == "max":
+            buckets[key] = np.fmax.reduceat(values, first)
+        elif how == "min":
+            buckets[key] = np.fmin.reduceat(values, first)
+        elif how == "sum":
+            buckets[key] = np.add.reduceat(values, first)
+        else:
+            raise ValueError(f"Unknown aggregation {how} of column {key}")
+    return buckets
+
+class LODPyramid():
+    """
+    A multi-resolution pyramid of aggregated bars for level-of-detail drawing.
+
+    Level `k` holds buckets of `2**k` consecutive bars, level 0 being the bars themselves. Every level is built from
+    the previous one by a vectorized pairwise reduction, so building all the levels costs O(n). Every column is
+    aggregated by "first", "last", "max", "min" or "sum", e.g., the open, close, high and low prices of the bars of a
+    bucket give an OHLC candle. The x-values of the first and the last bar of every bucket are kept as "x_first" and
+    "x_last". The bars of level 0 may themselves be buckets, e.g., saved blocks of rows, whose last x-values are
+    given as `x_last`.
+
+    Attributes:
+        aggregations (dict): A dictionary mapping column keys to their aggregations.
+        max_level (int): The highest level, its buckets cover all the bars.
+
+    Methods:
+        get_level(level, start, end): Returns the buckets of a level in [start, end).
+        update(x, columns, start, x_last): Updates the pyramid after the bars from start on were changed or appended.
+    """
+
+    def __init__(self, x: np.ndarray, columns: dict, aggregations: dict, x_last: np.ndarray = None) -> None:
+        """
+        Initializes the LODPyramid object.
+
+        Args:
+            x (np.ndarray): The x-values of the bars.
+            columns (dict): A dictionary mapping column keys to the values of the bars.
+            aggregations (dict): A dictionary mapping the column keys to "first", "last", "max", "min" or "sum".
+            x_last (np.ndarray, optional): The last x-values of the bars. Defaults to None, i.e., the x-values.
+        """
+        self.aggregations = dict(aggregations)
+        self.aggregations["x_first"] = "first"
+        self.aggregations["x_last"] = "last"
+        self.max_level = 0
+        self.__lengths = []
+        self.__levels = []
+        self.update(x, columns, 0, x_last)
+
+    def __len__(self):
+        """
+        Returns the number of bars.
+
+        Returns:
+            int: The number of bars.
+        """
+        return self.__lengths[0]
+
+    def get_level(self, level: int, start: int = None, end: int = None) -> dict:
+        """
+        Returns the buckets of a level in [start, end).
+
+        Args:
+            level (int): The level, it is clipped to [0, max_level].
+            start (int, optional): The first bucket. Defaults to None, i.e., the first bucket.
+            end (int, optional): The bucket after the last bucket. Defaults to None, i.e., after the last bucket.
+
+        Returns:
+            dict: A dictionary mapping the column keys, "x_first" and "x_last" to the values of the buckets.
+        """
+        level = min(max(int(level), 0), self.max_level)
+        length = self.__lengths[level]
+        return {key: values[:length][start:end] for key, values in self.__levels[level].items()}
+
+    def update(self, x: np.ndarray, columns: dict, start: int = None, x_last: np.ndarray = None):
+        """
+        Updates the pyramid after the bars from `start` on were changed or appended. Only the buckets containing
+        these bars are aggregated again.
+
+        Args:
+            x (np.ndarray): The x-values of all the bars.
+            columns (dict): A dictionary mapping column keys to the values of all the bars.
+            start (int, optional): The first changed bar. Defaults to None, i.e., only appended bars changed.
+            x_last (np.ndarray, optional): The last x-values of all the bars. Defaults to None, i.e., the x-values.
+        """
+        start = (self.__lengths[0] if len(self.__lengths) > 0 else 0) if start is None else start
+        length = len(x)
+        level_0 = {key: np.asarray(values) for key, values in columns.items()}
+        level_0["x_first"] = np.asarray(x)
+        level_0["x_last"] = level_0["x_first"] if x_last is None else np.asarray(x_last)
+        lengths = [length]
+        while lengths[-1] > 1:
+            lengths.append((lengths[-1] + 1) // 2)
+        previous_lengths = self.__lengths
+        self.__lengths = lengths
+        self.max_level = len(lengths) - 1
+        if len(self.__levels) == 0:
+            self.__levels.append(level_0)
+        else:
+            self.__levels[0] = level_0
+        for level in range(1, len(lengths)):
+            if level >= len(self.__levels):
+                self.__levels.append({key: np.empty(0, dtype=values.dtype) for key, values in level_0.items()})
+            # a new level has no valid buckets yet
+            first = min(start >> level, previous_lengths[level]) if level < len(previous_lengths) else 0
+            self.__aggregate(level, first)
+
+    def __aggregate(self, level, first):
+        """
+        Aggregates the buckets of a level from bucket `first` on from the previous level.
+        """
+        previous, length = self.__levels[level - 1], self.__lengths[level]
+        previous_length = self.__lengths[level - 1]
+        current = self.__levels[level]
+        left = np.arange(2 * first, previous_length, 2)
+        right = np.minimum(left + 1, previous_length - 1)
+        for key, how in self.aggregations.items():
+            values = previous[key][:previous_length]
+            if how == "first":
+                new_values = values[left]
+            elif how == "last":
+                new_values = values[right]
+            elif how == "max":
+                new_values = np.fmax(values[left], values[right])
+            elif how == "min":
+                new_values = np.fmin(values[left], values[right])
+            elif how == "sum":
+                new_values = values[left] + np.where(right != left, values[right], 0).astype(values.dtype)
+            else:
+                raise ValueError(f"Unknown aggregation {how} of column {key}")
+            buffer = current[key]
+            if len(buffer) < length:
+                # grow by doubling, so appending bars costs amortized O(1) per level
+                grown = np.empty(max(length, 2 * len(buffer)), dtype=new_values.dtype)
+                grown[:first] = buffer[:first]
+                buffer = grown
+            buffer[first:length] = new_values
+            current[key] = buffer
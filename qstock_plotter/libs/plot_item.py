@@ -1,9 +1,12 @@
 from pyqtgraph import QtGui,QtCore
+from pyqtgraph.Qt.internals import PrimitiveArray
 import pyqtgraph as pg
 from abc import abstractclassmethod
 import numpy as np
+from collections import OrderedDict
 from .style import *
 from .data_handler import *
+from .lod import LODPyramid, aggregate_buckets
 
 def get_plot_item(data_frame:ChildDataFrame,style=DEFAULT_STYLE):
     """
@@ -26,6 +29,31 @@ def get_plot_item(data_frame:ChildDataFrame,style=DEFAULT_STYLE):
     else:
         raise TypeError("data_frame must be PricesDataFrame")
 
+def draw_rects(p, left, top, width, height):
+    """
+    Draws rectangles given as arrays with a single QPainter.drawRects call, using the current pen and brush.
+
+    The coordinates are written into a contiguous QRectF array, the same way pyqtgraph's BarGraphItem does it, so no
+    QRectF object is created per rectangle.
+
+    Args:
+        p (QPainter): The painter object used for drawing.
+        left (np.ndarray): The left x-values of the rectangles.
+        top (np.ndarray): The top y-values of the rectangles.
+        width (np.ndarray): The widths of the rectangles.
+        height (np.ndarray): The heights of the rectangles.
+    """
+    rects = PrimitiveArray(QtCore.QRectF, 4)
+    rects.resize(len(left))
+    if len(left) == 0:
+        return
+    values = rects.ndarray()
+    values[:, 0] = left
+    values[:, 1] = top
+    values[:, 2] = width
+    values[:, 3] = height
+    p.drawRects(*rects.drawargs())
+
 class AdaptiveGraphObject(pg.GraphicsObject):
     """
     A base class for adaptive graph objects in the plotter.
@@ -72,61 +100,332 @@ class AdaptiveGraphObject(pg.GraphicsObject):
         """
         raise NotImplementedError
 
-class CandlestickPricesItem(AdaptiveGraphObject):
+class BarGraphObject(AdaptiveGraphObject):
     """
-    A class representing a candlestick plot item for displaying prices.
+    A base class for graph objects drawing one bar per row of a ChildDataFrame.
+
+    The bars are split into tiles of `tile_size` rows. A tile is recorded into a QPicture the first time it is in the
+    view and kept in a least recently used cache, whose pictures take at most `tile_cache_bytes`. Only the tiles in the
+    view range are painted, their rows being found by index arithmetic on the x-values, so the cost of a frame depends
+    on the number of visible bars, not on the length of the history. Changing the data only drops the tiles from the
+    first changed bar on, e.g., the last tile for live updates, and changing the style drops all of them.
+
+    When the view shows more than `lod_threshold` bars per pixel, the visible buckets of a level-of-detail pyramid are
+    drawn instead, each bucket aggregating the bars of about one pixel, so the cost of a frame is bounded by the width
+    of the view in pixels. If the store has saved block aggregates, e.g., a windowed store, the pyramid is built from
+    the blocks and the levels finer than a block are aggregated from the visible rows, so only the visible range of
+    the store is read.
 
     Attributes:
-        data (PricesDataFrame): The data containing the prices.
-        style (Style, optional): The style of the candlestick plot item. Defaults to DEFAULT_STYLE.
-        value_key (str, optional): The key representing the value to be used for plotting. Defaults to "close".
+        data (ChildDataFrame): The data to be plotted.
+        style (Style): The style of the plot item.
+        tile_size (int): The number of bars recorded into one tile.
+        tile_cache_bytes (int): The maximum size of the cached tile pictures in bytes.
+        lod_enabled (bool): Whether the level-of-detail drawing is used when zoomed out.
+        lod_threshold (float): The number of bars per pixel from which on the level-of-detail drawing is used.
+        lod_aggregations (dict): A dictionary mapping the columns used by `_draw_buckets` to their aggregations,
+            see `LODPyramid`.
+        sigBoundsChanged (Signal): Emitted after the bounding rectangle may have changed.
+        sigDataChanged (Signal): Emitted with the position of the first changed bar after the data changed.
+
+    Methods:
+        set_style(style): Changes the style and draws the bars again.
+        clear_tiles(start): Drops the cached tiles from a row on.
     """
 
-    def __init__(self, data:PricesDataFrame, style=DEFAULT_STYLE):
+    sigBoundsChanged = QtCore.Signal()
+    sigDataChanged = QtCore.Signal(int)
+    tile_size = 256
+    tile_cache_bytes = 16 * 1024 * 1024
+    lod_enabled = True
+    lod_threshold = 2.0
+    lod_aggregations = {}
+
+    def __init__(self, data:ChildDataFrame, style=DEFAULT_STYLE):
         """
-        Initializes a CandlestickPricesItem object.
+        Initializes a BarGraphObject object.
 
         Args:
-            data (PricesDataFrame): The data containing the prices.
-            style (Style, optional): The style of the candlestick plot item. Defaults to DEFAULT_STYLE.
+            data (ChildDataFrame): The data to be plotted.
+            style (Style, optional): The style of the plot item. Defaults to DEFAULT_STYLE.
         """
         super().__init__()
         self.data = data
         self.style = style
-        self.picture = QtGui.QPicture()
-        p = QtGui.QPainter(self.picture)
-        w = style.bar_width
-        for (t, open_price, close_price, high_price, low_price) in self.data:
-            if close_price > open_price:
-                p.setBrush(pg.mkBrush(self.style.positive_color))
-                p.setPen(pg.mkPen(self.style.positive_color))
-                p.drawRect(QtCore.QRectF(t-w, open_price, w*2, close_price-open_price))
-            else:
-                p.setBrush(pg.mkBrush(self.style.negative_color))
-                p.setPen(pg.mkPen(self.style.negative_color))
-                p.drawRect(QtCore.QRectF(t-w, close_price, w*2, open_price-close_price))
-            p.drawRect(QtCore.QRectF(t-style.shadow_width/2, low_price, style.shadow_width, high_price-low_price))
+        # feature key -> read-only feature values, dropped when the data changes
+        self.__features = {}
+        # tile number -> QPicture, the least recently used tile first
+        self.__tiles = OrderedDict()
+        self.__tile_bytes = 0
+        # the pyramid is only built when the item is zoomed out for the first time
+        self.__lod = None
+        # the level of the bars aggregated in a bucket of level 0 of the pyramid, i.e., log2 of the block size
+        self.__lod_offset = 0
+        self.__bounds = self.__get_bounds()
+        # the data only keeps a weak reference, so a removed item does not stay alive with the data
+        self.data.add_listener(self.__on_data_changed)
+
+    def _draw_bars(self, p, start, end):
+        """
+        Draws the bars of the rows in [start, end) as buckets of a single bar.
+
+        Args:
+            p (QPainter): The painter object used for drawing.
+            start (int): The first row position.
+            end (int): The row position after the last row.
+        """
+        x = self.data.get_x(start, end)
+        buckets = {key: self.data.get_column(key, start, end) for key in self.lod_aggregations.keys()}
+        buckets["x_first"] = x
+        buckets["x_last"] = x
+        self._draw_buckets(p, buckets)
+
+    @abstractclassmethod
+    def _draw_buckets(p, buckets):
+        """
+        Abstract method to draw aggregated buckets of bars. A bucket of a single bar is drawn as the bar itself.
+
+        Args:
+            p (QPainter): The painter object used for drawing.
+            buckets (dict): A dictionary mapping the keys of `lod_aggregations`, "x_first" and "x_last" to the values
+                of the buckets, see `LODPyramid.get_level`.
+        """
+        raise NotImplementedError
+
+    def __get_lod_columns(self):
+        return {key: self.data.get_column(key) for key in self.lod_aggregations.keys()}
+
+    def __build_lod(self):
+        """
+        Builds the level-of-detail pyramid, from the saved block aggregates of the store if they are available.
+        """
+        blocks = self.data.store.get_block_aggregates(self.lod_aggregations)
+        if blocks is None or blocks[0] & (blocks[0] - 1) != 0:
+            self.__lod = LODPyramid(self.data.get_x(), self.__get_lod_columns(), self.lod_aggregations)
+            self.__lod_offset = 0
+            return
+        block_size, columns = blocks
+        # the x-values are the consecutive index values
+        first = np.arange(0, len(self.data), block_size)
+        last = np.minimum(first + block_size, len(self.data)) - 1
+        index_start = self.data.get_min_x()
+        self.__lod = LODPyramid(first + index_start, columns, self.lod_aggregations, x_last=last + index_start)
+        self.__lod_offset = block_size.bit_length() - 1
+
+    def _get_cached_feature(self, key, compute):
+        """
+        Returns the values of a feature, computing them only once until the data changes.
+
+        Args:
+            key (str): The key of the feature.
+            compute (Callable): A function returning the feature values of all the bars, an array or a column read on
+                demand, see `ChildDataFrame.get_lazy_column`.
+
+        Returns:
+            Union[np.ndarray, WindowedColumn, MappedColumn]: A read-only array of the feature values, or the column
+                read on demand, which is kept lazy so only the indexed bars are read.
+        """
+        if key not in self.__features:
+            values = compute()
+            self.__features[key] = read_only(values) if isinstance(values, np.ndarray) else values
+        return self.__features[key]
+
+    def set_style(self, style):
+        """
+        Changes the style and draws the bars again.
+
+        Args:
+            style (Style): The new style.
+        """
+        self.prepareGeometryChange()
+        self.style = style
+        self.clear_tiles()
+        self.__bounds = self.__get_bounds()
+        self.update()
+        self.sigBoundsChanged.emit()
+
+    def clear_tiles(self, start: int = 0):
+        """
+        Drops the cached tiles containing the rows from `start` on, so they are recorded again when painted.
+
+        Args:
+            start (int, optional): The position of the first row to draw again. Defaults to 0, i.e., all the tiles.
+        """
+        first = start // self.tile_size
+        for tile in [tile for tile in self.__tiles.keys() if tile >= first]:
+            self.__tile_bytes -= self.__tiles.pop(tile).size()
+
+    def __get_tile(self, tile):
+        """
+        Returns the picture of a tile, from the cache if possible.
+
+        Args:
+            tile (int): The tile number.
+
+        Returns:
+            QPicture: The picture of the bars of the tile.
+        """
+        if tile in self.__tiles:
+            self.__tiles.move_to_end(tile)
+            return self.__tiles[tile]
+        picture = QtGui.QPicture()
+        p = QtGui.QPainter(picture)
+        self._draw_bars(p, tile * self.tile_size, min((tile + 1) * self.tile_size, len(self.data)))
         p.end()
+        self.__tiles[tile] = picture
+        self.__tile_bytes += picture.size()
+        # the tile just recorded is kept even if it exceeds the budget alone
+        while self.__tile_bytes > self.tile_cache_bytes and len(self.__tiles) > 1:
+            self.__tile_bytes -= self.__tiles.popitem(last=False)[1].size()
+        return picture
+
+    def __get_bounds(self):
+        """
+        Returns the bounding rectangle of all the bars, computed from the data instead of recorded drawings.
+        """
+        if len(self.data) == 0:
+            return QtCore.QRectF()
+        w = self.style.bar_width
+        min_x, max_x = self.data.get_min_x(), self.data.get_max_x()
+        min_y, max_y = self.get_local_plot_range(min_x, max_x)
+        # aligned to integers like the bounding rectangles of recorded pictures, which the view limits rely on
+        return QtCore.QRectF(QtCore.QRectF(min_x - w, min_y, max_x - min_x + 2 * w, max_y - min_y).toAlignedRect())
+
+    def __get_visible_rows(self):
+        """
+        Returns the positions of the rows in the view range, with one extra row on each side for partly visible bars.
+
+        Returns:
+            tuple: A tuple containing the first row position and the row position after the last row.
+        """
+        length = len(self.data)
+        view = self.viewRect()
+        if view is None or length == 0:
+            return 0, length
+        # the x-values are the consecutive index values, so the rows follow from the view range directly
+        index_start = self.data.get_min_x()
+        start = int(min(max(np.floor(view.left()) - index_start - 1, 0), length))
+        end = int(min(max(np.ceil(view.right()) - index_start + 2, 0), length))
+        return start, end
+
+    def __on_data_changed(self, start):
+        self.prepareGeometryChange()
+        self.__features.clear()
+        self.clear_tiles(start)
+        self.__bounds = self.__get_bounds()
+        if self.__lod is not None:
+            if self.__lod_offset == 0:
+                self.__lod.update(self.data.get_x(), self.__get_lod_columns(), start)
+            else:
+                self.__lod = None
+        self.update()
+        self.sigBoundsChanged.emit()
+        self.sigDataChanged.emit(start)
 
     def paint(self, p, *args):
         """
-        Paints the candlestick plot item.
+        Paints the tiles in the view range.
 
         Args:
             p (QPainter): The painter object used for painting.
             *args: Additional arguments.
         """
-        p.drawPicture(0,0, self.picture)
-    
+        start, end = self.__get_visible_rows()
+        if start >= end:
+            return
+        scale = abs(p.transform().m11())
+        bars_per_pixel = 1 / scale if scale > 0 else 0
+        if self.lod_enabled and bars_per_pixel >= self.lod_threshold:
+            self.__paint_lod(p, bars_per_pixel, start, end)
+        else:
+            for tile in range(start // self.tile_size, (end - 1) // self.tile_size + 1):
+                p.drawPicture(0, 0, self.__get_tile(tile))
+
+    def __paint_lod(self, p, bars_per_pixel, start, end):
+        """
+        Paints the buckets containing the rows in [start, end) of the level whose buckets are about
+        `2/lod_threshold` pixels wide.
+
+        Args:
+            p (QPainter): The painter object used for painting.
+            bars_per_pixel (float): The number of bars per pixel of the view.
+            start (int): The first row position.
+            end (int): The row position after the last row.
+        """
+        if self.__lod is None:
+            self.__build_lod()
+        level = int(np.floor(np.log2(2 * bars_per_pixel / self.lod_threshold)))
+        if level >= self.__lod_offset:
+            buckets = self.__lod.get_level(level - self.__lod_offset, start >> level, ((end - 1) >> level) + 1)
+        else:
+            # the buckets are finer than the saved blocks, so they are aggregated from the visible rows
+            first, last = (start >> level) << level, min((((end - 1) >> level) + 1) << level, len(self.data))
+            columns = {key: self.data.get_column(key, first, last) for key in self.lod_aggregations.keys()}
+            buckets = aggregate_buckets(self.data.get_x(first, last), columns, self.lod_aggregations, 1 << level)
+        self._draw_buckets(p, buckets)
+
     def boundingRect(self):
         """
-        Returns the bounding rectangle of the candlestick plot item.
+        Returns the bounding rectangle of the bars.
 
         Returns:
             QRectF: The bounding rectangle.
         """
-        return QtCore.QRectF(self.picture.boundingRect())
-    
+        return QtCore.QRectF(self.__bounds)
+
+class CandlestickPricesItem(BarGraphObject):
+    """
+    A class representing a candlestick plot item for displaying prices.
+
+    Attributes:
+        data (PricesDataFrame): The data containing the prices.
+        style (Style, optional): The style of the candlestick plot item. Defaults to DEFAULT_STYLE.
+        value_key (str, optional): The key representing the value to be used for plotting. Defaults to "close".
+    """
+
+    lod_aggregations = {"open": "first", "high": "max", "low": "min", "close": "last"}
+
+    def __init__(self, data:PricesDataFrame, style=DEFAULT_STYLE):
+        """
+        Initializes a CandlestickPricesItem object.
+
+        Args:
+            data (PricesDataFrame): The data containing the prices.
+            style (Style, optional): The style of the candlestick plot item. Defaults to DEFAULT_STYLE.
+        """
+        super().__init__(data, style=style)
+
+    def _draw_buckets(self, p, buckets):
+        """
+        Draws one candlestick for each bucket of bars.
+
+        The bodies and shadows are grouped by direction, so there is one pen and brush switch and one drawRects call
+        per colour.
+
+        Args:
+            p (QPainter): The painter object used for drawing.
+            buckets (dict): The open, close, high and low prices and the x-values of the first and the last bar of
+                the buckets.
+        """
+        w = self.style.bar_width
+        left = buckets["x_first"] - w
+        width = buckets["x_last"] + w - left
+        shadow_width = width * self.style.shadow_width / (2 * w)
+        shadow_left = left + (width - shadow_width) / 2
+        open_prices, close_prices = buckets["open"], buckets["close"]
+        positive = close_prices > open_prices
+        bottom = np.where(positive, open_prices, close_prices)
+        height = np.abs(close_prices - open_prices)
+        shadow_height = buckets["high"] - buckets["low"]
+        for mask, color in [(positive, self.style.positive_color), (~positive, self.style.negative_color)]:
+            p.setBrush(pg.mkBrush(color))
+            p.setPen(pg.mkPen(color))
+            draw_rects(p,
+                       np.concatenate([left[mask], shadow_left[mask]]),
+                       np.concatenate([bottom[mask], buckets["low"][mask]]),
+                       np.concatenate([width[mask], shadow_width[mask]]),
+                       np.concatenate([height[mask], shadow_height[mask]]))
+
     def get_local_plot_range(self,x_start,x_end):
         """
         Returns the local plot range based on the given x-axis start and end values.
@@ -151,13 +450,13 @@ class CandlestickPricesItem(AdaptiveGraphObject):
     
     def get_feature_value(self,key="close"):
         """
-        Returns the feature values based on the given key.
+        Returns the feature values based on the given key. The values are cached until the data changes.
 
         Args:
             key (str, optional): The key representing the feature value. Defaults to "close".
 
         Returns:
-            ndarray: The feature values.
+            ndarray: A read-only array of the feature values, or a column read on demand for a windowed store.
         
         Raises:
             ValueError: If the key is not one of 'open', 'close', 'high', 'low'.
@@ -165,10 +464,9 @@ class CandlestickPricesItem(AdaptiveGraphObject):
         available_keys=["open","close","high","low"]
         if key not in available_keys:
             raise ValueError("value_key must be one of 'open','close','high','low'")
-        index=available_keys.index(key)+1
-        return np.asarray([data[index] for data in self.data])
+        return self._get_cached_feature(key, lambda: self.data.get_lazy_column(key))
 
-class CandlestickVolumeItem(AdaptiveGraphObject):
+class CandlestickVolumeItem(BarGraphObject):
     """
     A class representing a candlestick volume item for plotting.
 
@@ -177,26 +475,26 @@ class CandlestickVolumeItem(AdaptiveGraphObject):
         style (Style, optional): The style configuration for the plot item. Defaults to DEFAULT_STYLE.
     """
 
+    lod_aggregations = {"volume": "max"}
+
     def __init__(self, data:VolumeDataFrame, style=DEFAULT_STYLE):
-        super().__init__()
-        self.data = data
-        self.style = style
-        self.picture = QtGui.QPicture()
-        p = QtGui.QPainter(self.picture)
+        super().__init__(data, style=style)
+
+    def _draw_buckets(self, p, buckets):
+        """
+        Draws one volume bar with the maximum volume for each bucket of bars.
+
+        Args:
+            p (QPainter): The painter object used for drawing.
+            buckets (dict): The maximum volumes and the x-values of the first and the last bar of the buckets.
+        """
+        w = self.style.bar_width
+        left = buckets["x_first"] - w
+        volume = buckets["volume"] / 1e8
         p.setBrush(pg.mkBrush(self.style.volume_color))
         p.setPen(pg.mkPen(self.style.volume_color))
-        w = style.bar_width
-        for (t, volume) in self.data:
-            volume=volume/1e8
-            p.drawRect(QtCore.QRectF(t-w, 0, w*2, volume))
-        p.end()
+        draw_rects(p, left, np.zeros(len(left)), buckets["x_last"] + w - left, volume)
 
-    def paint(self, p, *args):
-        p.drawPicture(0,0, self.picture)
-    
-    def boundingRect(self):
-        return QtCore.QRectF(self.picture.boundingRect())
-    
     def get_local_plot_range(self,x_start,x_end):
         """
         Get the local plot range for the volume item.
@@ -222,9 +520,9 @@ class CandlestickVolumeItem(AdaptiveGraphObject):
     
     def get_feature_value(self):
         """
-        Get the feature values for the volume item.
+        Get the feature values for the volume item. The values are cached until the data changes.
 
         Returns:
-            numpy.ndarray: An array of feature values.
+            numpy.ndarray: A read-only array of feature values, or a column read on demand for a windowed store.
         """
-        return np.asarray([data[1]/1e8 for data in self.data])
+        return self._get_cached_feature("volume", lambda: map_column(self.data.get_lazy_column("volume"), lambda volume: volume/1e8))
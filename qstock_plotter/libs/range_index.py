@@ -0,0 +1,147 @@
+import numpy as np
+
+class RangeIndex():
+    """
+    A range-minimum/range-maximum index over a pair of columns.
+
+    The rows are grouped into blocks of `block_size` rows. A sparse table over the block minima/maxima answers the
+    fully covered blocks of a query in constant time, while the at most two partially covered blocks at the edges of
+    the query are scanned directly. A query therefore never touches more than `2*block_size` rows, whatever the
+    length of the queried range is. NaN values are ignored.
+
+    Entry `j` of level `k` of the sparse table holds the extremum of the blocks `(j-2**k, j]`, so appending rows only
+    appends entries to each level and never touches existing entries.
+
+    Attributes:
+        block_size (int): The number of rows in a block.
+        min_values (np.ndarray): The column for the range-minimum queries.
+        max_values (np.ndarray): The column for the range-maximum queries.
+
+    Methods:
+        query(start, end): Returns the minimum and maximum values of the rows in [start, end).
+        update(min_values, max_values, start): Updates the index after the rows from start on were changed or appended.
+    """
+
+    def __init__(self, min_values: np.ndarray, max_values: np.ndarray, block_size: int = 64,
+                 block_min: np.ndarray = None, block_max: np.ndarray = None) -> None:
+        """
+        Initializes the RangeIndex object.
+
+        Args:
+            min_values (np.ndarray): The column for the range-minimum queries.
+                Any object supporting `len` and slicing, e.g., a lazily read column, can be used.
+            max_values (np.ndarray): The column for the range-maximum queries.
+            block_size (int, optional): The number of rows in a block. Defaults to 64.
+            block_min (np.ndarray, optional): Precomputed minima of the blocks of min_values. Defaults to None, i.e.,
+                they are computed from min_values.
+            block_max (np.ndarray, optional): Precomputed maxima of the blocks of max_values. Defaults to None, i.e.,
+                they are computed from max_values.
+        """
+        self.block_size = block_size
+        self.min_values = min_values
+        self.max_values = max_values
+        self.__num_blocks = 0
+        self.__min_table = []
+        self.__max_table = []
+        self.__update(min_values, max_values, 0, block_min, block_max)
+
+    def __len__(self):
+        """
+        Returns the number of indexed rows.
+
+        Returns:
+            int: The number of indexed rows.
+        """
+        return len(self.min_values)
+
+    def __build_levels(self, table, values, func, first_block, blocks=None):
+        """
+        Rebuilds the entries of all levels of a sparse table from `first_block` on.
+
+        Args:
+            table (list): The levels of the sparse table.
+            values (np.ndarray): The indexed column.
+            func (np.ufunc): `np.fmin` or `np.fmax`.
+            first_block (int): The first block that changed.
+            blocks (np.ndarray, optional): Precomputed extrema of all the blocks. Defaults to None.
+        """
+        num_blocks = self.__num_blocks
+        num_levels = num_blocks.bit_length()
+        # a new level has no valid entries yet, so it has to be built from the first block
+        first_blocks = [first_block if level < len(table) else 0 for level in range(num_levels)]
+        while len(table) < num_levels:
+            table.append(np.empty(0, dtype=values.dtype if blocks is None else blocks.dtype))
+        for level in range(num_levels):
+            if len(table[level]) < num_blocks:
+                grown = np.empty(max(num_blocks, 2 * len(table[level])), dtype=table[level].dtype)
+                grown[:len(table[level])] = table[level]
+                table[level] = grown
+            start = first_blocks[level]
+            if level == 0 and blocks is not None:
+                table[0][start:num_blocks] = blocks[start:num_blocks]
+            elif level == 0:
+                table[0][start:num_blocks] = func.reduceat(values[start * self.block_size:],
+                                                           np.arange(0, len(values) - start * self.block_size, self.block_size))
+            else:
+                previous = table[level - 1]
+                half = 1 << (level - 1)
+                # entries before block 2**level-1 do not cover 2**level blocks and are never queried
+                start = max(start, half)
+                table[level][start:num_blocks] = func(previous[start:num_blocks], previous[start - half:num_blocks - half])
+
+    def update(self, min_values: np.ndarray, max_values: np.ndarray, start: int = None):
+        """
+        Updates the index after the rows from `start` on were changed or appended.
+
+        Args:
+            min_values (np.ndarray): The full column for the range-minimum queries.
+            max_values (np.ndarray): The full column for the range-maximum queries.
+            start (int, optional): The first row that changed. Defaults to None, i.e., only appended rows after the
+                previously indexed rows changed.
+        """
+        self.__update(min_values, max_values, len(self) if start is None else start)
+
+    def __update(self, min_values, max_values, start, block_min=None, block_max=None):
+        self.min_values = min_values
+        self.max_values = max_values
+        self.__num_blocks = -(-len(min_values) // self.block_size)
+        first_block = min(start // self.block_size, self.__num_blocks)
+        if self.__num_blocks == 0:
+            self.__min_table = []
+            self.__max_table = []
+            return
+        self.__build_levels(self.__min_table, min_values, np.fmin, first_block, block_min)
+        self.__build_levels(self.__max_table, max_values, np.fmax, first_block, block_max)
+
+    def query(self, start: int, end: int):
+        """
+        Returns the minimum and maximum values of the rows in [start, end).
+
+        Args:
+            start (int): The first row position.
+            end (int): The row position after the last row.
+
+        Returns:
+            tuple: A tuple containing the minimum and maximum values. Both are NaN if the range is empty.
+        """
+        start = max(int(start), 0)
+        end = min(int(end), len(self))
+        if start >= end:
+            return np.nan, np.nan
+        first_block = -(-start // self.block_size)
+        last_block = end // self.block_size
+        if first_block >= last_block:
+            return np.fmin.reduce(self.min_values[start:end]), np.fmax.reduce(self.max_values[start:end])
+        level = (last_block - first_block).bit_length() - 1
+        left = first_block + (1 << level) - 1
+        min_value = np.fmin(self.__min_table[level][left], self.__min_table[level][last_block - 1])
+        max_value = np.fmax(self.__max_table[level][left], self.__max_table[level][last_block - 1])
+        head_end = first_block * self.block_size
+        if start < head_end:
+            min_value = np.fmin(min_value, np.fmin.reduce(self.min_values[start:head_end]))
+            max_value = np.fmax(max_value, np.fmax.reduce(self.max_values[start:head_end]))
+        tail_start = last_block * self.block_size
+        if tail_start < end:
+            min_value = np.fmin(min_value, np.fmin.reduce(self.min_values[tail_start:end]))
+            max_value = np.fmax(max_value, np.fmax.reduce(self.max_values[tail_start:end]))
+        return min_value, max_value
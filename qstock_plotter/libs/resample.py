@@ -0,0 +1,140 @@
+import re
+import numpy as np
+
+# how the columns of the bars in a period are aggregated, the other columns take the value of the last bar
+DEFAULT_AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "amount": "sum",
+}
+
+AGGREGATION_FUNCTIONS = {
+    "max": np.fmax.reduceat,
+    "min": np.fmin.reduceat,
+    "sum": np.add.reduceat,
+}
+
+# rules with a fixed length, in seconds
+FIXED_RULE_SECONDS = {
+    "s": 1,
+    "min": 60,
+    "T": 60,
+    "H": 3600,
+    "h": 3600,
+    "D": 86400,
+}
+
+# rules based on calendar months
+MONTH_RULE_MONTHS = {
+    "M": 1,
+    "Q": 3,
+    "Y": 12,
+    "A": 12,
+}
+
+def parse_rule(rule: str):
+    """
+    Parses a resampling rule, e.g., "W", "2D", "Q" or "15min".
+
+    Args:
+        rule (str): The rule, an optional multiple followed by one of "s", "min" (or "T"), "H" (or "h"), "D", "W",
+            "M", "Q" and "Y" (or "A").
+
+    Returns:
+        tuple: A tuple containing the multiple and the unit of the rule.
+
+    Raises:
+        ValueError: If the rule is not supported.
+    """
+    match = re.fullmatch(r"\s*(\d*)\s*(s|min|T|H|h|D|W|M|Q|Y|A)\s*", rule)
+    if match is None:
+        raise ValueError(f"Unsupported resampling rule {rule}")
+    multiple = int(match.group(1)) if match.group(1) != "" else 1
+    if multiple < 1:
+        raise ValueError(f"The multiple of the resampling rule {rule} must be positive")
+    return multiple, match.group(2)
+
+def get_period_keys(dates: np.ndarray, rule: str) -> np.ndarray:
+    """
+    Returns the key of the period of every date. Dates in the same period have the same key.
+
+    Periods are aligned to the epoch, e.g., "2D" groups the calendar days in pairs, weeks start on Monday and
+    quarters start in January, April, July and October.
+
+    Args:
+        dates (np.ndarray): The dates as datetime64.
+        rule (str): The resampling rule, see `parse_rule`.
+
+    Returns:
+        np.ndarray: The int64 period keys.
+    """
+    multiple, unit = parse_rule(rule)
+    dates = np.asarray(dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        raise TypeError(f"The dates must be datetime64 values to be resampled: {dates.dtype}")
+    if unit in MONTH_RULE_MONTHS:
+        return dates.astype("datetime64[M]").astype(np.int64) // (multiple * MONTH_RULE_MONTHS[unit])
+    if unit == "W":
+        # 1970-01-01 is a Thursday, shifting by three days makes weeks start on Monday
+        return (dates.astype("datetime64[D]").astype(np.int64) + 3) // (7 * multiple)
+    return dates.astype("datetime64[s]").astype(np.int64) // (multiple * FIXED_RULE_SECONDS[unit])
+
+def get_period_starts(dates: np.ndarray, rule: str) -> np.ndarray:
+    """
+    Returns the positions of the first bar of every period.
+
+    Args:
+        dates (np.ndarray): The sorted dates as datetime64.
+        rule (str): The resampling rule, see `parse_rule`.
+
+    Returns:
+        np.ndarray: The positions of the first bars.
+    """
+    keys = get_period_keys(dates, rule)
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+
+def resample_ohlcv(columns: dict, rule: str, date_key: str = "date", aggregations: dict = None):
+    """
+    Resamples bars into coarser bars, e.g., daily bars into weekly bars.
+
+    Every period is aggregated in one vectorized pass per column: "open" takes the first value, "high" the maximum,
+    "low" the minimum, "close" the last value and "volume" the sum. A coarse bar is labelled with the date of the
+    last bar in its period.
+
+    Args:
+        columns (dict): A dictionary mapping column keys to arrays, including the dates as datetime64.
+        rule (str): The resampling rule, see `parse_rule`.
+        date_key (str, optional): The key of the dates. Defaults to "date".
+        aggregations (dict, optional): A dictionary mapping column keys to "first", "last", "max", "min" or "sum".
+            Columns which are not given take the last value. Defaults to None, i.e., DEFAULT_AGGREGATIONS.
+
+    Returns:
+        tuple: A tuple containing a dictionary mapping column keys to the resampled arrays and the positions of the
+            first bar of every period.
+    """
+    aggregations = DEFAULT_AGGREGATIONS if aggregations is None else aggregations
+    columns = {key: np.asarray(values) for key, values in columns.items()}
+    starts = get_period_starts(columns[date_key], rule)
+    ends = np.concatenate([starts[1:], [len(columns[date_key])]]).astype(np.int64) if len(starts) > 0 else starts
+    resampled = {}
+    for key, values in columns.items():
+        how = aggregations.get(key, "last")
+        if len(starts) == 0:
+            resampled[key] = values[:0]
+        elif how == "first":
+            resampled[key] = values[starts]
+        elif how == "last":
+            resampled[key] = values[ends - 1]
+        elif how == "sum" and values.dtype.kind in "iu":
+            # sums of compact integer columns, e.g., uint32 volumes, are accumulated in 64 bits to not overflow
+            resampled[key] = np.add.reduceat(values, starts, dtype=np.uint64 if values.dtype.kind == "u" else np.int64)
+        elif how in AGGREGATION_FUNCTIONS:
+            resampled[key] = AGGREGATION_FUNCTIONS[how](values, starts)
+        else:
+            raise ValueError(f"Unknown aggregation {how} of column {key}")
+    return resampled, starts
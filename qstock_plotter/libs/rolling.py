@@ -0,0 +1,259 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# the maximum number of window elements reduced at once, bounding the temporary arrays of a block of windows
+BLOCK_ELEMENTS = 1 << 20
+
+# the maximum growth of the scaled terms in one block of the exponential moving average
+EMA_BLOCK_RATIO = 1e100
+
+# the number of windows whose statistics are taken from one block of cumulative sums, per value of a window
+CUMSUM_BLOCK_RATIO = 4
+
+def get_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns a read-only view of all the windows of an array, one window per row, without copying the values.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The length of the windows.
+
+    Returns:
+        np.ndarray: An array of shape (len(values)-window+1, window). It is empty if there are less values than the
+            length of the windows.
+
+    Raises:
+        ValueError: If the length of the windows is not positive.
+    """
+    values = np.asarray(values)
+    window = int(window)
+    if window < 1:
+        raise ValueError(f"The length of the windows must be positive: {window}")
+    if len(values) < window:
+        return np.empty((0, window), dtype=values.dtype)
+    return sliding_window_view(values, window)
+
+def reduce_windows(values: np.ndarray, window: int, reduce) -> np.ndarray:
+    """
+    Applies a vectorized reduction to all the windows of an array, in blocks of windows so the temporary arrays of the
+    reduction stay small.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The length of the windows.
+        reduce (Callable): A function mapping an array of windows, one window per row, to one value per window.
+
+    Returns:
+        np.ndarray: The reduced values, one for each window ending at the positions from window-1 on.
+    """
+    windows = get_windows(values, window)
+    block_size = max(1, BLOCK_ELEMENTS // int(window))
+    if len(windows) <= block_size:
+        return np.asarray(reduce(windows))
+    return np.concatenate([reduce(windows[start:start+block_size]) for start in range(0, len(windows), block_size)])
+
+def prefix_sums(rows: np.ndarray) -> np.ndarray:
+    """
+    Returns the cumulative sums of the rows of a two-dimensional array, starting with a column of zeros, so the sum of
+    the values in [start, end) of a row is `sums[:, end] - sums[:, start]`.
+
+    Args:
+        rows (np.ndarray): The rows.
+
+    Returns:
+        np.ndarray: An array with one more column than the rows.
+    """
+    sums = np.zeros((rows.shape[0], rows.shape[1]+1), dtype=np.float64)
+    np.cumsum(rows, axis=1, out=sums[:, 1:])
+    return sums
+
+def reduce_cumulative(values: np.ndarray, window: int, reduce) -> np.ndarray:
+    """
+    Calculates a statistic of all the windows of an array from cumulative sums, in O(n) for any length of the windows.
+
+    The windows are split into blocks of `CUMSUM_BLOCK_RATIO*window` windows. The values of a block are centered on
+    their mean and summed up from zero, all the blocks at once as the rows of a two-dimensional array. The sums of a
+    block neither grow with the length of the array nor with the level of the values, e.g., prices far from zero, so
+    neither do their rounding errors. The rows are processed in groups of at most `BLOCK_ELEMENTS` values.
+
+    Values which are not finite, e.g., NaN, are left out of the sums and the statistics of their windows are NaN.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The length of the windows.
+        reduce (Callable): A function called as `reduce(centered, center, window)` with the centered values of the
+            blocks, one block per row, and their centers, a column. It returns the statistics of the windows of every
+            row, i.e., an array with `window-1` columns less than the centered values.
+
+    Returns:
+        np.ndarray: The statistics of the windows ending at the positions from window-1 on.
+
+    Raises:
+        ValueError: If the length of the windows is not positive.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    window = int(window)
+    if window < 1:
+        raise ValueError(f"The length of the windows must be positive: {window}")
+    count = len(values) - window + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.float64)
+    block_size = CUMSUM_BLOCK_RATIO * window
+    result = np.empty(count, dtype=np.float64)
+    full_blocks = count // block_size
+    # the blocks overlap by window-1 values, the rows are views of the values
+    rows = get_windows(values[:full_blocks*block_size+window-1], block_size+window-1)[::block_size]
+    rows_per_group = max(1, BLOCK_ELEMENTS // (block_size+window-1))
+    for first in range(0, full_blocks, rows_per_group):
+        last = min(first + rows_per_group, full_blocks)
+        result[first*block_size:last*block_size] = reduce_blocks(rows[first:last], window, reduce).ravel()
+    if full_blocks * block_size < count:
+        result[full_blocks*block_size:] = reduce_blocks(values[None, full_blocks*block_size:], window, reduce)[0]
+    return result
+
+def reduce_blocks(rows: np.ndarray, window: int, reduce) -> np.ndarray:
+    """
+    Centers blocks of values on their means and calculates the statistics of their windows, see `reduce_cumulative`.
+    """
+    missing = ~np.isfinite(rows)
+    centered = np.where(missing, 0.0, rows)
+    center = centered.sum(axis=1, keepdims=True) / np.maximum((~missing).sum(axis=1, keepdims=True), 1)
+    centered = np.where(missing, 0.0, centered - center)
+    result = reduce(centered, center, window)
+    if missing.any():
+        missing_counts = prefix_sums(missing)
+        result[missing_counts[:, window:] - missing_counts[:, :-window] > 0] = np.nan
+    return result
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the simple moving average.
+
+    Every window is averaged by `np.mean`, i.e., with NumPy's pairwise summation, so the averages are exactly the
+    ones of `np.mean(values[i:i+window])` and do not suffer from the accumulated errors of running sums.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The number of values to average.
+
+    Returns:
+        np.ndarray: The averages of the windows ending at the positions from window-1 on.
+    """
+    return reduce_windows(values, window, lambda windows: windows.mean(axis=-1))
+
+def wma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the linearly weighted moving average, the latest value having the weight `window` and the earliest value
+    the weight 1.
+
+    The weighted sums are taken from two cumulative sums, of the values and of the values times their positions, so
+    the cost is O(n) for any length of the windows, see `reduce_cumulative`.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The number of values to average.
+
+    Returns:
+        np.ndarray: The averages of the windows ending at the positions from window-1 on.
+    """
+    def reduce(centered, center, window):
+        sums = prefix_sums(centered)
+        weighted_sums = prefix_sums(centered * np.arange(centered.shape[1]))
+        # the value at the position t of a row has the weight t-j+1 in the window starting at the position j
+        starts = np.arange(centered.shape[1] - window + 1)
+        window_sums = sums[:, window:] - sums[:, :-window]
+        weighted = weighted_sums[:, window:] - weighted_sums[:, :-window] - (starts - 1) * window_sums
+        return center + weighted / (window * (window + 1) / 2)
+    return reduce_cumulative(values, window, reduce)
+
+def rolling_std(values: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    """
+    Returns the rolling standard deviation.
+
+    The variances are taken from the cumulative sums of the values and of their squares, so the cost is O(n) for any
+    length of the windows. The values are centered on the mean of their block, see `reduce_cumulative`, which avoids
+    the cancellation of the sum-of-squares formula for values far from zero like prices. Variances below the rounding
+    error of the sums, e.g., of windows of equal values, are zero.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The number of values in a window.
+        ddof (int, optional): The delta degrees of freedom. Defaults to 0, i.e., the population standard deviation.
+
+    Returns:
+        np.ndarray: The standard deviations of the windows ending at the positions from window-1 on.
+    """
+    def reduce(centered, center, window):
+        sums = prefix_sums(centered)
+        square_sums = prefix_sums(centered * centered)
+        window_sums = sums[:, window:] - sums[:, :-window]
+        window_square_sums = square_sums[:, window:] - square_sums[:, :-window]
+        deviations = window_square_sums - window_sums * window_sums / window
+        # the rounding error of a difference of the cumulative sums is bounded by the sum of the whole block
+        rounding_error = centered.shape[1] * np.finfo(np.float64).eps * square_sums[:, -1:]
+        return np.sqrt(np.where(deviations > rounding_error, deviations, 0.0) / (window - ddof))
+    return reduce_cumulative(values, window, reduce)
+
+def ema(values: np.ndarray, window: int, alpha: float = None) -> np.ndarray:
+    """
+    Returns the exponential moving average, seeded by the simple moving average of the first window.
+
+    The recursion `ema[t] = alpha*values[t] + (1-alpha)*ema[t-1]` is solved in closed form for blocks of values,
+    with one cumulative sum per block, so the cost is O(n) without a Python loop over the values. The blocks are
+    short enough for the scaled terms not to overflow.
+
+    Args:
+        values (np.ndarray): The values.
+        window (int): The span of the average.
+        alpha (float, optional): The smoothing factor in (0, 1]. Defaults to None, i.e., 2/(window+1).
+
+    Returns:
+        np.ndarray: The averages at the positions from window-1 on.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    window = int(window)
+    alpha = 2 / (window + 1) if alpha is None else float(alpha)
+    if not 0 < alpha <= 1:
+        raise ValueError(f"The smoothing factor must be in (0, 1]: {alpha}")
+    if len(values) < window:
+        return np.empty(0, dtype=np.float64)
+    result = np.empty(len(values) - window + 1, dtype=np.float64)
+    result[0] = np.mean(values[:window])
+    ema_continue(values[window:], alpha, result[0], result[1:])
+    return result
+
+def ema_continue(values: np.ndarray, alpha: float, previous: float, out: np.ndarray = None) -> np.ndarray:
+    """
+    Continues an exponential moving average with new values, e.g., after bars were appended.
+
+    Args:
+        values (np.ndarray): The new values.
+        alpha (float): The smoothing factor in (0, 1].
+        previous (float): The average before the first new value.
+        out (np.ndarray, optional): An array of the same length as `values` to write the averages to. Defaults to
+            None, i.e., a new array.
+
+    Returns:
+        np.ndarray: The averages at the new values, or the array `out` with them written to it.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(len(values), dtype=np.float64) if out is None else out
+    if alpha == 1:
+        out[:] = values
+        return out
+    decay = 1 - alpha
+    block_size = max(1, int(np.log(EMA_BLOCK_RATIO) / -np.log(decay)))
+    for start in range(0, len(values), block_size):
+        block = values[start:start+block_size]
+        powers = decay ** np.arange(1, len(block)+1)
+        # ema[j] = decay**(j+1)*previous + alpha*sum_i(decay**(j-i)*block[i]), with the sum as a cumulative sum
+        out[start:start+len(block)] = powers * previous + alpha * np.cumsum(block / powers * decay) * powers / decay
+        previous = out[start+len(block)-1]
+    return out
+
+# the moving averages by type, with whether an average only depends on the values of its window
+AVERAGE_FUNCTIONS = {
+    "sma": (sma, True),
+    "wma": (wma, True),
+    "ema": (ema, False),
+}
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+def to_datetime64(values):
+    """
+    Converts a column of dates into a datetime64 array with the coarsest unit that represents all dates exactly.
+
+    Args:
+        values (array-like): The raw dates, e.g., strings like "2000-01-04" or epoch based datetime64 values.
+
+    Returns:
+        np.ndarray: The converted dates, or None if the values can not be parsed as dates.
+    """
+    values = pd.Series(values)
+    try:
+        dates = pd.to_datetime(values, errors='coerce')
+    except (ValueError, TypeError):
+        return None
+    if dates.isna().sum() > values.isna().sum():
+        return None
+    dates = dates.to_numpy()
+    for unit in ["D", "m", "s"]:
+        coarse = dates.astype("datetime64[{}]".format(unit))
+        if np.array_equal(coarse, dates, equal_nan=True):
+            return coarse
+    return dates
+
+def is_consecutive(values) -> bool:
+    """
+    Returns whether values are consecutive integers, e.g., the index values of rows which are used as positions.
+
+    Args:
+        values (array-like): The values.
+
+    Returns:
+        bool: True if the values are integers increasing by one, which includes empty and single values.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "iu":
+        return False
+    return len(values) <= 1 or bool(np.all(np.diff(values) == 1))
+
+class TickLabelProvider():
+    """
+    A lazy provider of x-tick labels.
+
+    The provider keeps the raw labels, usually the date column as datetime64, and only formats the labels of the
+    ticks that are actually drawn. Formatted labels are kept in a small LRU cache.
+    It can be used like the dictionary mapping index values to labels which it replaces, i.e., `provider[index]`.
+    The labels are positional, the label of the index value `i` is `labels[i - index_start]`.
+
+    Attributes:
+        labels (np.ndarray): The raw labels.
+        index_start (int): The index value of the first label.
+        cache_size (int): The maximum number of formatted labels kept in the cache.
+
+    Methods:
+        get_labels(indexes): Returns the formatted labels of several index values.
+        update(labels, start): Replaces the raw labels after the labels from start on were changed or appended.
+        from_dict(ticks): Creates a provider from a dictionary mapping index values to labels.
+    """
+
+    def __init__(self, labels, index_start: int = 0, cache_size: int = 512) -> None:
+        """
+        Initializes the TickLabelProvider object.
+
+        Args:
+            labels (array-like): The raw labels. Labels of datetime64 type are formatted in a vectorized way,
+                others are converted with `str`. Column-like objects supporting `len`, `dtype` and integer array
+                indexing are used without reading them.
+            index_start (int, optional): The index value of the first label. Defaults to 0.
+            cache_size (int, optional): The maximum number of formatted labels kept in the cache. Defaults to 512.
+        """
+        # column-like objects, e.g., lazily read columns, are kept as they are and only indexed when formatting
+        self.labels = labels if hasattr(labels, "dtype") else np.asarray(labels)
+        self.index_start = int(index_start)
+        self.cache_size = cache_size
+        self.__cache = OrderedDict()
+
+    @classmethod
+    def from_dict(cls, ticks: dict):
+        """
+        Creates a provider from a dictionary mapping index values to labels.
+
+        The labels are placed at their index values, so index values missing between the first and the last key,
+        e.g., of dropped rows, get an empty label instead of shifting the following labels.
+
+        Args:
+            ticks (dict): The dictionary mapping integer index values to labels.
+
+        Returns:
+            TickLabelProvider: The provider.
+
+        Raises:
+            ValueError: If an index value is not an integer.
+        """
+        indexes = np.asarray(list(ticks.keys()))
+        if len(indexes) > 0 and indexes.dtype.kind not in "iu":
+            raise ValueError("The index values of the tick labels must be integers")
+        if is_consecutive(indexes):
+            return cls(np.asarray(list(ticks.values()), dtype=object), index_start=indexes[0] if len(indexes) > 0 else 0)
+        index_start = int(indexes.min())
+        labels = np.full(int(indexes.max()) - index_start + 1, "", dtype=object)
+        labels[indexes - index_start] = list(ticks.values())
+        return cls(labels, index_start=index_start)
+
+    @property
+    def min_index(self):
+        """
+        The index value of the first label.
+        """
+        return self.index_start
+
+    @property
+    def max_index(self):
+        """
+        The index value of the last label.
+        """
+        return self.index_start + len(self.labels) - 1
+
+    def __len__(self):
+        """
+        Returns the number of labels.
+
+        Returns:
+            int: The number of labels.
+        """
+        return len(self.labels)
+
+    def __contains__(self, index):
+        """
+        Returns whether there is a label for the given index value.
+        """
+        return self.min_index <= index <= self.max_index
+
+    def update(self, labels, start: int = None):
+        """
+        Replaces the raw labels after the labels from `start` on were changed or appended.
+
+        Args:
+            labels (array-like): The full raw labels.
+            start (int, optional): The position of the first changed label. Defaults to None, i.e., only appended
+                labels after the previous labels changed.
+        """
+        start = len(self.labels) if start is None else start
+        self.labels = labels if hasattr(labels, "dtype") else np.asarray(labels)
+        for index in [index for index in self.__cache.keys() if index >= self.index_start + start]:
+            del self.__cache[index]
+
+    def __format(self, labels):
+        """
+        Formats a batch of raw labels.
+
+        Args:
+            labels (np.ndarray): The raw labels.
+
+        Returns:
+            list: The formatted labels.
+        """
+        if np.issubdtype(labels.dtype, np.datetime64):
+            return np.datetime_as_string(labels).tolist()
+        return [str(label) for label in labels]
+
+    def get_labels(self, indexes) -> list:
+        """
+        Returns the formatted labels of several index values.
+
+        Only labels which are not in the cache are formatted, all in one batch.
+
+        Args:
+            indexes (list): The integer index values.
+
+        Returns:
+            list: The formatted labels.
+
+        Raises:
+            KeyError: If there is no label for one of the index values.
+        """
+        missing = []
+        for index in indexes:
+            if index in self.__cache:
+                self.__cache.move_to_end(index)
+            elif index in self:
+                missing.append(index)
+            else:
+                raise KeyError(index)
+        if len(missing) > 0:
+            positions = np.asarray(missing, dtype=np.int64) - self.index_start
+            for index, label in zip(missing, self.__format(self.labels[positions])):
+                self.__cache[index] = label
+        labels = [self.__cache[index] for index in indexes]
+        while len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+        return labels
+
+    def __getitem__(self, index):
+        """
+        Returns the formatted label of an index value.
+
+        Args:
+            index (int): The index value.
+
+        Returns:
+            str: The formatted label.
+        """
+        return self.get_labels([index])[0]
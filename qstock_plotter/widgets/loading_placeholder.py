@@ -0,0 +1,60 @@
+from qfluentwidgets import IndeterminateProgressRing, CaptionLabel
+from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtCore import Qt
+
+class LoadingPlaceholder(QWidget):
+    """
+    A placeholder shown over a plot widget while its data is loaded in the background.
+
+    Methods:
+        set_progress(value, message): Shows the loading progress.
+        set_error(message): Shows an error message instead of the progress.
+        cover(widget): Moves the placeholder over a widget and shows it.
+    """
+
+    def __init__(self, parent: QWidget = None):
+        super().__init__(parent)
+        self.ring = IndeterminateProgressRing(self)
+        self.ring.setFixedSize(36, 36)
+        self.label = CaptionLabel("Loading...", self)
+        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.main_layout = QVBoxLayout(self)
+        self.main_layout.setSpacing(8)
+        self.main_layout.addStretch(1)
+        self.main_layout.addWidget(self.ring, 0, Qt.AlignmentFlag.AlignHCenter)
+        self.main_layout.addWidget(self.label, 0, Qt.AlignmentFlag.AlignHCenter)
+        self.main_layout.addStretch(1)
+        self.setLayout(self.main_layout)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+    def set_progress(self, value: int, message: str = ""):
+        """
+        Shows the loading progress.
+
+        Args:
+            value (int): The progress in percent.
+            message (str, optional): A message describing the current step. Defaults to "".
+        """
+        self.ring.show()
+        self.label.setText("{} ({}%)".format(message if message != "" else "Loading", value))
+
+    def set_error(self, message: str):
+        """
+        Shows an error message instead of the progress.
+
+        Args:
+            message (str): The error message.
+        """
+        self.ring.hide()
+        self.label.setText(message)
+
+    def cover(self, widget: QWidget):
+        """
+        Moves the placeholder over a widget and shows it.
+
+        Args:
+            widget (QWidget): The widget to cover. It must be a sibling or the parent of the placeholder.
+        """
+        self.setGeometry(widget.geometry() if widget is not self.parent() else widget.rect())
+        self.raise_()
+        self.show()
@@ -1,14 +1,19 @@
 from pyqtgraph import PlotWidget,SignalProxy,AxisItem
 from PyQt6.QtCore import Qt,pyqtSignal,QRectF
 from math import ceil,log10
+import numpy as np
 from qfluentwidgets import qconfig,Theme,isDarkTheme,MenuAnimationType,FluentIcon,Action,RoundMenu,MenuIndicatorType,CheckableMenu,PillPushButton
 from pyqtgraph import PlotCurveItem
 from typing import Union
 from ..libs.style import LIGHT_BACKGROUND_COLOR,DARK_BACKGROUND_COLOR
 from ..libs.constant import ZOOM_MODEL, YLOC_MODEL, SCALE_LOC_MODEL
 from ..libs.helpers import limit_in_range,GeneralDataClass
+from ..libs.tick_labels import TickLabelProvider
+from ..libs.bounds import BoundsMultiset
 from .value_select_box import select_value
+from .x_view_model import XViewModel
 from typing import Optional
+from contextlib import contextmanager
 
 class CustomizedAxis(AxisItem):
    
@@ -18,7 +23,7 @@ class CustomizedAxis(AxisItem):
 
         Args:
             orientation (str): The orientation of the axis. Can be 'left', 'right', 'top', or 'bottom'.
-            plot_strs (dict): A dictionary mapping index values to plot strings.
+            plot_strs (TickLabelProvider): A provider mapping index values to plot strings.
             pen (QPen): The pen used to draw the axis line.
             textPen (QPen): The pen used to draw the axis labels.
             tickPen (QPen): The pen used to draw the axis ticks.
@@ -32,21 +37,35 @@ class CustomizedAxis(AxisItem):
             **args: Additional keyword arguments.
         """
         super().__init__(orientation, pen, textPen, tickPen, linkView, parent, maxTickLength, showValues, text, units, unitPrefix, **args)
-        self.plot_strs=plot_strs
-        self.min_index=0
-        self.max_index=0
+        self.plot_strs=None
+        if plot_strs is not None:
+            self.set_tick_strings(plot_strs)
+
+    @property
+    def min_index(self):
+        """
+        The first index value with a plot string. It follows the provider, e.g., when bars are appended.
+        """
+        return 0 if self.plot_strs is None else self.plot_strs.min_index
+
+    @property
+    def max_index(self):
+        """
+        The last index value with a plot string. It follows the provider, e.g., when bars are appended.
+        """
+        return 0 if self.plot_strs is None else self.plot_strs.max_index
 
     def set_tick_strings(self,plot_strs):
         """
         Set the plot strings for the axis.
 
         Args:
-            plot_strs (dict): A dictionary mapping index values to plot strings.
+            plot_strs (Union[TickLabelProvider,dict]): A provider or a dictionary mapping index values to plot strings.
+                Dictionaries are wrapped into a TickLabelProvider.
         """
+        if isinstance(plot_strs, dict):
+            plot_strs=TickLabelProvider.from_dict(plot_strs)
         self.plot_strs=plot_strs
-        indexs=list(plot_strs.keys())
-        self.min_index=indexs[0]
-        self.max_index=indexs[-1]
 
     def tick_str(self,value):
         """
@@ -95,7 +114,10 @@ class CustomizedAxis(AxisItem):
                     vstr = ("%%0.%df" % places) % vs
                 strings.append(vstr)
         else:
-            strings = [self.plot_strs[int(v)] if (v>=self.min_index and v<=self.max_index) else " " for v in values ]
+            # only the labels of the drawn ticks are formatted, in one batch
+            indexes = [int(v) for v in values if (v>=self.min_index and v<=self.max_index)]
+            labels = iter(self.plot_strs.get_labels(indexes))
+            strings = [next(labels) if (v>=self.min_index and v<=self.max_index) else " " for v in values ]
         return strings
 
 # NOTE: the y of viewRect is reversed, i.e. the top is the max value and the bottom is the min value
@@ -112,6 +134,8 @@ class QPlotWidget(PlotWidget):
     sigViewChangedNotByDrag = pyqtSignal()
     sigItemAdded = pyqtSignal()
     sigItemRemoved = pyqtSignal()
+    # the z-value of the overlay items, above the plotted items
+    overlay_z_value = 1e6
     
     def __init__(self, parent=None, background='default', plotItem=None, **kargs):
         super().__init__(parent, background, plotItem, **kargs)
@@ -139,6 +163,14 @@ class QPlotWidget(PlotWidget):
     
     def __init_variables(self):
         self.plotted_items=[]
+        # transient items drawn above the plotted items, see add_overlay_item
+        self.overlay_items=[]
+        # the cached bounding rectangles of the plotted items
+        self.__item_bounds=BoundsMultiset()
+        # the slots updating the cached bounds of the items reporting their bounds changes
+        self.__bounds_slots={}
+        # the state of the running batch_update, None outside of it
+        self.__batch=None
         self.x_start=None
         self.x_end=None
         self.y_end=None
@@ -151,6 +183,11 @@ class QPlotWidget(PlotWidget):
         self.zoom_model=ZOOM_MODEL.AUTO_RANGE
         self.y_loc_model=YLOC_MODEL.DATA_CENTERED
         self.move_from_code=False
+        # the view rectangle set by the last move from code
+        self.__code_view_rect=None
+        # the x-view scheduling the plot updates, shared with the linked plot widgets
+        self.x_view_model=None
+        XViewModel(self).add_pane(self)
     
     def __init__config_variables(self):
         self.y_autorange_bounding_factor=0.05
@@ -219,13 +256,21 @@ class QPlotWidget(PlotWidget):
 
     def __on_range_changed(self):
         self.sigViewChanged.emit()
-        if not self.move_from_code:
+        # the rate limit of the signal proxy may merge a drag into the range change of a move from code, the view
+        # then differs from the one set by the code
+        if not self.move_from_code or self.viewRect() != self.__code_view_rect:
+            self.move_from_code=False
             self.update_plot()
             self.sigViewChangedByDrag.emit()
         else:
             self.move_from_code=False
             self.sigViewChangedNotByDrag.emit()
 
+    def __set_range_from_code(self, view_rect):
+        self.move_from_code = True
+        self.setRange(view_rect, padding=0)
+        self.__code_view_rect = self.viewRect()
+
     def __on_theme_changed(self,theme=None):
         """
         Callback method triggered when the theme is changed.
@@ -247,13 +292,25 @@ class QPlotWidget(PlotWidget):
                 self.setBackground(LIGHT_BACKGROUND_COLOR)
 
     def __plot_bounding(self):
-        x_starts=[]; x_ends=[]; y_ends=[]; y_starts=[]
+        bounds = self.__item_bounds.get_bounds()
+        if bounds is None:
+            # no item has finite bounds, keep the current ones
+            return self.x_start, self.x_end, self.y_start, self.y_end
+        return bounds
+
+    def __cache_item_bounds(self, item):
+        rect = item.boundingRect()
+        self.__item_bounds.add(item, rect.left(), rect.right(), rect.top(), rect.bottom())
+
+    def __cache_untracked_bounds(self):
+        # items without sigBoundsChanged, e.g., curves, do not report their changes, so their bounds are read again
         for item in self.plotted_items:
-            x_starts.append(item.boundingRect().left())
-            x_ends.append(item.boundingRect().right())
-            y_ends.append(item.boundingRect().bottom())
-            y_starts.append(item.boundingRect().top())
-        return min(x_starts), max(x_ends), min(y_starts), max(y_ends)
+            if item not in self.__bounds_slots:
+                self.__cache_item_bounds(item)
+
+    def __on_item_bounds_changed(self, item):
+        self.__cache_item_bounds(item)
+        self.refresh_bounding()
 
     def __show_loc(self,event):
         if not hasattr(self, 'loc_xlabel'):
@@ -381,7 +438,7 @@ class QPlotWidget(PlotWidget):
 
         Parameters:
         plot_item (PlotItem): The plot item to be added.
-        x_ticks (list, optional): The tick labels for the x-axis. Defaults to None.
+        x_ticks (TickLabelProvider, optional): The tick labels for the x-axis. Defaults to None.
         y_ticks (list, optional): The tick labels for the y-axis. Defaults to None.
 
         Returns:
@@ -389,12 +446,117 @@ class QPlotWidget(PlotWidget):
         """
         self.plotted_items.append(plot_item)
         self.addItem(plot_item)
-        self.refresh_bounding(x_ticks, y_ticks)
+        self.__cache_item_bounds(plot_item)
+        if hasattr(plot_item, 'sigBoundsChanged'):
+            # items with live data, e.g., appended bars, report their new bounds
+            slot = lambda: self.__on_item_bounds_changed(plot_item)
+            plot_item.sigBoundsChanged.connect(slot)
+            self.__bounds_slots[plot_item] = slot
+        if self.__batch is not None:
+            self.__batch.added = True
+            self.__batch.x_ticks = x_ticks if x_ticks is not None else self.__batch.x_ticks
+            self.__batch.y_ticks = y_ticks if y_ticks is not None else self.__batch.y_ticks
+            return None
+        self.__update_bounding(len(self.plotted_items) > 1, x_ticks, y_ticks)
         self.sigItemAdded.emit()
         return None
-    
+
+    @contextmanager
+    def batch_update(self):
+        """
+        Returns a context manager collecting the changes of the items, e.g., several calls of add_item, remove_item
+        and set_item_visible, and applying them at its end with a single bounding calculation and plot update.
+
+        Example:
+            with plot_widget.batch_update():
+                for item in items:
+                    plot_widget.add_item(item)
+
+        Yields:
+            None
+        """
+        if self.__batch is not None:
+            # nested batches are merged into the outer one
+            yield
+            return
+        self.__batch = GeneralDataClass(num_items_before=len(self.plotted_items), added=False, removed=False,
+                                        bounds_changed=False, view_changed=False, x_ticks=None, y_ticks=None)
+        try:
+            yield
+        finally:
+            batch, self.__batch = self.__batch, None
+            if batch.added or batch.removed or batch.bounds_changed or batch.x_ticks is not None or batch.y_ticks is not None:
+                if len(self.plotted_items) == 0:
+                    self.__reset_bounding()
+                    self.update_plot()
+                else:
+                    if batch.bounds_changed:
+                        self.__cache_untracked_bounds()
+                    # removed items may have defined the bounds, so they are only merged with the previous ones
+                    # if items were only added to a non-empty plot
+                    merge = not batch.removed and batch.num_items_before > 0
+                    self.__update_bounding(merge, batch.x_ticks, batch.y_ticks)
+            elif batch.view_changed:
+                self.update_plot()
+            if batch.added:
+                self.sigItemAdded.emit()
+            if batch.removed:
+                self.sigItemRemoved.emit()
+
+    def set_item_visible(self, plot_item, visible: bool):
+        """
+        Shows or hides a plotted item. A hidden item is neither painted nor included in the local range of the auto
+        range, but it stays plotted, so the bounds of the plot and the scrollers are not recalculated.
+
+        Args:
+            plot_item: The plotted item.
+            visible (bool): Whether the item is shown.
+        """
+        if plot_item.isVisible() == visible:
+            return
+        plot_item.setVisible(visible)
+        if self.__batch is not None:
+            self.__batch.view_changed = True
+        else:
+            self.update_plot()
+
+    def is_item_visible(self, plot_item) -> bool:
+        """
+        Returns whether a plotted item is shown, see set_item_visible.
+
+        Args:
+            plot_item: The plotted item.
+
+        Returns:
+            bool: Whether the item is shown.
+        """
+        return plot_item.isVisible()
+
     def refresh_bounding(self,x_ticks=None,y_ticks=None):
-        if len(self.plotted_items) == 1:
+        """
+        Updates the bounds of the plot after the bounds of plotted items changed, merged with the previous bounds.
+
+        Items with a sigBoundsChanged signal keep their cached bounds up to date themselves, the bounds of the other
+        items are read again.
+
+        Args:
+            x_ticks (TickLabelProvider, optional): The new tick labels for the x-axis. Defaults to None.
+            y_ticks (list, optional): The new tick labels for the y-axis. Defaults to None.
+        """
+        if self.__batch is not None:
+            self.__batch.bounds_changed = True
+            self.__batch.x_ticks = x_ticks if x_ticks is not None else self.__batch.x_ticks
+            self.__batch.y_ticks = y_ticks if y_ticks is not None else self.__batch.y_ticks
+            return
+        self.__cache_untracked_bounds()
+        self.__update_bounding(len(self.plotted_items) > 1, x_ticks, y_ticks)
+
+    def __update_bounding(self, merge, x_ticks=None, y_ticks=None):
+        """
+        Takes the bounds of the plotted items from their cached bounds, merged with the previous bounds if `merge` is
+        True, and updates the limits, the ticks and the plot.
+        """
+        if not merge:
             self.x_start, self.x_end, self.y_start, self.y_end = self.__plot_bounding()
         else:
             x_start, x_end, y_start, y_end = self.__plot_bounding()
@@ -424,7 +586,14 @@ class QPlotWidget(PlotWidget):
 
         """
         self.plotted_items.remove(plot_item)
+        self.__item_bounds.remove(plot_item)
+        slot = self.__bounds_slots.pop(plot_item, None)
+        if slot is not None:
+            plot_item.sigBoundsChanged.disconnect(slot)
         return_value = self.removeItem(plot_item)
+        if self.__batch is not None:
+            self.__batch.removed = True
+            return return_value
         if len(self.plotted_items)>0:
             self.x_start, self.x_end, self.y_start,self.y_end=self.__plot_bounding()
             self.__on_plot_bounding_updated()
@@ -435,6 +604,36 @@ class QPlotWidget(PlotWidget):
         self.sigItemRemoved.emit()
         return return_value
    
+    def add_overlay_item(self, item):
+        """
+        Adds a transient item, e.g., a rubber-band line, a crosshair or a hover marker, to the overlay of the plot.
+
+        Overlay items are drawn above the plotted items but are not plotted items: they are ignored by the bounds, the
+        auto range and the scrollers, and adding, changing or removing them neither recalculates the bounds nor
+        updates the plot. An overlay item should be updated in place, e.g., with setData or setPos, and hidden with
+        setVisible instead of being removed and added again, so every change only repaints the item.
+
+        Args:
+            item: The overlay item.
+        """
+        if item in self.overlay_items:
+            return
+        self.overlay_items.append(item)
+        item.setZValue(self.overlay_z_value)
+        self.addItem(item, ignoreBounds=True)
+
+    def remove_overlay_item(self, item):
+        """
+        Removes a transient item from the overlay of the plot, see add_overlay_item.
+
+        Args:
+            item: The overlay item.
+        """
+        if item not in self.overlay_items:
+            return
+        self.overlay_items.remove(item)
+        self.removeItem(item)
+
     def get_local_range(self, start, end):
         """
         Get the local plot range within the specified start and end values.
@@ -447,22 +646,27 @@ class QPlotWidget(PlotWidget):
             tuple: A tuple containing the minimum and maximum values of the local plot range.
                    If no valid local range is found, the range of the view rectangle is returned.
         """
-        mins, maxs = [], []
-        for item in self.plotted_items:
-            if hasattr(item, 'get_local_plot_range'):
-                local_range = item.get_local_plot_range(start, end)
-                if local_range is not None:
-                    mins.append(local_range[0])
-                    maxs.append(local_range[1])
-        if len(mins) > 0:
-            return min(mins), max(maxs)
-        else:
-            return self.viewRect().top(), self.viewRect().bottom()
+        # every shown item answers from its own range index, the answers are reduced at once
+        local_ranges = [item.get_local_plot_range(start, end) for item in self.plotted_items
+                        if item.isVisible() and hasattr(item, 'get_local_plot_range')]
+        local_ranges = np.array([local_range for local_range in local_ranges if local_range is not None],
+                                dtype=np.float64).reshape(-1, 2)
+        # NaN answers, i.e., items without data in the range, are ignored
+        min_value = np.fmin.reduce(local_ranges[:, 0], initial=np.nan)
+        max_value = np.fmax.reduce(local_ranges[:, 1], initial=np.nan)
+        if min_value <= max_value:
+            return min_value, max_value
+        return self.viewRect().top(), self.viewRect().bottom()
 
     def update_plot(self, x_loc:Optional[float]=None, x_range:Optional[float]=None):
         """
         Update the plot with new x-location and x-range values.
 
+        The update is scheduled rather than performed immediately: all the updates requested until the next frame are
+        merged into a single calculation of the local range and a single setRange, at most `max_update_fps` times per
+        second. The plot widgets linked by a shared x-view model are updated together. Use flush_update to perform a
+        scheduled update immediately.
+
         Parameters:
         - x_loc Optional[float]: The x-location of the plot. If None, the leftmost x-coordinate of the view rectangle is used.
         - x_range Optional[float]: The x-range of the plot. If None, the width of the view rectangle is used.
@@ -470,20 +674,61 @@ class QPlotWidget(PlotWidget):
         Returns:
         None
         """
+        self.x_view_model.request_update(self, x_loc, x_range)
+
+    def flush_update(self):
+        """
+        Performs the plot update scheduled by update_plot immediately. Nothing happens if no update is scheduled.
+        """
+        self.x_view_model.flush()
+
+    @property
+    def max_update_fps(self):
+        """
+        The maximum number of plot updates per second of the x-view model, None for no limit.
+        """
+        return self.x_view_model.max_fps
+
+    @max_update_fps.setter
+    def max_update_fps(self, max_fps):
+        self.x_view_model.max_fps = max_fps
+
+    @property
+    def update_counters(self):
+        """
+        The numbers of requested plot updates, performed plot updates and requests merged into a scheduled update of
+        the x-view model.
+        """
+        return self.x_view_model.counters
+
+    def _get_x_view(self, x_loc, x_range, view_left=None, view_width=None):
+        """
+        Returns the x-location and the x-range of an update, with the missing values taken from the view, limited to
+        the bounds of the plot.
+        """
+        view_left = self.viewRect().left() if view_left is None else view_left
+        view_width = self.viewRect().width() if view_width is None else view_width
         if x_loc is None and x_range is not None:
             if self.zoom_loc_model == SCALE_LOC_MODEL.CENTRAL:
-                x_loc = (self.viewRect().left() + self.viewRect().right()) / 2 - x_range / 2
+                x_loc = view_left + view_width / 2 - x_range / 2
             elif self.zoom_loc_model == SCALE_LOC_MODEL.LEFT:
-                x_loc = self.viewRect().left()
+                x_loc = view_left
             elif self.zoom_loc_model == SCALE_LOC_MODEL.RIGHT:
-                x_loc = self.viewRect().right() - x_range
+                x_loc = view_left + view_width - x_range
         else:
             if x_loc is None:
-                x_loc = self.viewRect().left()
+                x_loc = view_left
             if x_range is None:
-                x_range = self.viewRect().width()
+                x_range = view_width
         x_range = limit_in_range(x_range, self.x_range_min, self.x_range_max)
         x_loc = limit_in_range(x_loc, self.x_start, self.x_end - x_range)
+        return x_loc, x_range
+
+    def _set_x_view(self, x_loc, x_range):
+        """
+        Sets the x-view, limited to the bounds of the plot, and the y-range following the zoom model immediately.
+        """
+        x_loc, x_range = self._get_x_view(x_loc, x_range)
         x_right = x_loc + x_range
         view_rect = self.viewRect()
         y_loc = view_rect.top()
@@ -516,8 +761,7 @@ class QPlotWidget(PlotWidget):
         # make sure the yzoom is in the range
         y_loc = limit_in_range(y_loc, self.y_start, self.y_end - y_range)
         y_range = limit_in_range(y_range, self.y_range_min, self.y_range_max)
-        self.move_from_code = True
-        self.setRange(QRectF(x_loc, y_loc, x_range, y_range), padding=0)
+        self.__set_range_from_code(QRectF(x_loc, y_loc, x_range, y_range))
 
     def move_y_loc(self, y_loc):
         """
@@ -537,9 +781,9 @@ class QPlotWidget(PlotWidget):
             raise Exception("you can only move y in y_loc free model")
         if self.zoom_model == ZOOM_MODEL.AUTO_RANGE:
             raise Exception("you can not move y in auto_range model")
+        self.flush_update()
         y_loc = limit_in_range(y_loc, self.y_start, self.y_end - self.viewRect().height())
-        self.move_from_code = True
-        self.setRange(QRectF(self.viewRect().left(), y_loc, self.viewRect().width(), self.viewRect().height()), padding=0)
+        self.__set_range_from_code(QRectF(self.viewRect().left(), y_loc, self.viewRect().width(), self.viewRect().height()))
 
     def set_zoom_model(self, zoom_model):
         """
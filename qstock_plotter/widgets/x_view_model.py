@@ -0,0 +1,129 @@
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+from math import ceil
+from typing import Optional
+from ..libs.helpers import GeneralDataClass
+import time
+
+class XViewModel(QObject):
+    """
+    The x-view shared by one or more plot widgets, i.e., panes, which schedules their plot updates.
+
+    Every update requested by a pane, e.g., by dragging it, by its scrollers or by its zoom bar, is recorded instead
+    of being performed immediately. All the requests until the next frame are merged, and the frame computes the
+    x-location and the x-range once and applies them to all the panes in a single pass, each pane only calculating
+    its own y-range. The panes are moved from code, so their range changes are not requested again and the panes do
+    not update each other back and forth.
+
+    Every QPlotWidget has its own model by default; panes are linked by adding them to the same model.
+
+    Attributes:
+        panes (list): The linked plot widgets.
+        max_fps (int): The maximum number of updates per second, None for no limit. Defaults to 60.
+        counters (GeneralDataClass): The numbers of requested updates ("requests"), performed updates ("updates") and
+            requests merged into a scheduled update ("merged").
+
+    Signals:
+        sigXViewChanged(float, float): Emitted with the x-location and the x-range after the panes were updated.
+
+    Methods:
+        add_pane(plot_widget): Links a plot widget to the model.
+        remove_pane(plot_widget): Unlinks a plot widget, giving it its own model.
+        request_update(plot_widget, x_loc, x_range): Schedules an update of the panes.
+        flush(): Performs the scheduled update immediately.
+    """
+
+    sigXViewChanged = pyqtSignal(float, float)
+
+    def __init__(self, parent: Optional[QObject] = None, max_fps: Optional[int] = 60) -> None:
+        """
+        Initializes the XViewModel object.
+
+        Args:
+            parent (QObject, optional): The parent object. Defaults to None.
+            max_fps (int, optional): The maximum number of updates per second, None for no limit. Defaults to 60.
+        """
+        super().__init__(parent)
+        self.panes = []
+        self.max_fps = max_fps
+        self.counters = GeneralDataClass(requests=0, updates=0, merged=0)
+        # the requesting pane, x-location and x-range of the scheduled update, None if no update is scheduled
+        self.__pending = None
+        self.__last_update_time = None
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.__timer.timeout.connect(self.flush)
+
+    def add_pane(self, plot_widget):
+        """
+        Links a plot widget to the model, unlinking it from its previous model.
+
+        Args:
+            plot_widget (QPlotWidget): The plot widget.
+        """
+        if plot_widget in self.panes:
+            return
+        previous_model = plot_widget.x_view_model
+        if previous_model is not None:
+            previous_model.flush()
+            if plot_widget in previous_model.panes:
+                previous_model.panes.remove(plot_widget)
+        self.panes.append(plot_widget)
+        plot_widget.x_view_model = self
+
+    def remove_pane(self, plot_widget):
+        """
+        Unlinks a plot widget from the model and gives it its own model. Nothing happens if it is not linked.
+
+        Args:
+            plot_widget (QPlotWidget): The plot widget.
+        """
+        if plot_widget not in self.panes:
+            return
+        XViewModel(plot_widget, self.max_fps).add_pane(plot_widget)
+
+    def request_update(self, plot_widget, x_loc: Optional[float] = None, x_range: Optional[float] = None):
+        """
+        Schedules an update of all the panes, merged with the updates requested until the next frame, see
+        QPlotWidget.update_plot.
+
+        Args:
+            plot_widget (QPlotWidget): The requesting pane, its view provides the missing values.
+            x_loc (float, optional): The x-location. Defaults to None, i.e., the x-location of the view.
+            x_range (float, optional): The x-range. Defaults to None, i.e., the x-range of the view.
+        """
+        self.counters.requests += 1
+        if self.__pending is None:
+            # the view is read when the update is performed, e.g., after the user dragged it further
+            self.__pending = (plot_widget, x_loc, x_range)
+        else:
+            self.counters.merged += 1
+            if x_loc is None or x_range is None:
+                # the missing values refer to the view as the scheduled update would leave it
+                x_loc, x_range = plot_widget._get_x_view(x_loc, x_range, *self.__resolve_pending())
+            self.__pending = (plot_widget, x_loc, x_range)
+        if not self.__timer.isActive():
+            delay = 0
+            if self.max_fps and self.__last_update_time is not None:
+                delay = self.__last_update_time + 1 / self.max_fps - time.perf_counter()
+            self.__timer.start(max(0, ceil(delay * 1000)))
+
+    def flush(self):
+        """
+        Performs the scheduled update immediately: the x-view is computed once and every pane sets its range. Nothing
+        happens if no update is scheduled.
+        """
+        self.__timer.stop()
+        if self.__pending is None:
+            return
+        x_loc, x_range = self.__resolve_pending()
+        self.__pending = None
+        self.__last_update_time = time.perf_counter()
+        self.counters.updates += 1
+        for pane in self.panes:
+            pane._set_x_view(x_loc, x_range)
+        self.sigXViewChanged.emit(x_loc, x_range)
+
+    def __resolve_pending(self):
+        plot_widget, x_loc, x_range = self.__pending
+        return plot_widget._get_x_view(x_loc, x_range)
@@ -0,0 +1,53 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from qstock_plotter.libs.async_loader import LoadTask, load_handler_async, load_timeframes
+from qstock_plotter.libs.data_handler import DataHandler, HDF5Handler, TradeData
+
+def wait_for(qapp, condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert condition()
+
+@pytest.fixture
+def hdf5_path(tmp_path):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 200))
+    handler = DataHandler()
+    handler.day_data = TradeData.from_data_frame(pd.DataFrame({
+        "open": close, "high": close + 1, "low": close - 1, "close": close,
+        "volume": rng.integers(0, 10**6, len(close)), "date": pd.date_range("2000-01-01", periods=len(close))}))
+    handler.save(str(tmp_path / "data.h5"))
+    return str(tmp_path / "data.h5")
+
+def test_handlers_are_loaded_in_the_background(qapp, hdf5_path):
+    handlers, progress, errors = [], [], []
+    load_handler_async(lambda: HDF5Handler(hdf5_path), on_finished=handlers.append,
+                       on_progress=lambda value, message: progress.append(value), on_error=errors.append)
+    wait_for(qapp, lambda: len(handlers) + len(errors) > 0)
+    assert errors == []
+    assert all(handlers[0].is_loaded(key) for key in handlers[0].timeframes)
+    assert progress[0] == 0 and progress[-1] == 100 and progress == sorted(progress)
+
+def test_loading_errors_keep_their_cause(qapp, tmp_path):
+    with pytest.raises(ValueError) as error:
+        load_timeframes(lambda value, message: None, lambda: HDF5Handler(str(tmp_path / "missing.h5")))
+    assert isinstance(error.value.__cause__, FileNotFoundError)
+    with pytest.raises(ValueError):
+        load_timeframes(lambda value, message: None, DataHandler)
+    errors = []
+    load_handler_async(lambda: HDF5Handler(str(tmp_path / "missing.h5")), on_error=errors.append)
+    wait_for(qapp, lambda: len(errors) > 0)
+    assert isinstance(errors[0], ValueError) and isinstance(errors[0].__cause__, FileNotFoundError)
+
+def test_cancelled_tasks_emit_nothing(qapp):
+    results = []
+    task = LoadTask(lambda progress: time.sleep(0.1) or "done")
+    task.signals.sigFinished.connect(results.append)
+    task.start().cancel()
+    time.sleep(0.3)
+    qapp.processEvents()
+    assert results == []
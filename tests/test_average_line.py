@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PyQt6.QtGui import QColor
+from qstock_plotter.compoents.average_line import AverageLineItem
+from qstock_plotter.libs.data_handler import DataHandler, TradeData, WindowedHDF5Handler
+
+def naive_average(values, n, average_type):
+    if average_type == "sma":
+        return np.array([np.mean(values[i:i+n]) for i in range(len(values)-n+1)])
+    if average_type == "wma":
+        weights = np.arange(1, n + 1)
+        return np.array([np.dot(values[i:i+n], weights) / weights.sum() for i in range(len(values)-n+1)])
+    alpha, averages = 2 / (n + 1), [np.mean(values[:n])]
+    for value in values[n:]:
+        averages.append(alpha * value + (1 - alpha) * averages[-1])
+    return np.array(averages)
+
+@pytest.fixture
+def windowed_closes(qapp, tmp_path):
+    rng = np.random.default_rng(0)
+    closes = 100 + np.cumsum(rng.normal(0, 1, 10000))
+    handler = DataHandler()
+    handler.day_data = TradeData.from_data_frame(pd.DataFrame({
+        "open": closes, "high": closes + 1, "low": closes - 1, "close": closes,
+        "volume": rng.integers(0, 10**6, len(closes)), "date": pd.date_range("2000-01-01", periods=len(closes))}))
+    WindowedHDF5Handler.save_handler(handler, str(tmp_path / "windowed.h5"))
+    with WindowedHDF5Handler(str(tmp_path / "windowed.h5"), chunk_size=512, max_chunks=8) as windowed:
+        yield closes, windowed.day_data.prices.store["close"]
+
+@pytest.mark.parametrize("average_type", ["sma", "wma", "ema"])
+def test_averages_of_a_windowed_column_are_calculated_by_block(windowed_closes, average_type, monkeypatch):
+    closes, column = windowed_closes
+    monkeypatch.setattr(AverageLineItem, "lazy_block_size", 1024)
+    line = AverageLineItem(column, 20, QColor("red"), 1, average_type)
+    expected = naive_average(closes, 20, average_type)
+    # only the blocks of the queried range are calculated, the others are not drawn
+    local_range = line.get_local_plot_range(5000, 5100)
+    np.testing.assert_allclose(local_range, (expected[4981:5082].min(), expected[4981:5082].max()), rtol=1e-10)
+    calculated = np.isfinite(line.yData)
+    assert 0 < calculated.sum() < len(expected)
+    np.testing.assert_allclose(line.yData[calculated], expected[calculated], rtol=1e-10)
+    line.get_local_plot_range(0, len(closes))
+    np.testing.assert_allclose(line.yData, expected, rtol=1e-10)
+
+@pytest.mark.parametrize("average_type", ["sma", "wma", "ema"])
+def test_updated_averages_match_a_fresh_calculation(qapp, average_type):
+    rng = np.random.default_rng(1)
+    values = 100 + np.cumsum(rng.normal(0, 1, 600))
+    line = AverageLineItem(values[:100], 10, QColor("red"), 1, average_type)
+    length = 100
+    while length < 600:
+        if rng.random() < 0.3:
+            values[length-1] += rng.normal(0, 1)
+            start = length - 1
+        else:
+            start, length = length, min(length + int(rng.integers(1, 30)), 600)
+        buffer = line._AverageLineItem__ys
+        line.set_average_data(values[:length].copy(), start)
+        if len(buffer) >= length - 9:
+            # the averages are written into the buffer in place
+            assert line._AverageLineItem__ys is buffer
+        np.testing.assert_allclose(line.yData, naive_average(values[:length], 10, average_type), rtol=1e-10)
+        np.testing.assert_array_equal(line.xData, np.arange(9, length))
+        np.testing.assert_allclose(line.get_local_plot_range(length - 5, length + 5),
+                                   (line.yData[-5:].min(), line.yData[-5:].max()), rtol=1e-12)
@@ -0,0 +1,44 @@
+import math
+import numpy as np
+from qstock_plotter.libs.bounds import BoundsMultiset
+
+def naive_bounds(rects):
+    bounds = []
+    for edge, reduce in enumerate([min, max, min, max]):
+        values = [rect[edge] for rect in rects.values() if math.isfinite(rect[edge])]
+        if len(values) == 0:
+            return None
+        bounds.append(reduce(values))
+    return tuple(bounds)
+
+def test_bounds_match_a_rescan_of_the_items():
+    rng = np.random.default_rng(0)
+    bounds = BoundsMultiset()
+    rects = {}
+    assert bounds.get_bounds() is None
+    for _ in range(2000):
+        key = int(rng.integers(0, 12))
+        if rng.random() < 0.3:
+            bounds.remove(key)
+            rects.pop(key, None)
+        else:
+            # few distinct values, so equal edges of several items are removed one at a time
+            rect = tuple(float(value) for value in rng.integers(-5, 5, 4))
+            if rng.random() < 0.1:
+                rect = (rect[0], math.nan, rect[2], math.inf)
+            bounds.add(key, *rect)
+            rects[key] = rect
+        assert len(bounds) == len(rects)
+        assert all(key in bounds for key in rects)
+        assert bounds.get_bounds() == naive_bounds(rects)
+
+def test_items_without_finite_edges_are_ignored():
+    bounds = BoundsMultiset()
+    bounds.add("empty", math.nan, math.nan, math.nan, math.nan)
+    assert bounds.get_bounds() is None
+    bounds.add("bars", 0, 10, 1, 5)
+    assert bounds.get_bounds() == (0, 10, 1, 5)
+    bounds.add("bars", 0, 10, 1, 5)
+    bounds.remove("bars")
+    bounds.remove("bars")
+    assert bounds.get_bounds() is None
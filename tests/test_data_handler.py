@@ -0,0 +1,363 @@
+import gc
+import os
+import warnings
+import weakref
+import numpy as np
+import pandas as pd
+import pytest
+from qstock_plotter.libs.data_handler import (ColumnStore, DataHandler, HDF5Handler, NPYHandler, PricesDataFrame,
+                                              TradeData, VolumeDataFrame, WindowedHDF5Handler, compact_array)
+
+def random_bars(rng, length, start="2020-01-01"):
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    return {
+        "open": close + rng.normal(0, 1, length),
+        "high": close + rng.uniform(0, 2, length),
+        "low": close - rng.uniform(0, 2, length),
+        "close": close,
+        "volume": rng.integers(0, 10**6, length).astype(np.int64),
+        "date": pd.date_range(start, periods=length, freq="D").to_numpy(),
+    }
+
+def naive_range(low, high, start, end):
+    low, high = low[max(start, 0):end], high[max(start, 0):end]
+    if len(low) == 0:
+        return np.nan, np.nan
+    return np.nanmin(low), np.nanmax(high)
+
+class TestColumnStore:
+
+    def test_appended_rows_match_the_concatenated_columns(self):
+        rng = np.random.default_rng(0)
+        bars = random_bars(rng, 500)
+        store = ColumnStore({key: values[:10] for key, values in bars.items()})
+        range_index = store.get_range_index("low", "high")
+        changes = []
+        store.add_listener(changes.append)
+        length = 10
+        while length < 500:
+            end = min(length + int(rng.integers(1, 40)), 500)
+            version = store.version
+            store.append_rows({key: values[length:end] for key, values in bars.items()})
+            assert changes[-1] == length and store.version == version + 1
+            length = end
+            assert len(store) == length
+            np.testing.assert_array_equal(store.index, np.arange(length))
+            for key, values in bars.items():
+                np.testing.assert_array_equal(store[key], values[:length])
+                assert not store[key].flags.writeable
+            # the shared range index follows the appended rows
+            assert store.get_range_index("low", "high") is range_index
+            for _ in range(10):
+                start, end = sorted(rng.integers(0, length + 1, 2))
+                np.testing.assert_array_equal(range_index.query(start, end),
+                                              naive_range(bars["low"], bars["high"], start, end))
+
+    def test_single_rows_continue_the_index(self):
+        store = ColumnStore({"close": np.array([1.0, 2.0])}, index=np.array([7, 8]))
+        store.append_rows({"close": 3.0})
+        np.testing.assert_array_equal(store.index, [7, 8, 9])
+        np.testing.assert_array_equal(store["close"], [1.0, 2.0, 3.0])
+
+    def test_update_last_row_only_changes_the_given_columns(self):
+        rng = np.random.default_rng(1)
+        bars = random_bars(rng, 100)
+        store = ColumnStore(bars)
+        range_index = store.get_range_index("low", "high")
+        changes = []
+        store.add_listener(changes.append)
+        store.update_last_row({"high": 1000.0, "low": -5.0, "volume": 7})
+        assert changes == [99]
+        bars["high"][-1], bars["low"][-1], bars["volume"][-1] = 1000.0, -5.0, 7
+        for key, values in bars.items():
+            np.testing.assert_array_equal(store[key], values)
+        assert range_index.query(0, 100) == (-5.0, 1000.0)
+        store.remove_listener(changes.append)
+        store.update_last_row({"close": 1.0})
+        assert changes == [99]
+
+    def test_invalid_rows_are_rejected(self):
+        store = ColumnStore({"open": np.zeros(0), "close": np.zeros(0)})
+        with pytest.raises(IndexError):
+            store.update_last_row({"close": 1.0})
+        with pytest.raises(KeyError):
+            store.append_rows({"close": [1.0]})
+        with pytest.raises(ValueError):
+            store.append_rows({"open": [1.0, 2.0], "close": [1.0]})
+        assert len(store) == 0
+
+    def test_compact_columns_are_widened_instead_of_wrapping_around(self):
+        store = ColumnStore({"volume": np.array([1, 2], dtype=np.int64)}).compact()
+        assert store["volume"].dtype == np.uint32
+        store.append_rows({"volume": 5})
+        assert store["volume"].dtype == np.uint32
+        store.append_rows({"volume": 2**40})
+        assert store["volume"].dtype == np.uint64
+        store.update_last_row({"volume": -1})
+        assert store["volume"].dtype == np.int64
+        np.testing.assert_array_equal(store["volume"], [1, 2, 5, -1])
+
+    def test_fractions_appended_to_integer_columns_are_kept(self):
+        store = ColumnStore({"volume": np.array([1, 2], dtype=np.int64)}).compact()
+        store.append_rows({"volume": [3.0, 4.5]})
+        assert store["volume"].dtype == np.float64
+        np.testing.assert_array_equal(store["volume"], [1, 2, 3, 4.5])
+        store.update_last_row({"volume": 0.25})
+        np.testing.assert_array_equal(store["volume"], [1, 2, 3, 0.25])
+
+    def test_listening_objects_can_be_collected(self):
+        store = ColumnStore(random_bars(np.random.default_rng(2), 10))
+        prices = PricesDataFrame(store)
+        changes = []
+        prices.add_listener(changes.append)
+        listening = PricesDataFrame(store)
+        reference = weakref.ref(listening)
+        del listening
+        gc.collect()
+        assert reference() is None
+        store.append_rows({key: values[-1:] for key, values in random_bars(np.random.default_rng(3), 1).items()})
+        assert changes == [10]
+        assert len(store._ColumnStore__listeners) == 1
+
+    def test_columns_are_coerced_once(self):
+        data_frame = pd.DataFrame({"close": ["1.5", "2", "x"], "volume": [1, 2, 3],
+                                   "date": ["2000-01-04", "2000-01-05", "2000-01-06"]})
+        store = ColumnStore.from_data_frame(data_frame)
+        np.testing.assert_array_equal(store["close"], [1.5, 2.0, np.nan])
+        assert store["volume"].dtype == np.int64
+        assert store["date"].dtype == np.dtype("datetime64[D]")
+        np.testing.assert_array_equal(store.index, [0, 1, 2])
+        assert not store["close"].flags.writeable
+
+    def test_bulk_accessors_match_the_rows(self):
+        rng = np.random.default_rng(0)
+        bars = random_bars(rng, 50)
+        prices = PricesDataFrame(pd.DataFrame(bars, index=np.arange(10, 60)))
+        np.testing.assert_array_equal(prices.get_x(5, 8), [15, 16, 17])
+        np.testing.assert_array_equal(prices.get_column("high", 5, 8), bars["high"][5:8])
+        opens, closes = prices.get_columns(["open", "close"])
+        np.testing.assert_array_equal(opens, bars["open"])
+        np.testing.assert_array_equal(closes, bars["close"])
+        assert prices[3] == (13, bars["open"][3], bars["close"][3], bars["high"][3], bars["low"][3])
+        assert (prices.get_min_x(), prices.get_max_x(), len(prices)) == (10, 59, 50)
+
+    def test_a_gapped_index_is_reset_to_the_row_positions(self):
+        rng = np.random.default_rng(1)
+        bars = random_bars(rng, 60, start="2000-01-03")
+        bars["close"][::4] = np.nan
+        data_frame = pd.DataFrame(bars).dropna()
+        prices = PricesDataFrame(data_frame)
+        np.testing.assert_array_equal(prices.get_x(), np.arange(len(data_frame)))
+        for position in [0, 25, len(data_frame) - 1]:
+            assert prices.get_x_ticks()[position] == str(data_frame["date"].iloc[position].date())
+        for start, end in [(0, 10), (7, 30), (20, 44)]:
+            expected = naive_range(data_frame["low"].to_numpy(), data_frame["high"].to_numpy(), start, end + 1)
+            np.testing.assert_array_equal(prices.get_local_range(start, end), expected)
+
+    def test_an_index_of_dates_is_reset_to_the_row_positions(self):
+        bars = random_bars(np.random.default_rng(2), 5)
+        store = ColumnStore.from_data_frame(pd.DataFrame(bars).set_index(pd.DatetimeIndex(bars["date"])))
+        np.testing.assert_array_equal(store.index, np.arange(5))
+
+    def test_a_gapped_index_is_rejected(self):
+        with pytest.raises(ValueError):
+            ColumnStore({"close": np.zeros(3)}, index=[0, 1, 3])
+        with pytest.raises(ValueError):
+            ColumnStore({"close": np.zeros(3)}, index=[2, 1, 0])
+        np.testing.assert_array_equal(ColumnStore({"close": np.zeros(3)}, index=[5, 6, 7]).index, [5, 6, 7])
+    def test_prices_and_volume_share_one_store(self):
+        bars = random_bars(np.random.default_rng(3), 20)
+        store = ColumnStore(bars)
+        prices, volume = PricesDataFrame(store), VolumeDataFrame(store)
+        assert prices.store is volume.store
+        assert np.shares_memory(prices.get_column("close"), volume.get_column("close"))
+        assert prices.get_x_ticks() is volume.get_x_ticks()
+        # bars appended through one pane are seen by the other
+        prices.append_bars({key: bars[key][-1] for key in bars})
+        assert len(volume) == 21 and volume.get_max_x() == 20
+        with pytest.raises(KeyError):
+            prices.append_bars({key: bars[key][-1] for key in bars if key != "volume"})
+
+class TestCompactArray:
+
+    def test_integers_use_the_smallest_integer_type(self):
+        assert compact_array(np.array([0.0, 3.0, 2.0**32 - 1])).dtype == np.uint32
+        assert compact_array(np.array([0, 2**32])).dtype == np.uint64
+        assert compact_array(np.array([-1.0, 2.0**31 - 1])).dtype == np.int32
+        assert compact_array(np.array([-1, 2**31])).dtype == np.int64
+        values = np.array([-5.0, 0.0, 12.0])
+        np.testing.assert_array_equal(compact_array(values), values)
+
+    def test_prices_use_float32_within_half_a_tick(self):
+        rng = np.random.default_rng(2)
+        prices = np.round(rng.uniform(1, 5000, 1000), 2)
+        prices[::100] = np.nan
+        compact = compact_array(prices, tick_size=0.01)
+        assert compact.dtype == np.float32
+        finite = np.isfinite(prices)
+        assert np.array_equal(np.isfinite(compact), finite)
+        assert np.max(np.abs(compact[finite].astype(np.float64) - prices[finite])) <= 0.005
+
+    def test_prices_losing_the_tick_size_are_kept_with_a_warning(self):
+        prices = np.array([1234567.89, 987654.32])
+        with pytest.warns(RuntimeWarning):
+            assert compact_array(prices, tick_size=0.01) is prices
+        assert compact_array(prices, tick_size=1).dtype == np.float32
+
+    def test_other_columns_are_kept(self):
+        dates = pd.date_range("2020-01-01", periods=3).to_numpy()
+        assert compact_array(dates) is dates
+        empty = np.zeros(0)
+        assert compact_array(empty) is empty
+        floats = np.array([0.5, 1.25], dtype=np.float32)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert compact_array(floats) is floats
+
+class TestLazyTradeData:
+
+    @pytest.fixture
+    def hdf5_path(self, tmp_path):
+        handler = DataHandler()
+        handler.day_data = TradeData.from_data_frame(pd.DataFrame(random_bars(np.random.default_rng(3), 120)))
+        handler.save(str(tmp_path / "data.h5"))
+        return str(tmp_path / "data.h5")
+
+    def test_timeframes_are_loaded_on_access_and_unloaded(self, hdf5_path):
+        handler = HDF5Handler(hdf5_path)
+        assert not any(handler.is_loaded(key) for key in handler.timeframes)
+        closes = handler.day_data.prices.get_column("close")
+        assert handler.is_loaded("day_data") and not handler.is_loaded("week_data")
+        assert handler.day_data is handler.day_data
+        assert len(handler.week_data.prices) == len(pd.read_hdf(hdf5_path, "day_data").resample("W", on="date").last())
+        assert handler.is_loaded("week_data")
+        handler.unload("week_data")
+        assert handler.is_loaded("day_data") and not handler.is_loaded("week_data")
+        handler.unload()
+        assert not any(handler.is_loaded(key) for key in handler.timeframes)
+        np.testing.assert_array_equal(handler.day_data.prices.get_column("close"), closes)
+
+    def test_a_failed_load_is_raised_and_retried(self, hdf5_path, tmp_path):
+        missing_path = str(tmp_path / "missing.h5")
+        handler = HDF5Handler(missing_path)
+        with pytest.raises(Exception):
+            handler.day_data
+        assert not handler.is_loaded("day_data")
+        os.replace(hdf5_path, missing_path)
+        assert len(handler.day_data.prices) == 120
+        assert handler.is_loaded("day_data")
+
+class TestNPYHandler:
+
+    @pytest.fixture
+    def handler(self):
+        handler = DataHandler()
+        handler.day_data = TradeData.from_data_frame(pd.DataFrame(random_bars(np.random.default_rng(3), 300)))
+        return handler
+
+    def assert_same_data(self, data, expected):
+        np.testing.assert_array_equal(data.prices.get_x(), expected.prices.get_x())
+        for key in ["open", "high", "low", "close", "date"]:
+            np.testing.assert_array_equal(data.prices.get_column(key), expected.prices.get_column(key))
+        np.testing.assert_array_equal(data.volume.get_column("volume"), expected.volume.get_column("volume"))
+
+    def test_saved_columns_are_loaded_memory_mapped(self, handler, tmp_path):
+        NPYHandler.save_handler(handler, str(tmp_path))
+        loaded = NPYHandler(str(tmp_path))
+        assert not loaded.is_loaded("day_data")
+        self.assert_same_data(loaded.day_data, handler.day_data)
+        assert isinstance(loaded.day_data.prices.get_column("close").base, np.memmap)
+        self.assert_same_data(loaded.week_data, handler.week_data)
+        self.assert_same_data(loaded.month_data, handler.month_data)
+
+    def test_compact_loading(self, handler, tmp_path):
+        NPYHandler.save_handler(handler, str(tmp_path))
+        loaded = NPYHandler(str(tmp_path), compact=True)
+        assert loaded.day_data.volume.get_column("volume").dtype == np.uint32
+        np.testing.assert_allclose(loaded.day_data.prices.get_column("close"),
+                                   handler.day_data.prices.get_column("close"), atol=0.005)
+
+    def test_loaded_data_follows_appended_bars(self, handler, tmp_path):
+        NPYHandler.save_handler(handler, str(tmp_path))
+        loaded = NPYHandler(str(tmp_path))
+        bars = random_bars(np.random.default_rng(4), 20, start="2020-10-27")
+        loaded.day_data.append_bars(bars)
+        handler.day_data.append_bars(bars)
+        self.assert_same_data(loaded.day_data, handler.day_data)
+        self.assert_same_data(loaded.week_data, handler.week_data)
+
+    def test_unknown_formats_are_rejected(self, handler, tmp_path):
+        NPYHandler.save_handler(handler, str(tmp_path))
+        manifest_path = tmp_path / "day_data" / NPYHandler.manifest_name
+        manifest_path.write_text(manifest_path.read_text().replace(NPYHandler.format_name, "other"))
+        with pytest.raises(ValueError):
+            NPYHandler(str(tmp_path)).day_data
+
+class TestWindowedHDF5Handler:
+
+    @pytest.fixture
+    def handler(self):
+        handler = DataHandler()
+        handler.day_data = TradeData.from_data_frame(pd.DataFrame(random_bars(np.random.default_rng(5), 1000)))
+        return handler
+
+    @pytest.fixture
+    def windowed(self, handler, tmp_path):
+        WindowedHDF5Handler.save_handler(handler, str(tmp_path / "windowed.h5"), block_size=16)
+        windowed_path = str(tmp_path / "windowed.h5")
+        with WindowedHDF5Handler(windowed_path, chunk_size=50, max_chunks=4, prefetch_margin=0) as windowed:
+            yield windowed
+
+    def count_selects(self, store):
+        selects = []
+        select = store.hdf_store.select
+        store.hdf_store.select = lambda *args, **kwargs: selects.append(kwargs.get("where")) or select(*args, **kwargs)
+        return selects
+
+    def test_rows_and_local_ranges_match_the_in_memory_data(self, handler, windowed):
+        expected, data = handler.day_data, windowed.day_data
+        np.testing.assert_array_equal(data.prices.get_x(), expected.prices.get_x())
+        for key in ["open", "high", "low", "close", "date"]:
+            np.testing.assert_array_equal(data.prices.get_column(key), expected.prices.get_column(key))
+            np.testing.assert_array_equal(data.prices.get_column(key, 120, 180),
+                                          expected.prices.get_column(key, 120, 180))
+        rng = np.random.default_rng(6)
+        for _ in range(50):
+            start, end = sorted(rng.integers(-10, 1010, 2))
+            np.testing.assert_array_equal(data.prices.get_local_range(start, end),
+                                          expected.prices.get_local_range(start, end))
+
+    def test_chunks_are_evicted_least_recently_used(self, windowed):
+        store = windowed.day_data.prices.store
+        store._WindowedColumnStore__chunks.clear()
+        selects = self.count_selects(store)
+        closes = store["close"]
+        for position in [0, 60, 110, 160]:
+            closes[position]
+        assert len(selects) == 4
+        closes[10]
+        assert len(selects) == 4
+        # the chunk of row 210 evicts the least recently used chunk, i.e., the one of row 60
+        closes[210]
+        closes[0], closes[110], closes[160]
+        assert len(selects) == 5
+        closes[60]
+        assert len(selects) == 6
+        assert len(store._WindowedColumnStore__chunks) == store.max_chunks
+
+    def test_large_ranges_are_read_without_evicting_the_chunks(self, windowed):
+        store = windowed.day_data.prices.store
+        closes = store["close"]
+        closes[0], closes[60]
+        cached = list(store._WindowedColumnStore__chunks.keys())
+        selects = self.count_selects(store)
+        assert len(closes[200:800]) == 600
+        assert list(store._WindowedColumnStore__chunks.keys()) == cached
+        assert len(selects) == 1
+
+    def test_the_store_is_read_only(self, windowed):
+        bars = random_bars(np.random.default_rng(7), 1, start="2030-01-01")
+        with pytest.raises(TypeError):
+            windowed.day_data.append_bars(bars)
+        with pytest.raises(TypeError):
+            windowed.day_data.prices.store.update_last_row({"close": 1.0})
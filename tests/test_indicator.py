@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from qstock_plotter.compoents.indicator import INDICATORS, IndicatorCache
+from qstock_plotter.libs.data_handler import ColumnStore
+
+def random_bars(rng, length):
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    return {"open": close + rng.normal(0, 1, length), "high": close + rng.uniform(0, 2, length),
+            "low": close - rng.uniform(0, 2, length), "close": close,
+            "volume": rng.integers(1, 10**6, length).astype(np.int64)}
+
+PARAMS = [("bollinger", {}), ("macd", {}), ("rsi", {}), ("atr", {}), ("vwap", {}), ("vwap", {"window": 10})]
+
+def test_results_are_cached_until_the_store_changes():
+    store = ColumnStore(random_bars(np.random.default_rng(0), 300))
+    cache = IndicatorCache()
+    outputs = cache.get(store, "bollinger")
+    assert cache.get(store, "bollinger", {"window": 20}) is outputs
+    assert cache.get(store, "bollinger", {"window": 10}) is not outputs
+    assert not outputs["middle"].flags.writeable
+    store.update_last_row({"close": 50.0})
+    assert cache.get(store, "bollinger") is not outputs
+    with pytest.raises(KeyError):
+        cache.get(store, "unknown")
+
+def test_least_recently_used_results_are_evicted():
+    store = ColumnStore(random_bars(np.random.default_rng(1), 100))
+    cache = IndicatorCache(max_size=2)
+    first = cache.get(store, "rsi", {"window": 5})
+    second = cache.get(store, "rsi", {"window": 6})
+    assert cache.get(store, "rsi", {"window": 5}) is first
+    cache.get(store, "rsi", {"window": 7})
+    assert cache.get(store, "rsi", {"window": 5}) is first
+    assert cache.get(store, "rsi", {"window": 6}) is not second
+
+@pytest.mark.parametrize("name, params", PARAMS)
+def test_continued_results_match_a_fresh_computation(name, params):
+    rng = np.random.default_rng(2)
+    bars = random_bars(rng, 400)
+    store = ColumnStore({key: values[:200] for key, values in bars.items()})
+    cache = IndicatorCache()
+    held = []
+    outputs = cache.get(store, name, params)
+    length = 200
+    while length < 400:
+        held.append(({key: values.copy() for key, values in outputs.items()}, outputs))
+        if rng.random() < 0.5:
+            store.update_last_row({key: values[length] for key, values in random_bars(rng, length + 1).items()})
+            start = length - 1
+        else:
+            end = min(length + int(rng.integers(1, 20)), 400)
+            store.append_rows({key: values[length:end] for key, values in bars.items()})
+            start, length = length, end
+        outputs = cache.get(store, name, params, start)
+        expected = INDICATORS[name].function(**{key: store[key] for key in INDICATORS[name].inputs},
+                                             **{**INDICATORS[name].defaults, **params})
+        for key in INDICATORS[name].outputs:
+            np.testing.assert_allclose(outputs[key], expected[key], rtol=1e-9, atol=1e-9)
+    # the outputs handed out before are not changed by the continuation
+    for copies, outputs in held:
+        for key, values in outputs.items():
+            np.testing.assert_array_equal(values, copies[key])
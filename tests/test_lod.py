@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from qstock_plotter.libs.lod import LODPyramid, aggregate_buckets
+
+AGGREGATIONS = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+def random_bars(rng, length, x_start=0):
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    high = close + rng.uniform(0, 2, length)
+    high[rng.random(length) < 0.05] = np.nan
+    return np.arange(x_start, x_start + length), {
+        "open": close + rng.normal(0, 1, length),
+        "high": high,
+        "low": close - rng.uniform(0, 2, length),
+        "close": close,
+        "volume": rng.integers(0, 1000, length).astype(np.int64),
+    }
+
+def naive_buckets(x, columns, bucket_size, x_last=None):
+    x_last = x if x_last is None else x_last
+    reduce = {"first": lambda values: values[0], "last": lambda values: values[-1],
+              "max": np.fmax.reduce, "min": np.fmin.reduce, "sum": np.sum}
+    buckets = {key: [] for key in [*AGGREGATIONS, "x_first", "x_last"]}
+    for start in range(0, len(x), bucket_size):
+        end = min(start + bucket_size, len(x))
+        buckets["x_first"].append(x[start])
+        buckets["x_last"].append(x_last[end - 1])
+        for key, how in AGGREGATIONS.items():
+            buckets[key].append(reduce[how](columns[key][start:end]))
+    return buckets
+
+def assert_buckets_equal(buckets, expected):
+    assert set(buckets.keys()) == set(expected.keys())
+    for key, values in expected.items():
+        np.testing.assert_allclose(np.asarray(buckets[key], dtype=np.float64),
+                                   np.asarray(values, dtype=np.float64), rtol=1e-12, err_msg=key)
+
+def assert_pyramid_matches(pyramid, x, columns, x_last=None):
+    assert len(pyramid) == len(x)
+    # the highest level is a single bucket
+    assert len(pyramid.get_level(pyramid.max_level)["x_first"]) == 1
+    for level in range(pyramid.max_level + 1):
+        assert_buckets_equal(pyramid.get_level(level), naive_buckets(x, columns, 1 << level, x_last))
+
+@pytest.mark.parametrize("length", [1, 2, 7, 64, 1000])
+def test_levels_match_naive_buckets(length):
+    rng = np.random.default_rng(length)
+    x, columns = random_bars(rng, length, x_start=5)
+    pyramid = LODPyramid(x, columns, AGGREGATIONS)
+    assert_pyramid_matches(pyramid, x, columns)
+    level = pyramid.max_level // 2
+    start, end = 1, max(len(x) >> level, 1)
+    expected = {key: values[start:end] for key, values in naive_buckets(x, columns, 1 << level).items()}
+    assert_buckets_equal(pyramid.get_level(level, start, end), expected)
+
+@pytest.mark.parametrize("bucket_size", [1, 3, 16, 2000])
+def test_aggregate_buckets_matches_naive_buckets(bucket_size):
+    rng = np.random.default_rng(bucket_size)
+    x, columns = random_bars(rng, 1000)
+    assert_buckets_equal(aggregate_buckets(x, columns, AGGREGATIONS, bucket_size), naive_buckets(x, columns, bucket_size))
+
+def test_blocks_as_bars_keep_their_last_x_values():
+    rng = np.random.default_rng(0)
+    x, columns = random_bars(rng, 100)
+    x_first, x_last = x * 64, x * 64 + 63
+    pyramid = LODPyramid(x_first, columns, AGGREGATIONS, x_last=x_last)
+    assert_pyramid_matches(pyramid, x_first, columns, x_last)
+
+def test_appending_bars_matches_a_fresh_pyramid():
+    rng = np.random.default_rng(1)
+    x, columns = random_bars(rng, 1500)
+    pyramid = LODPyramid(x[:1], {key: values[:1] for key, values in columns.items()}, AGGREGATIONS)
+    length = 1
+    while length < len(x):
+        length = min(length + int(rng.integers(1, 100)), len(x))
+        pyramid.update(x[:length], {key: values[:length] for key, values in columns.items()})
+        assert_pyramid_matches(pyramid, x[:length], {key: values[:length] for key, values in columns.items()})
+
+def test_changing_bars_from_a_position_matches_a_fresh_pyramid():
+    rng = np.random.default_rng(2)
+    x, columns = random_bars(rng, 600)
+    pyramid = LODPyramid(x, columns, AGGREGATIONS)
+    for _ in range(20):
+        start = int(rng.integers(0, len(x)))
+        new_x, new_columns = random_bars(rng, int(rng.integers(start + 1, len(x) + 50)))
+        for key in columns:
+            new_columns[key][:start] = columns[key][:start]
+        x, columns = new_x, new_columns
+        pyramid.update(x, columns, start)
+        assert_pyramid_matches(pyramid, x, columns)
@@ -0,0 +1,138 @@
+import gc
+import weakref
+import numpy as np
+import pandas as pd
+import pytest
+import pyqtgraph as pg
+from qstock_plotter.libs.data_handler import TradeData
+from qstock_plotter.libs.plot_item import BarGraphObject, CandlestickPricesItem, CandlestickVolumeItem
+
+def random_bars(rng, length, start="2020-01-01"):
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    return {
+        "open": close + rng.normal(0, 1, length),
+        "high": close + rng.uniform(0, 2, length),
+        "low": close - rng.uniform(0, 2, length),
+        "close": close,
+        "volume": rng.integers(0, 10**6, length).astype(np.int64),
+        "date": pd.date_range(start, periods=length, freq="D").to_numpy(),
+    }
+
+@pytest.fixture
+def trade_data():
+    return TradeData.from_data_frame(pd.DataFrame(random_bars(np.random.default_rng(0), 500)))
+
+@pytest.fixture
+def plot_widget(qapp):
+    plot_widget = pg.PlotWidget()
+    plot_widget.resize(800, 400)
+    yield plot_widget
+    # the widget is owned by Python, deleteLater would delete it a second time after it was collected
+    plot_widget.close()
+
+def record_drawn_rows(item):
+    drawn_rows = []
+    draw_bars = item._draw_bars
+    item._draw_bars = lambda p, start, end: drawn_rows.append((start, end)) or draw_bars(p, start, end)
+    return drawn_rows
+
+def show_x_range(plot_widget, x_start, x_end):
+    plot_widget.setXRange(x_start, x_end, padding=0)
+    plot_widget.grab()
+
+def test_only_the_tiles_in_the_view_are_drawn(plot_widget, trade_data):
+    item = CandlestickPricesItem(trade_data.prices)
+    drawn_rows = record_drawn_rows(item)
+    plot_widget.addItem(item)
+    show_x_range(plot_widget, 300, 350)
+    tile_size = BarGraphObject.tile_size
+    assert drawn_rows == [(tile_size, 500)]
+    show_x_range(plot_widget, 200, 300)
+    assert sorted(drawn_rows) == [(0, tile_size), (tile_size, 500)]
+
+def test_tiles_are_cached_until_their_bars_change(plot_widget, trade_data):
+    item = CandlestickPricesItem(trade_data.prices)
+    drawn_rows = record_drawn_rows(item)
+    plot_widget.addItem(item)
+    show_x_range(plot_widget, 100, 200)
+    show_x_range(plot_widget, 400, 500)
+    assert drawn_rows == [(0, 256), (256, 500)]
+    show_x_range(plot_widget, 110, 190)
+    assert len(drawn_rows) == 2
+    # only the tiles of the changed bars are drawn again
+    trade_data.append_bars(random_bars(np.random.default_rng(1), 1, start="2021-05-16"))
+    show_x_range(plot_widget, 100, 200)
+    show_x_range(plot_widget, 400, 501)
+    assert drawn_rows[2:] == [(256, 501)]
+    trade_data.update_last_bar({"close": 100.0})
+    show_x_range(plot_widget, 100, 200)
+    show_x_range(plot_widget, 400, 501)
+    assert drawn_rows[3:] == [(256, 501)]
+
+def test_the_tile_cache_is_bounded(plot_widget, trade_data, monkeypatch):
+    monkeypatch.setattr(BarGraphObject, "tile_size", 16)
+    item = CandlestickPricesItem(trade_data.prices)
+    plot_widget.addItem(item)
+    show_x_range(plot_widget, 0, 100)
+    tile_bytes = item._BarGraphObject__tile_bytes
+    assert len(item._BarGraphObject__tiles) == 7
+    item.tile_cache_bytes = tile_bytes // 2
+    show_x_range(plot_widget, 300, 400)
+    assert item._BarGraphObject__tile_bytes <= item.tile_cache_bytes
+    assert 0 < len(item._BarGraphObject__tiles) < 7
+
+class RecordingPainter():
+
+    def __init__(self):
+        self.brushes, self.rects = [], []
+
+    def setBrush(self, brush):
+        self.brushes.append(brush.color().name())
+
+    def setPen(self, pen):
+        pass
+
+    def drawRects(self, rects):
+        self.rects.append(len(rects))
+
+def test_candles_are_drawn_with_one_call_per_direction(qapp, trade_data):
+    item = CandlestickPricesItem(trade_data.prices)
+    painter = RecordingPainter()
+    item._draw_bars(painter, 0, 100)
+    closes, opens = trade_data.prices.get_column("close", 0, 100), trade_data.prices.get_column("open", 0, 100)
+    positive = int((closes > opens).sum())
+    colors = [item.style.positive_color, item.style.negative_color]
+    assert painter.brushes == [pg.mkColor(color).name() for color in colors]
+    # a body and a shadow for every candle
+    assert painter.rects == [2 * positive, 2 * (100 - positive)]
+
+def test_feature_values_are_cached_read_only_arrays(qapp, trade_data):
+    prices_item = CandlestickPricesItem(trade_data.prices)
+    volume_item = CandlestickVolumeItem(trade_data.volume)
+    closes = prices_item.get_feature_value()
+    assert prices_item.get_feature_value() is closes
+    assert prices_item.get_feature_value("open") is not closes
+    assert not closes.flags.writeable
+    np.testing.assert_array_equal(closes, trade_data.prices.get_column("close"))
+    np.testing.assert_array_equal(volume_item.get_feature_value(), trade_data.volume.get_column("volume") / 1e8)
+    with pytest.raises(ValueError):
+        prices_item.get_feature_value("volume")
+
+def test_feature_values_are_computed_again_after_the_data_changed(qapp, trade_data):
+    prices_item = CandlestickPricesItem(trade_data.prices)
+    volume_item = CandlestickVolumeItem(trade_data.volume)
+    closes, volumes = prices_item.get_feature_value(), volume_item.get_feature_value()
+    bars = random_bars(np.random.default_rng(1), 3, start="2021-05-16")
+    trade_data.append_bars(bars)
+    assert len(prices_item.get_feature_value()) == len(closes) + 3
+    np.testing.assert_array_equal(prices_item.get_feature_value()[-3:], bars["close"])
+    np.testing.assert_array_equal(volume_item.get_feature_value()[-3:], bars["volume"] / 1e8)
+    assert len(closes) == 500 and len(volumes) == 500
+
+def test_removed_items_do_not_stay_alive_with_the_data(qapp, trade_data):
+    prices_item = CandlestickPricesItem(trade_data.prices)
+    reference = weakref.ref(prices_item)
+    del prices_item
+    gc.collect()
+    assert reference() is None
+    trade_data.append_bars(random_bars(np.random.default_rng(2), 1, start="2021-05-16"))
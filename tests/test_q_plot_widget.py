@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pyqtgraph as pg
+from PyQt6.QtGui import QColor
+from qstock_plotter.compoents.average_line import AverageLineItem
+from qstock_plotter.libs.data_handler import PricesDataFrame
+from qstock_plotter.libs.plot_item import CandlestickPricesItem
+from qstock_plotter.widgets.q_plot_widget import QPlotWidget
+
+def random_prices(rng, length, index_start=0):
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    low, high = close - rng.uniform(0, 2, length), close + rng.uniform(0, 2, length)
+    data_frame = pd.DataFrame({"open": close + rng.normal(0, 1, length), "high": high, "low": low, "close": close,
+                               "date": pd.date_range("2020-01-01", periods=length, freq="D")},
+                              index=np.arange(index_start, index_start + length))
+    return PricesDataFrame(data_frame), low, high, close
+
+def naive_envelope(columns, start, end):
+    min_values, max_values = [], []
+    for x_offset, low, high in columns:
+        first, last = max(int(start) - x_offset, 0), max(int(end) - x_offset + 1, 0)
+        min_values.extend(low[first:last])
+        max_values.extend(high[first:last])
+    if len(min_values) == 0:
+        return None
+    return np.nanmin(min_values), np.nanmax(max_values)
+
+@pytest.fixture
+def plot_widget(qapp):
+    plot_widget = QPlotWidget()
+    yield plot_widget
+    # the widget is owned by Python, deleteLater would delete it a second time after it was collected
+    plot_widget.close()
+
+def test_local_range_is_the_envelope_of_the_shown_items(plot_widget):
+    rng = np.random.default_rng(0)
+    prices, low, high, close = random_prices(rng, 400, index_start=0)
+    lines = {n: AverageLineItem(close, n, QColor("red"), 1) for n in [5, 30]}
+    plot_widget.add_item(CandlestickPricesItem(prices))
+    for line in lines.values():
+        plot_widget.add_item(line)
+    averages = {n: np.array([np.mean(close[i:i+n]) for i in range(len(close)-n+1)]) for n in lines}
+    columns = [(0, low, high)] + [(n - 1, values, values) for n, values in averages.items()]
+    for _ in range(200):
+        start, end = sorted(rng.uniform(-20, 420, 2))
+        np.testing.assert_allclose(plot_widget.get_local_range(start, end), naive_envelope(columns, start, end),
+                                   rtol=1e-12)
+    plot_widget.set_item_visible(lines[5], False)
+    for _ in range(50):
+        start, end = sorted(rng.uniform(0, 400, 2))
+        np.testing.assert_allclose(plot_widget.get_local_range(start, end),
+                                   naive_envelope(columns[:1] + columns[2:], start, end), rtol=1e-12)
+
+def test_local_range_without_data_is_the_view_range(plot_widget):
+    prices, _, _, _ = random_prices(np.random.default_rng(1), 50, index_start=100)
+    plot_widget.add_item(CandlestickPricesItem(prices))
+    view_rect = plot_widget.viewRect()
+    assert plot_widget.get_local_range(0, 50) == (view_rect.top(), view_rect.bottom())
+
+def record_signal(signal):
+    emitted = []
+    signal.connect(lambda *args: emitted.append(args))
+    return emitted
+
+def test_hiding_an_item_keeps_the_bounds(plot_widget):
+    prices, _, _, close = random_prices(np.random.default_rng(2), 200)
+    plot_widget.add_item(CandlestickPricesItem(prices))
+    line = AverageLineItem(close, 10, QColor("red"), 1)
+    plot_widget.add_item(line)
+    plot_widget.flush_update()
+    bounds = (plot_widget.x_start, plot_widget.x_end, plot_widget.y_start, plot_widget.y_end)
+    bounding_updates = record_signal(plot_widget.sigBoundingUpdated)
+    requests = plot_widget.update_counters.requests
+    plot_widget.set_item_visible(line, False)
+    assert not plot_widget.is_item_visible(line) and line in plot_widget.plotted_items
+    # hiding a hidden item changes nothing
+    plot_widget.set_item_visible(line, False)
+    plot_widget.set_item_visible(line, True)
+    assert plot_widget.update_counters.requests == requests + 2
+    assert bounding_updates == []
+    assert (plot_widget.x_start, plot_widget.x_end, plot_widget.y_start, plot_widget.y_end) == bounds
+
+def test_batch_update_applies_the_changes_at_once(plot_widget):
+    prices, _, _, close = random_prices(np.random.default_rng(3), 200)
+    plot_widget.add_item(CandlestickPricesItem(prices))
+    plot_widget.flush_update()
+    bounding_updates = record_signal(plot_widget.sigBoundingUpdated)
+    added = record_signal(plot_widget.sigItemAdded)
+    requests = plot_widget.update_counters.requests
+    lines = [AverageLineItem(close, n, QColor("red"), 1) for n in [5, 10, 20]]
+    with plot_widget.batch_update():
+        for line in lines:
+            plot_widget.add_item(line)
+        with plot_widget.batch_update():
+            plot_widget.set_item_visible(lines[0], False)
+        assert bounding_updates == [] and added == []
+        assert plot_widget.update_counters.requests == requests
+    assert len(bounding_updates) == 1 and len(added) == 1
+    assert plot_widget.plotted_items[1:] == lines
+    # the update of the bounds and the plot update it triggers are merged into one
+    updates = plot_widget.update_counters.updates
+    plot_widget.flush_update()
+    assert plot_widget.update_counters.updates == updates + 1
+    bounding_updates.clear()
+    requests = plot_widget.update_counters.requests
+    with plot_widget.batch_update():
+        for line in lines:
+            plot_widget.set_item_visible(line, not plot_widget.is_item_visible(line))
+    # only the visibility changed, so the plot is updated without recalculating the bounds
+    assert bounding_updates == []
+    assert plot_widget.update_counters.requests == requests + 1
+
+def test_overlay_items_are_ignored_by_the_bounds_and_the_range(plot_widget):
+    prices, low, high, _ = random_prices(np.random.default_rng(4), 200)
+    plot_widget.add_item(CandlestickPricesItem(prices))
+    plot_widget.flush_update()
+    bounds = (plot_widget.x_start, plot_widget.x_end, plot_widget.y_start, plot_widget.y_end)
+    bounding_updates = record_signal(plot_widget.sigBoundingUpdated)
+    requests = plot_widget.update_counters.requests
+    rubber_band = pg.PlotCurveItem(x=np.array([-500.0, 900.0]), y=np.array([-1e4, 1e4]))
+    plot_widget.add_overlay_item(rubber_band)
+    plot_widget.add_overlay_item(rubber_band)
+    assert plot_widget.overlay_items == [rubber_band] and rubber_band not in plot_widget.plotted_items
+    assert rubber_band.zValue() == plot_widget.overlay_z_value
+    rubber_band.setData(x=np.array([-1000.0, 2000.0]), y=np.array([-1e5, 1e5]))
+    np.testing.assert_allclose(plot_widget.get_local_range(0, 199), naive_envelope([(0, low, high)], 0, 199))
+    plot_widget.remove_overlay_item(rubber_band)
+    plot_widget.remove_overlay_item(rubber_band)
+    assert plot_widget.overlay_items == [] and rubber_band.scene() is None
+    assert bounding_updates == [] and plot_widget.update_counters.requests == requests
+    assert (plot_widget.x_start, plot_widget.x_end, plot_widget.y_start, plot_widget.y_end) == bounds
+
+def rect_bounds(item):
+    rect = item.boundingRect()
+    return rect.left(), rect.right(), rect.top(), rect.bottom()
+
+def test_bounds_follow_the_cached_bounds_of_the_items(plot_widget, monkeypatch):
+    rng = np.random.default_rng(5)
+    live_prices, _, _, _ = random_prices(rng, 100)
+    other_prices, _, _, _ = random_prices(rng, 300)
+    live_item, other_item = CandlestickPricesItem(live_prices), CandlestickPricesItem(other_prices)
+    plot_widget.add_item(live_item)
+    plot_widget.add_item(other_item)
+    other_bounds = rect_bounds(other_item)
+    # the bounds of the other item are cached, so they are not read again when the live item changes
+    monkeypatch.setattr(other_item, "boundingRect", lambda: pytest.fail("the bounds were read again"))
+    live_prices.append_bars({"open": 500.0, "high": 1000.0, "low": -1000.0, "close": 500.0,
+                             "date": np.datetime64("2021-01-01")})
+    live_bounds = rect_bounds(live_item)
+    assert live_bounds[3] > other_bounds[3] and live_bounds[2] < other_bounds[2]
+    assert (plot_widget.x_start, plot_widget.x_end, plot_widget.y_start, plot_widget.y_end) == \
+        (other_bounds[0], other_bounds[1], live_bounds[2], live_bounds[3])
+    # removing the item defining the bounds shrinks them, pyqtgraph reads the bounds of its items itself then
+    monkeypatch.undo()
+    plot_widget.remove_item(live_item)
+    assert (plot_widget.x_start, plot_widget.x_end, plot_widget.y_start, plot_widget.y_end) == other_bounds
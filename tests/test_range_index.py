@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from qstock_plotter.libs.range_index import RangeIndex
+from qstock_plotter.libs.data_handler import ColumnStore, PricesDataFrame
+
+def naive_query(min_values, max_values, start, end):
+    start, end = max(start, 0), min(end, len(min_values))
+    if start >= end:
+        return np.nan, np.nan
+    return np.fmin.reduce(min_values[start:end]), np.fmax.reduce(max_values[start:end])
+
+def random_columns(rng, length, nan_fraction=0.05):
+    low = rng.normal(100, 10, length)
+    high = low + rng.uniform(0, 5, length)
+    nan = rng.random(length) < nan_fraction
+    low[nan] = np.nan
+    high[nan] = np.nan
+    return low, high
+
+def assert_same(result, expected):
+    np.testing.assert_array_equal(np.asarray(result, dtype=np.float64), np.asarray(expected, dtype=np.float64))
+
+def check_queries(rng, index, min_values, max_values, num_queries=300):
+    length = len(min_values)
+    for _ in range(num_queries):
+        start, end = sorted(rng.integers(-3, length + 4, 2))
+        assert_same(index.query(start, end), naive_query(min_values, max_values, start, end))
+
+@pytest.mark.parametrize("block_size", [1, 3, 64])
+@pytest.mark.parametrize("length", [0, 1, 63, 64, 65, 1000])
+def test_query_matches_naive_reduction(block_size, length):
+    rng = np.random.default_rng(length * 7 + block_size)
+    low, high = random_columns(rng, length)
+    index = RangeIndex(low, high, block_size=block_size)
+    assert len(index) == length
+    check_queries(rng, index, low, high)
+
+def test_empty_and_all_nan_ranges_are_nan():
+    low = np.array([np.nan, np.nan, 1.0, np.nan])
+    index = RangeIndex(low, low, block_size=2)
+    assert_same(index.query(2, 2), (np.nan, np.nan))
+    assert_same(index.query(3, 1), (np.nan, np.nan))
+    assert_same(index.query(0, 2), (np.nan, np.nan))
+    assert_same(index.query(0, 4), (1.0, 1.0))
+
+def test_precomputed_block_extrema():
+    rng = np.random.default_rng(1)
+    low, high = random_columns(rng, 500)
+    block_min = np.fmin.reduceat(low, np.arange(0, 500, 16))
+    block_max = np.fmax.reduceat(high, np.arange(0, 500, 16))
+    index = RangeIndex(low, high, block_size=16, block_min=block_min, block_max=block_max)
+    check_queries(rng, index, low, high)
+
+@pytest.mark.parametrize("block_size", [1, 4, 64])
+def test_appending_rows_matches_a_fresh_index(block_size):
+    rng = np.random.default_rng(block_size)
+    low, high = random_columns(rng, 2000)
+    index = RangeIndex(low[:0], high[:0], block_size=block_size)
+    length = 0
+    while length < len(low):
+        length = min(length + int(rng.integers(1, 90)), len(low))
+        index.update(low[:length], high[:length])
+        check_queries(rng, index, low[:length], high[:length], num_queries=20)
+
+@pytest.mark.parametrize("block_size", [1, 5, 64])
+def test_changing_rows_from_a_position_matches_a_fresh_index(block_size):
+    rng = np.random.default_rng(10 + block_size)
+    low, high = random_columns(rng, 700)
+    index = RangeIndex(low, high, block_size=block_size)
+    for _ in range(30):
+        start = int(rng.integers(0, len(low)))
+        length = int(rng.integers(start, len(low) + 200))
+        new_low, new_high = random_columns(rng, length)
+        new_low[:start], new_high[:start] = low[:start], high[:start]
+        low, high = new_low, new_high
+        index.update(low, high, start)
+        check_queries(rng, index, low, high, num_queries=50)
+        assert_same(index.query(0, len(low)), naive_query(low, high, 0, len(low)))
+
+def test_local_range_of_a_data_frame_covers_the_x_values_in_the_view():
+    rng = np.random.default_rng(2)
+    low, high = random_columns(rng, 300, nan_fraction=0)
+    store = ColumnStore({"open": low, "close": high, "high": high, "low": low,
+                         "date": np.arange(300).astype("datetime64[D]")}, index=np.arange(100, 400))
+    prices = PricesDataFrame(store)
+    for _ in range(100):
+        x_start, x_end = sorted(rng.uniform(90, 410, 2))
+        start, end = int(x_start) - 100, int(x_end) - 100 + 1
+        assert_same(prices.get_local_range(x_start, x_end), naive_query(low, high, start, end))
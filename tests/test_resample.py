@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+from qstock_plotter.libs.resample import resample_ohlcv, get_period_starts, parse_rule
+from qstock_plotter.libs.data_handler import DataHandler, TradeData
+
+NAIVE_KEYS = {
+    "W": lambda date: tuple(date.isocalendar())[:2],
+    "M": lambda date: (date.year, date.month),
+    "Q": lambda date: (date.year, (date.month - 1) // 3),
+    "Y": lambda date: date.year,
+    "2D": lambda date: (date - pd.Timestamp(0)).days // 2,
+    "15min": lambda date: (date - pd.Timestamp(0)) // pd.Timedelta(minutes=15),
+}
+
+def random_columns(rng, dates):
+    length = len(dates)
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    open_prices = close + rng.normal(0, 1, length)
+    return {
+        "date": np.asarray(dates, dtype="datetime64[ns]"),
+        "open": open_prices,
+        "high": np.maximum(open_prices, close) + rng.uniform(0, 1, length),
+        "low": np.minimum(open_prices, close) - rng.uniform(0, 1, length),
+        "close": close,
+        "volume": rng.integers(0, 10**6, length).astype(np.float64),
+    }
+
+def random_days(rng, length, start="2019-12-27"):
+    # business days with a few missing days, e.g., holidays
+    days = pd.bdate_range(start, periods=int(length * 1.1))
+    return np.sort(rng.choice(days, length, replace=False))
+
+def naive_resample(columns, rule):
+    keys = [NAIVE_KEYS[rule](pd.Timestamp(date)) for date in columns["date"]]
+    groups = []
+    for position, key in enumerate(keys):
+        if position == 0 or key != keys[position - 1]:
+            groups.append([])
+        groups[-1].append(position)
+    return {
+        "date": np.array([columns["date"][group[-1]] for group in groups]),
+        "open": np.array([columns["open"][group[0]] for group in groups]),
+        "high": np.array([np.max(columns["high"][group]) for group in groups]),
+        "low": np.array([np.min(columns["low"][group]) for group in groups]),
+        "close": np.array([columns["close"][group[-1]] for group in groups]),
+        "volume": np.array([np.sum(columns["volume"][group]) for group in groups]),
+    }, np.array([group[0] for group in groups])
+
+def assert_columns_equal(columns, expected):
+    assert set(columns.keys()) == set(expected.keys())
+    for key, values in expected.items():
+        if np.issubdtype(np.asarray(values).dtype, np.datetime64):
+            np.testing.assert_array_equal(columns[key], values, err_msg=key)
+        else:
+            np.testing.assert_allclose(np.asarray(columns[key], dtype=np.float64), values, rtol=1e-12, err_msg=key)
+
+@pytest.mark.parametrize("rule", ["W", "M", "Q", "Y", "2D"])
+def test_daily_bars_match_naive_grouping(rule):
+    rng = np.random.default_rng(0)
+    columns = random_columns(rng, random_days(rng, 800))
+    resampled, starts = resample_ohlcv(columns, rule)
+    expected, expected_starts = naive_resample(columns, rule)
+    assert_columns_equal(resampled, expected)
+    np.testing.assert_array_equal(starts, expected_starts)
+    np.testing.assert_array_equal(get_period_starts(columns["date"], rule), expected_starts)
+
+def test_intraday_bars_match_naive_grouping():
+    rng = np.random.default_rng(1)
+    minutes = pd.date_range("2024-03-01 09:30", periods=2000, freq="min")
+    columns = random_columns(rng, np.sort(rng.choice(minutes, 600, replace=False)))
+    resampled, starts = resample_ohlcv(columns, "15min")
+    expected, expected_starts = naive_resample(columns, "15min")
+    assert_columns_equal(resampled, expected)
+    np.testing.assert_array_equal(starts, expected_starts)
+
+def test_compact_volumes_are_summed_without_overflow():
+    dates = pd.date_range("2024-01-01", periods=10, freq="D").to_numpy()
+    volume = np.full(10, np.iinfo(np.uint32).max, dtype=np.uint32)
+    resampled, _ = resample_ohlcv({"date": dates, "volume": volume}, "Y")
+    assert resampled["volume"].dtype == np.uint64
+    assert resampled["volume"][0] == 10 * int(np.iinfo(np.uint32).max)
+
+def test_empty_bars_and_invalid_rules():
+    rng = np.random.default_rng(2)
+    columns = {key: values[:0] for key, values in random_columns(rng, random_days(rng, 5)).items()}
+    resampled, starts = resample_ohlcv(columns, "W")
+    assert len(starts) == 0 and all(len(values) == 0 for values in resampled.values())
+    assert parse_rule("15min") == (15, "min")
+    for rule in ["0D", "W-MON", "1.5H"]:
+        with pytest.raises(ValueError):
+            parse_rule(rule)
+
+def create_handler(columns, resample_block_rows=None):
+    handler = DataHandler()
+    if resample_block_rows is not None:
+        handler.resample_block_rows = resample_block_rows
+    handler.day_data = TradeData.from_data_frame(pd.DataFrame(columns))
+    return handler
+
+def get_resampled_columns(data):
+    columns = {key: data.prices.get_column(key) for key in ["date", "open", "high", "low", "close"]}
+    columns["volume"] = data.volume.get_column("volume")
+    return columns
+
+@pytest.mark.parametrize("resample_block_rows", [1, 7, 64, 1000])
+def test_resampling_block_by_block_matches_a_single_pass(resample_block_rows):
+    rng = np.random.default_rng(3)
+    columns = random_columns(rng, random_days(rng, 700))
+    handler = create_handler(columns, resample_block_rows)
+    for rule, data in [("W", handler.week_data), ("M", handler.month_data), ("Q", handler.resample("Q"))]:
+        expected, _ = resample_ohlcv(columns, rule)
+        assert_columns_equal(get_resampled_columns(data), expected)
+
+def test_appended_and_updated_bars_are_resampled_incrementally():
+    rng = np.random.default_rng(4)
+    columns = random_columns(rng, random_days(rng, 400))
+    handler = create_handler({key: values[:100] for key, values in columns.items()})
+    week_data, month_data = handler.week_data, handler.month_data
+    length = 100
+    while length < 400:
+        end = min(length + int(rng.integers(1, 30)), 400)
+        handler.day_data.append_bars({key: values[length:end] for key, values in columns.items()})
+        length = end
+        # the last bar changes while its period is not finished
+        columns["close"][length - 1] += 1
+        columns["high"][length - 1] += 1
+        handler.day_data.update_last_bar({"close": columns["close"][length - 1], "high": columns["high"][length - 1]})
+        head = {key: values[:length] for key, values in columns.items()}
+        assert handler.week_data is week_data and handler.month_data is month_data
+        assert_columns_equal(get_resampled_columns(week_data), resample_ohlcv(head, "W")[0])
+        assert_columns_equal(get_resampled_columns(month_data), resample_ohlcv(head, "M")[0])
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from qstock_plotter.libs import rolling
+from qstock_plotter.libs.rolling import get_windows, sma, wma, rolling_std, ema, ema_continue
+
+def naive_rolling(values, window, reduce):
+    return np.array([reduce(values[end-window+1:end+1]) for end in range(window-1, len(values))])
+
+def naive_wma(window_values):
+    weights = np.arange(1, len(window_values)+1)
+    return np.sum(window_values * weights) / np.sum(weights)
+
+def naive_ema(values, window, alpha=None):
+    alpha = 2 / (window + 1) if alpha is None else alpha
+    if len(values) < window:
+        return np.empty(0)
+    result = [np.mean(values[:window])]
+    for value in values[window:]:
+        result.append(alpha * value + (1 - alpha) * result[-1])
+    return np.array(result)
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return 3000 + np.cumsum(rng.normal(0, 5, 3000))
+
+@pytest.fixture(params=[False, True], ids=["one_block", "small_blocks"])
+def block_elements(request, monkeypatch):
+    if request.param:
+        # the windows are reduced in many blocks
+        monkeypatch.setattr(rolling, "BLOCK_ELEMENTS", 64)
+        monkeypatch.setattr(rolling, "CUMSUM_BLOCK_RATIO", 1)
+
+@pytest.mark.parametrize("window", [1, 2, 5, 20, 250])
+def test_moving_averages_match_naive_loops(prices, window, block_elements):
+    np.testing.assert_array_equal(sma(prices, window),
+                                  [np.mean(prices[i:i+window]) for i in range(len(prices)-window+1)])
+    np.testing.assert_allclose(wma(prices, window), naive_rolling(prices, window, naive_wma), rtol=1e-12)
+    np.testing.assert_allclose(rolling_std(prices, window), naive_rolling(prices, window, np.std), rtol=1e-9, atol=1e-9)
+    if window > 1:
+        np.testing.assert_allclose(rolling_std(prices, window, ddof=1),
+                                   naive_rolling(prices, window, lambda values: np.std(values, ddof=1)),
+                                   rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize("window", [3, 40])
+def test_cumulative_statistics_keep_their_precision(window, block_elements):
+    rng = np.random.default_rng(1)
+    # large prices drifting far away from their first values, with flat stretches of equal prices
+    values = 1e6 + np.cumsum(rng.normal(0, 50, 20000))
+    values[5000:5100] = values[5000]
+    np.testing.assert_allclose(wma(values, window), naive_rolling(values, window, naive_wma), rtol=1e-12)
+    np.testing.assert_allclose(rolling_std(values, window), naive_rolling(values, window, np.std), rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(rolling_std(values, window)[5000:5100-window+1], 0)
+
+def test_windows_with_missing_values_are_nan(prices, block_elements):
+    values = prices.copy()
+    values[[10, 11, 500, 2999]] = np.nan
+    for function, reduce in [(wma, naive_wma), (rolling_std, np.std)]:
+        result, expected = function(values, 7), naive_rolling(values, 7, reduce)
+        np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+        np.testing.assert_allclose(result[~np.isnan(result)], expected[~np.isnan(expected)], rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize("window", [1, 2, 5, 20, 250])
+def test_ema_matches_the_recursion(prices, window):
+    np.testing.assert_allclose(ema(prices, window), naive_ema(prices, window), rtol=1e-10)
+
+def test_ema_with_a_custom_smoothing_factor(prices):
+    np.testing.assert_allclose(ema(prices, 10, alpha=0.5), naive_ema(prices, 10, alpha=0.5), rtol=1e-10)
+    np.testing.assert_array_equal(ema(prices, 1, alpha=1), prices)
+    with pytest.raises(ValueError):
+        ema(prices, 10, alpha=0)
+
+@pytest.mark.parametrize("window", [2, 30])
+def test_ema_continue_matches_a_full_calculation(prices, window):
+    # the decay of a window of 2 spans several blocks of scaled terms
+    alpha = 2 / (window + 1)
+    full = ema(prices, window)
+    for split in [window, window + 1, 700, len(prices) - 1]:
+        head = ema(prices[:split], window)
+        tail = ema_continue(prices[split:], alpha, head[-1])
+        np.testing.assert_allclose(np.concatenate([head, tail]), full, rtol=1e-12)
+    out = np.empty(len(prices) - window)
+    assert ema_continue(prices[window:], alpha, full[0], out) is out
+    np.testing.assert_allclose(out, full[1:], rtol=1e-12)
+
+def test_short_values_give_no_windows(prices):
+    for function in [sma, wma, rolling_std, ema]:
+        assert len(function(prices[:4], 5)) == 0
+    assert get_windows(prices[:4], 5).shape == (0, 5)
+    assert len(ema_continue(prices[:0], 0.5, 1.0)) == 0
+
+def test_windows_are_read_only_views(prices):
+    windows = get_windows(prices, 3)
+    assert windows.shape == (len(prices) - 2, 3)
+    assert np.shares_memory(windows, prices)
+    assert not windows.flags.writeable
+    with pytest.raises(ValueError):
+        get_windows(prices, 0)
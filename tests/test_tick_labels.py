@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from qstock_plotter.libs.tick_labels import TickLabelProvider, to_datetime64
+
+def test_dates_are_formatted_only_for_the_requested_labels():
+    dates = np.arange("2000-01-03", "2000-03-03", dtype="datetime64[D]")
+    provider = TickLabelProvider(dates, index_start=10)
+    assert (provider.min_index, provider.max_index, len(provider)) == (10, 10 + len(dates) - 1, len(dates))
+    assert provider[10] == "2000-01-03"
+    assert provider.get_labels([12, 11, 12]) == ["2000-01-05", "2000-01-04", "2000-01-05"]
+    assert 9 not in provider and 10 in provider
+    with pytest.raises(KeyError):
+        provider[9]
+
+def test_the_cache_of_formatted_labels_is_bounded():
+    provider = TickLabelProvider(np.arange(1000), cache_size=8)
+    assert provider.get_labels(list(range(20))) == [str(value) for value in range(20)]
+    assert provider[999] == "999"
+    assert len(provider._TickLabelProvider__cache) <= 8
+
+def test_updated_labels_replace_their_cached_labels():
+    labels = np.array(["a", "b", "c"])
+    provider = TickLabelProvider(labels, index_start=5)
+    assert provider.get_labels([5, 6, 7]) == ["a", "b", "c"]
+    provider.update(np.array(["a", "b", "x", "y"]), start=2)
+    assert provider.get_labels([5, 6, 7, 8]) == ["a", "b", "x", "y"]
+
+def test_consecutive_dictionaries_keep_their_labels():
+    provider = TickLabelProvider.from_dict({3: "x", 4: "y", 5: "z"})
+    assert (provider.min_index, provider.max_index) == (3, 5)
+    assert provider.get_labels([3, 4, 5]) == ["x", "y", "z"]
+
+def test_gapped_dictionaries_keep_their_labels_at_their_index_values():
+    ticks = {0: "2000-01-03", 1: "2000-01-04", 5: "2000-01-10", 9: "2000-01-14", 25: "2000-02-22"}
+    provider = TickLabelProvider.from_dict(ticks)
+    assert (provider.min_index, provider.max_index) == (0, 25)
+    for index, label in ticks.items():
+        assert provider[index] == label
+    assert provider[2] == "" and provider[24] == ""
+    with pytest.raises(ValueError):
+        TickLabelProvider.from_dict({0.5: "a", 1.5: "b"})
+
+def test_dates_use_the_coarsest_exact_unit():
+    assert to_datetime64(["2000-01-04", "2000-01-05"]).dtype == np.dtype("datetime64[D]")
+    assert to_datetime64(["2000-01-04 09:30", "2000-01-04 09:31"]).dtype == np.dtype("datetime64[m]")
+    assert to_datetime64(["a", "b"]) is None
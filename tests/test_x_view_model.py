@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PyQt6.QtTest import QTest
+from qstock_plotter.libs.data_handler import PricesDataFrame
+from qstock_plotter.libs.plot_item import CandlestickPricesItem
+from qstock_plotter.widgets.q_plot_widget import QPlotWidget
+
+def random_prices(rng, length):
+    close = 100 + np.cumsum(rng.normal(0, 1, length))
+    return PricesDataFrame(pd.DataFrame({"open": close + rng.normal(0, 1, length),
+                                         "high": close + rng.uniform(0, 2, length),
+                                         "low": close - rng.uniform(0, 2, length), "close": close,
+                                         "date": pd.date_range("2020-01-01", periods=length, freq="D")}))
+
+@pytest.fixture
+def make_plot_widget(qapp):
+    plot_widgets = []
+    def make_plot_widget(seed=0, length=500):
+        plot_widget = QPlotWidget()
+        plot_widget.resize(400, 300)
+        plot_widget.add_item(CandlestickPricesItem(random_prices(np.random.default_rng(seed), length)))
+        plot_widget.flush_update()
+        plot_widgets.append(plot_widget)
+        return plot_widget
+    yield make_plot_widget
+    # the widgets are owned by Python, deleteLater would delete them a second time after they were collected
+    for plot_widget in plot_widgets:
+        plot_widget.close()
+
+def x_view(plot_widget):
+    view_rect = plot_widget.viewRect()
+    return view_rect.left(), view_rect.width()
+
+def test_requests_until_the_next_frame_are_merged(make_plot_widget):
+    plot_widget = make_plot_widget()
+    plot_widget.max_update_fps = None
+    counters = plot_widget.update_counters
+    requests, updates, merged = counters.requests, counters.updates, counters.merged
+    plot_widget.update_plot(50, 100)
+    plot_widget.update_plot(x_range=80)
+    plot_widget.update_plot(x_loc=120)
+    # nothing is updated before the next frame
+    assert counters.updates == updates
+    QTest.qWait(20)
+    assert (counters.requests, counters.updates, counters.merged) == (requests + 3, updates + 1, merged + 2)
+    # the missing values of a request refer to the view the earlier requests would leave, the range is zoomed around
+    # its center by default
+    assert x_view(plot_widget) == pytest.approx((120, 80))
+    plot_widget.flush_update()
+    assert counters.updates == updates + 1
+
+def test_updates_are_limited_to_the_maximum_fps(make_plot_widget):
+    plot_widget = make_plot_widget()
+    plot_widget.max_update_fps = 5
+    counters = plot_widget.update_counters
+    plot_widget.update_plot(50, 100)
+    plot_widget.flush_update()
+    updates = counters.updates
+    plot_widget.update_plot(60, 100)
+    QTest.qWait(20)
+    assert counters.updates == updates and x_view(plot_widget) == pytest.approx((50, 100))
+    QTest.qWait(400)
+    assert counters.updates == updates + 1 and x_view(plot_widget) == pytest.approx((60, 100))
+
+def test_linked_panes_are_updated_together_without_updating_each_other(make_plot_widget):
+    price_pane, volume_pane = make_plot_widget(seed=1), make_plot_widget(seed=2)
+    x_view_model = price_pane.x_view_model
+    x_view_model.max_fps = None
+    x_view_model.add_pane(volume_pane)
+    assert volume_pane.x_view_model is x_view_model and x_view_model.panes == [price_pane, volume_pane]
+    x_views = []
+    x_view_model.sigXViewChanged.connect(lambda x_loc, x_range: x_views.append((x_loc, x_range)))
+    updates = x_view_model.counters.updates
+    volume_pane.update_plot(200, 50)
+    price_pane.update_plot(x_loc=210)
+    QTest.qWait(20)
+    assert x_views == [pytest.approx((210, 50))]
+    assert x_view(price_pane) == pytest.approx((210, 50)) and x_view(volume_pane) == pytest.approx((210, 50))
+    # every pane calculates its own y-range
+    assert price_pane.viewRect().top() != volume_pane.viewRect().top()
+    # the range changes of the panes, delivered by their rate-limited signal proxies, are not requested again
+    QTest.qWait(200)
+    assert x_view_model.counters.updates == updates + 1 and len(x_views) == 1
+
+def test_removed_pane_gets_its_own_model(make_plot_widget):
+    price_pane, volume_pane = make_plot_widget(seed=1), make_plot_widget(seed=2)
+    x_view_model = price_pane.x_view_model
+    x_view_model.add_pane(volume_pane)
+    x_view_model.remove_pane(volume_pane)
+    assert x_view_model.panes == [price_pane]
+    assert volume_pane.x_view_model is not x_view_model and volume_pane.x_view_model.panes == [volume_pane]
+    assert volume_pane.max_update_fps == x_view_model.max_fps
+    x_view_model.max_fps = None
+    price_view = x_view(price_pane)
+    volume_pane.update_plot(100, 50)
+    volume_pane.flush_update()
+    assert x_view(volume_pane) == pytest.approx((100, 50)) and x_view(price_pane) == price_view
+    # removing a pane which is not linked changes nothing
+    x_view_model.remove_pane(volume_pane)
+    assert x_view_model.panes == [price_pane]